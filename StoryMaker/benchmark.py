@@ -0,0 +1,170 @@
+# benchmark.py
+# Benchmarks for the headless renderer (page scenes, rendering, combining JPGs).
+# Writes the same JSON format as backend/benchmarks, so baselines can be compared with
+#   python -m benchmarks.baseline compare <results.json>   (run inside backend/)
+#
+# Usage:
+#   python benchmark.py [--sizes 10 100] [--repeat 10] [--json storymaker.json]
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Render without a display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+
+from scenes import SeitenSzene
+from rendering import combine_jpgs_vertically, render_scene_image
+
+SCHEMA_VERSION = 1  # same format as backend/benchmarks/harness.py, checked by backend/tests/test_baseline.py
+BOOK_SIZES = (10, 100)  # combined JPGs are limited to 65535 px height
+PAGE_SIZE = (800, 600)
+SAMPLE_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'book1', 'coverImage.jpg')
+
+
+def make_scene(page_number):
+    """Synthetic page in the format of book1/EinAbenteuerMitOma.json."""
+    return {
+        'pageNumber': page_number,
+        'background': SAMPLE_IMAGE,
+        'textElements': [
+            {
+                'content': f'Seite {page_number}: Es war einmal ein Kind namens Max, das mit Oma ein Abenteuer erlebte.',
+                'fontFamily': 'Arial',
+                'fontSize': 24,
+                'fontStyle': 'normal',
+                'color': '#000000',
+                'position': {'x': 40, 'y': 60 + 120 * index},
+                'width': 300,
+                'layer': 1,
+                'rotation': 0,
+                'opacity': 1.0,
+                'visible': True,
+            }
+            for index in range(3)
+        ],
+        'imageElements': [
+            {
+                'imageUrl': SAMPLE_IMAGE,
+                'position': {'x': 450, 'y': 200},
+                'width': 200,
+                'height': 150,
+                'layer': 0,
+                'rotation': 0,
+                'opacity': 1.0,
+                'visible': True,
+            }
+        ],
+    }
+
+
+def build_scenes(scenes_data):
+    return [SeitenSzene(scene_data, PAGE_SIZE, False) for scene_data in scenes_data]
+
+
+def render_book(scenes_data, folder):
+    """Same steps as render_json_to_jpg in main.py, without sys.exit."""
+    jpg_files = []
+    for index, scene in enumerate(build_scenes(scenes_data)):
+        image = render_scene_image(scene, *PAGE_SIZE)
+        jpg_filename = os.path.join(folder, f"page_{index + 1}.jpg")
+        image.save(jpg_filename, "JPG")
+        jpg_files.append(jpg_filename)
+    combine_jpgs_vertically(jpg_files, os.path.join(folder, 'combined.jpg'))
+    for jpg in jpg_files:
+        os.remove(jpg)
+
+
+def measure(name, func, repeat, setup=None):
+    timings = []
+    for index in range(repeat + 1):  # first run is warm-up
+        argument = setup() if setup else None
+        started = time.perf_counter()
+        func(argument) if setup else func()
+        elapsed = (time.perf_counter() - started) * 1000
+        if index > 0:
+            timings.append(elapsed)
+    result = {
+        'name': name,
+        'repeat': repeat,
+        'min_ms': min(timings),
+        'median_ms': statistics.median(timings),
+        'mean_ms': statistics.fmean(timings),
+        'stdev_ms': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'samples_ms': timings,
+    }
+    print(f"{name:<40}{result['min_ms']:>10.2f}ms{result['median_ms']:>10.2f}ms{result['mean_ms']:>10.2f}ms")
+    return result
+
+
+def run(sizes, repeat):
+    results = []
+    with tempfile.TemporaryDirectory(prefix='storymaker-bench-') as folder:
+        for size in sizes:
+            scenes_data = [make_scene(index + 1) for index in range(size)]
+            results.append(measure(f'storymaker.build_scenes[{size}]', lambda: build_scenes(scenes_data), repeat))
+            results.append(measure(
+                f'storymaker.render_pages[{size}]',
+                lambda scenes: [render_scene_image(scene, *PAGE_SIZE) for scene in scenes],
+                repeat,
+                setup=lambda: build_scenes(scenes_data)
+            ))
+            results.append(measure(f'storymaker.headless_book[{size}]', lambda: render_book(scenes_data, folder), repeat))
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, timeout=10, check=True).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def results_document(results):
+    return {
+        'schema_version': SCHEMA_VERSION,
+        'suite': 'storymaker',
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'git_commit': git_commit(),
+        },
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the headless renderer")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(BOOK_SIZES), help='Pages per synthetic book')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--json', dest='json_path', help='Write results as JSON (for backend/benchmarks/baseline.py)')
+    args = parser.parse_args()
+
+    # Scenes log every element at INFO level
+    logging.basicConfig(level=logging.WARNING)
+    app = QApplication(sys.argv)
+    print(f"{'Benchmark':<40}{'min':>12}{'median':>12}{'mean':>12}")
+    results = run(args.sizes, args.repeat)
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results_document(results), f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,18 +6,18 @@ import io
 import json
 import argparse
 import os
-from PIL import Image  # For image processing
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QAction, QFileDialog, QMessageBox, QToolBar,
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QGraphicsView, QStyle
 )
-from PyQt5.QtGui import QPainter, QImage, QKeySequence
+from PyQt5.QtGui import QPainter, QKeySequence
 from PyQt5.QtCore import Qt, QObject, pyqtSignal, QThread
 
 from dialogs import EinstellungenDialog, LoadingDialog  # Removed EigenschaftenDialog
 from elements import VerschiebbaresTextElement, VerschiebbaresBildElement, HintergrundElement
 from scenes import SeitenSzene, CoverSzene
+from rendering import combine_jpgs_vertically, render_scene_image
 
 # 1. Remove all existing logger handlers to prevent duplicate logs
 for handler in logging.root.handlers[:]:
@@ -533,36 +533,6 @@ class MainWindow(QMainWindow):
 
 
 
-def combine_jpgs_vertically(jpg_files, output_path):
-    """
-    Combines multiple JPG images vertically into a single image.
-
-    :param jpg_files: List of paths to individual JPG files.
-    :param output_path: Path to the combined output file.
-    :return: Path to the combined output file.
-    """
-    try:
-        images = [Image.open(jpg) for jpg in jpg_files]
-        widths, heights = zip(*(i.size for i in images))
-
-        max_width = max(widths)
-        total_height = sum(heights)
-
-        combined_image = Image.new('RGB', (max_width, total_height), color='white')
-
-        y_offset = 0
-        for im in images:
-            combined_image.paste(im, (0, y_offset))
-            y_offset += im.height
-
-        combined_image.save(output_path, "JPEG")
-        logging.info(f"Combined image saved as {output_path}")
-        return output_path
-    except Exception as e:
-        logging.error(f"Error combining images: {e}")
-        sys.exit(1)
-
-
 def render_json_to_jpg(json_path, output_path):
     try:
         # Initialize the Qt application
@@ -616,13 +586,8 @@ def render_json_to_jpg(json_path, output_path):
                 scene = SeitenSzene(scene_data, page_size_tuple, False)
                 logging.info(f"Loading scene page {scene_index + 1}")
 
-            # Create a QImage and QPainter to render
-            image = QImage(page_width, page_height, QImage.Format_ARGB32)
-            image.fill(Qt.white)  # Set background color
-
-            painter = QPainter(image)
-            scene.render(painter)
-            painter.end()
+            # Render the scene into a QImage
+            image = render_scene_image(scene, page_width, page_height)
 
             # Save the image as JPG
             jpg_filename = f"page_{index + 1}.jpg"
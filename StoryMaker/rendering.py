@@ -0,0 +1,55 @@
+# rendering.py
+# Headless rendering helpers, used by main.py (--headless) and benchmark.py
+
+import logging
+import sys
+from PIL import Image  # For image processing
+
+from PyQt5.QtGui import QPainter, QImage
+from PyQt5.QtCore import Qt
+
+
+def render_scene_image(scene, page_width, page_height):
+    """
+    Renders a QGraphicsScene into a white ARGB32 QImage of the page size.
+
+    :param scene: SeitenSzene or CoverSzene.
+    :return: The rendered QImage.
+    """
+    image = QImage(page_width, page_height, QImage.Format_ARGB32)
+    image.fill(Qt.white)  # Set background color
+
+    painter = QPainter(image)
+    scene.render(painter)
+    painter.end()
+    return image
+
+
+def combine_jpgs_vertically(jpg_files, output_path):
+    """
+    Combines multiple JPG images vertically into a single image.
+
+    :param jpg_files: List of paths to individual JPG files.
+    :param output_path: Path to the combined output file.
+    :return: Path to the combined output file.
+    """
+    try:
+        images = [Image.open(jpg) for jpg in jpg_files]
+        widths, heights = zip(*(i.size for i in images))
+
+        max_width = max(widths)
+        total_height = sum(heights)
+
+        combined_image = Image.new('RGB', (max_width, total_height), color='white')
+
+        y_offset = 0
+        for im in images:
+            combined_image.paste(im, (0, y_offset))
+            y_offset += im.height
+
+        combined_image.save(output_path, "JPEG")
+        logging.info(f"Combined image saved as {output_path}")
+        return output_path
+    except Exception as e:
+        logging.error(f"Error combining images: {e}")
+        sys.exit(1)
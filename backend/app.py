@@ -6,22 +6,60 @@ from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from config import Config
 from utils.logging_config import configure_logging
+from utils.database import db
+from utils.indexes import ensure_indexes_in_background
+from utils.templating import precompile_templates
+from utils.serialization import output_json, JSON_MIMETYPE
+from utils.compression import compress_response
+from utils.metrics import start_request_timer, record_request
+from utils.tracing import trace_resource
 from resources.auth import Register, Login
 from resources.stories import StoriesList, StoryDetail
-from resources.personalize import PersonalizeStory, PersonalizedStoryDetail, UserStories
-from resources.upload import UploadImage
+from resources.personalize import PersonalizeStory, PersonalizeStoryBatch, PersonalizedStoryDetail, UserStories
+from resources.upload import UploadImage, UploadedImage
+from resources.generate_pdf import GeneratePDF, DownloadPDF
+from resources.pdf_jobs import PDFJobs, PDFJobStatus, PDFJobMetrics
+from resources.health import Liveness, Readiness, PoolStats
+from resources.metrics import Metrics
+from resources.traces import TraceDump
+from resources.slow_queries import SlowQueries
 
 app = Flask(__name__)
 app.config.from_object(Config)
 jwt = JWTManager(app)
 
 # Temporäres Zulassen aller Origins zum Debuggen
-CORS(app)
+# Paginierungs- und ETag-Header müssen für das Frontend lesbar sein
+CORS(app, expose_headers=['X-Next-Cursor', 'X-Total-Count', 'ETag', 'X-Trace-Id'])
 
-api = Api(app)
+# Ein Tracing-Span pro Resource-Methode, Trace-ID im Header X-Trace-Id
+api = Api(app, decorators=[trace_resource])
+# Schneller JSON-Encoder (orjson) mit ObjectId-/datetime-Unterstützung
+api.representations[JSON_MIMETYPE] = output_json
+
+# Latenz, Status, Größe und Mongo-Zeit pro Resource; after_request-Hooks laufen in umgekehrter
+# Reihenfolge, record_request sieht daher die bereits komprimierte Größe
+app.before_request(start_request_timer)
+app.after_request(record_request)
+
+# JSON-Antworten ab COMPRESSION_MIN_SIZE nach Accept-Encoding komprimieren (br/gzip)
+app.after_request(compress_response)
 
 # Logging konfigurieren
-configure_logging(app.config['DEBUG'])
+configure_logging(
+    app.config['APP_ENV'],
+    log_level=app.config['LOG_LEVEL'],
+    log_format=app.config['LOG_FORMAT'],
+    debug_sample_rate=app.config['LOG_DEBUG_SAMPLE_RATE'],
+    queue_size=app.config['LOG_QUEUE_SIZE']
+)
+
+# Indizes idempotent anlegen (python -m utils.indexes check prüft sie)
+if app.config['ENSURE_INDEXES']:
+    ensure_indexes_in_background(db)
+
+# PDF-Templates einmal pro Prozess kompilieren
+precompile_templates()
 
 # API-Ressourcen hinzufügen
 api.add_resource(Register, '/api/register')
@@ -29,9 +67,24 @@ api.add_resource(Login, '/api/login')
 api.add_resource(StoriesList, '/api/stories')
 api.add_resource(StoryDetail, '/api/stories/<string:story_id>')
 api.add_resource(PersonalizeStory, '/api/personalize')
+api.add_resource(PersonalizeStoryBatch, '/api/personalize/batch')
 api.add_resource(PersonalizedStoryDetail, '/api/personalized-stories/<string:personalized_story_id>')
 api.add_resource(UploadImage, '/api/upload-image')
+api.add_resource(UploadedImage, '/api/uploaded-images/<string:sha256>')
 api.add_resource(UserStories, '/api/user-stories')
+api.add_resource(GeneratePDF, '/api/generate-pdf/<string:personalized_story_id>')
+api.add_resource(DownloadPDF, '/api/download-pdf/<string:personalized_story_id>')
+api.add_resource(PDFJobs, '/api/pdf-jobs')
+api.add_resource(PDFJobMetrics, '/api/pdf-jobs/metrics')
+api.add_resource(PDFJobStatus, '/api/pdf-jobs/<string:job_id>')
+api.add_resource(Liveness, '/api/health/live')
+api.add_resource(Readiness, '/api/health/ready')
+api.add_resource(PoolStats, '/api/health/mongo-pool')
+api.add_resource(Metrics, '/metrics')
+# Antwortet nur mit TRACING_DEBUG_ENDPOINT=1 (siehe TraceDump)
+api.add_resource(TraceDump, '/api/debug/traces')
+# Antwortet nur mit SLOW_QUERY_DEBUG_ENDPOINT=1 (siehe SlowQueries)
+api.add_resource(SlowQueries, '/api/debug/slow-queries')
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=49158, debug=True)
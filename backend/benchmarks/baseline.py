@@ -0,0 +1,221 @@
+# benchmarks/baseline.py
+#
+# Versionierte Baselines für Benchmark-Ergebnisse (backend und StoryMaker) und Vergleich
+# neuer Läufe dagegen, komplett offline:
+#
+#   python -m benchmarks.bench_backend --json /tmp/backend.json
+#   python -m benchmarks.baseline record /tmp/backend.json          # -> benchmarks/baselines/backend.json
+#   python -m benchmarks.baseline compare /tmp/backend.json --threshold 0.1 --threshold-for 'pdf.*=0.25'
+#
+#   python ../StoryMaker/benchmark.py --json /tmp/storymaker.json
+#   python -m benchmarks.baseline compare /tmp/storymaker.json
+#
+# compare beendet sich mit Exit-Code 1, wenn mindestens eine Regression gefunden wurde.
+
+import argparse
+import fnmatch
+import json
+import math
+import os
+import statistics
+import sys
+
+from benchmarks.harness import SCHEMA_VERSION
+
+BASELINE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+DEFAULT_THRESHOLD = 0.10  # Median mindestens 10 % langsamer
+DEFAULT_ALPHA = 0.05
+MIN_SAMPLES = 3  # darunter ist kein Signifikanztest möglich
+
+REGRESSION = 'regression'
+IMPROVEMENT = 'improvement'
+UNCHANGED = 'unchanged'
+
+
+class BaselineError(Exception):
+    pass
+
+
+def load_document(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        document = json.load(f)
+    if not isinstance(document, dict) or 'results' not in document:
+        raise BaselineError(f"{path}: no benchmark results (run the benchmark with --json)")
+    if document.get('schema_version') != SCHEMA_VERSION:
+        raise BaselineError(f"{path}: unsupported schema_version {document.get('schema_version')}")
+    return document
+
+
+def baseline_path(suite, folder=BASELINE_FOLDER):
+    return os.path.join(folder, f"{suite}.json")
+
+
+def record(results_path, folder=BASELINE_FOLDER):
+    """Speichert einen Lauf als neue Baseline seiner Suite (Datei wird ins Repo eingecheckt)."""
+    document = load_document(results_path)
+    os.makedirs(folder, exist_ok=True)
+    path = baseline_path(document['suite'], folder)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2)
+        f.write('\n')
+    return path
+
+
+def mann_whitney_greater(current, baseline):
+    """Einseitiger Mann-Whitney-U-Test: p-Wert für "current ist langsamer als baseline".
+
+    Normalapproximation mit Bindungs- und Stetigkeitskorrektur; verteilungsfrei,
+    daher robust gegen Ausreißer in Laufzeitmessungen.
+    """
+    n1, n2 = len(current), len(baseline)
+    combined = sorted([(value, 0) for value in current] + [(value, 1) for value in baseline])
+    ranks = [0.0] * len(combined)
+    tie_term = 0
+    index = 0
+    while index < len(combined):
+        end = index
+        while end + 1 < len(combined) and combined[end + 1][0] == combined[index][0]:
+            end += 1
+        # Gleiche Werte bekommen den mittleren Rang
+        for position in range(index, end + 1):
+            ranks[position] = (index + end) / 2 + 1
+        ties = end - index + 1
+        tie_term += ties ** 3 - ties
+        index = end + 1
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def threshold_for(name, default, overrides):
+    # Letztes passendes Muster gewinnt, z.B. 'pdf.*=0.25'
+    threshold = default
+    for pattern, value in overrides:
+        if fnmatch.fnmatchcase(name, pattern):
+            threshold = value
+    return threshold
+
+
+def compare_result(baseline, current, threshold, alpha):
+    base_samples = baseline.get('samples_ms') or [baseline['median_ms']]
+    current_samples = current.get('samples_ms') or [current['median_ms']]
+    base_median = statistics.median(base_samples)
+    current_median = statistics.median(current_samples)
+    change = (current_median - base_median) / base_median if base_median > 0 else 0.0
+    testable = len(base_samples) >= MIN_SAMPLES and len(current_samples) >= MIN_SAMPLES
+    p_slower = mann_whitney_greater(current_samples, base_samples) if testable else None
+    p_faster = mann_whitney_greater(base_samples, current_samples) if testable else None
+    # Regression nur, wenn sowohl die Schwelle überschritten als auch der Unterschied signifikant ist
+    if change > threshold and (p_slower is None or p_slower < alpha):
+        status = REGRESSION
+    elif change < -threshold and (p_faster is None or p_faster < alpha):
+        status = IMPROVEMENT
+    else:
+        status = UNCHANGED
+    return {
+        'name': current['name'],
+        'baseline_median_ms': base_median,
+        'current_median_ms': current_median,
+        'change': change,
+        'threshold': threshold,
+        'p_value': p_slower if change >= 0 else p_faster,
+        'status': status,
+    }
+
+
+def compare(baseline_document, current_document, threshold=DEFAULT_THRESHOLD, alpha=DEFAULT_ALPHA, overrides=()):
+    baseline_results = {result['name']: result for result in baseline_document['results']}
+    current_results = {result['name']: result for result in current_document['results']}
+    rows = [
+        compare_result(baseline_results[name], current, threshold_for(name, threshold, overrides), alpha)
+        for name, current in current_results.items() if name in baseline_results
+    ]
+    return {
+        'rows': rows,
+        'missing': sorted(set(baseline_results) - set(current_results)),
+        'new': sorted(set(current_results) - set(baseline_results)),
+        'environment_differs': environment_differences(baseline_document, current_document),
+    }
+
+
+def environment_differences(baseline_document, current_document):
+    keys = ('python', 'implementation', 'machine', 'processor', 'cpu_count')
+    baseline_env = baseline_document.get('environment', {})
+    current_env = current_document.get('environment', {})
+    return [key for key in keys if baseline_env.get(key) != current_env.get(key)]
+
+
+def print_comparison(comparison, out=sys.stdout):
+    if comparison['environment_differs']:
+        out.write(f"WARNUNG: andere Umgebung als die Baseline ({', '.join(comparison['environment_differs'])}), "
+                  f"Vergleich nur bedingt aussagekräftig\n")
+    out.write(f"{'Benchmark':<44}{'Baseline':>12}{'Aktuell':>12}{'Änderung':>10}{'p':>8}  Status\n")
+    for row in comparison['rows']:
+        p_value = '-' if row['p_value'] is None else f"{row['p_value']:.3f}"
+        out.write(
+            f"{row['name']:<44}{row['baseline_median_ms']:>10.3f}ms{row['current_median_ms']:>10.3f}ms"
+            f"{row['change'] * 100:>+9.1f}%{p_value:>8}  {row['status']}\n"
+        )
+    for name in comparison['missing']:
+        out.write(f"{name:<44} fehlt im aktuellen Lauf\n")
+    for name in comparison['new']:
+        out.write(f"{name:<44} neu, keine Baseline\n")
+    regressions = [row['name'] for row in comparison['rows'] if row['status'] == REGRESSION]
+    out.write(f"\n{len(regressions)} Regression(en)\n")
+    return regressions
+
+
+def parse_override(value):
+    pattern, _, threshold = value.rpartition('=')
+    if not pattern:
+        raise argparse.ArgumentTypeError(f"expected PATTERN=THRESHOLD, got {value!r}")
+    try:
+        return pattern, float(threshold)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid threshold in {value!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark-Baselines speichern und vergleichen')
+    commands = parser.add_subparsers(dest='command', required=True)
+    record_parser = commands.add_parser('record', help='Lauf als Baseline der Suite speichern')
+    record_parser.add_argument('results', help='JSON aus bench_backend --json oder StoryMaker/benchmark.py --json')
+    record_parser.add_argument('--folder', default=BASELINE_FOLDER)
+    compare_parser = commands.add_parser('compare', help='Lauf gegen die Baseline vergleichen')
+    compare_parser.add_argument('results')
+    compare_parser.add_argument('--baseline', help=f'Baseline-Datei (Standard: {BASELINE_FOLDER}/<suite>.json)')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help='relative Verlangsamung des Medians, ab der gemeldet wird (0.1 = 10 %%)')
+    compare_parser.add_argument('--threshold-for', type=parse_override, action='append', default=[],
+                                metavar='PATTERN=THRESHOLD', help="eigene Schwelle pro Benchmark, z.B. 'pdf.*=0.25'")
+    compare_parser.add_argument('--alpha', type=float, default=DEFAULT_ALPHA, help='Signifikanzniveau')
+    compare_parser.add_argument('--json', dest='json_path', help='Vergleich zusätzlich als JSON speichern')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'record':
+            print(f"Baseline gespeichert: {record(args.results, args.folder)}")
+            return 0
+        current = load_document(args.results)
+        baseline = load_document(args.baseline or baseline_path(current['suite']))
+    except (OSError, ValueError, BaselineError) as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        return 2
+    if baseline['suite'] != current['suite']:
+        print(f"Fehler: Suite {current['suite']} kann nicht mit {baseline['suite']} verglichen werden", file=sys.stderr)
+        return 2
+    comparison = compare(baseline, current, args.threshold, args.alpha, args.threshold_for)
+    regressions = print_comparison(comparison)
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(comparison, f, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+# benchmarks/bench_backend.py
+#
+# Micro-Benchmarks der teuren Funktionen pro Request, offline gegen mongomock
+# (oder eine lokale mongod über --mongo-uri):
+#   python -m benchmarks.bench_backend [--sizes 10 100 1000] [--repeat 20] [--filter pdf] [--json out.json] [--memory]
+
+import argparse
+import io
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import ExitStack
+from unittest.mock import patch
+
+# Kein Index-Aufbau gegen die echte Datenbank beim Import der App
+os.environ.setdefault('ENSURE_INDEXES', '0')
+
+from bson.objectid import ObjectId
+from flask_jwt_extended import create_access_token
+
+from app import app
+from config import Config
+from models.story import Story
+from models.personalized_story import PersonalizedStory
+from utils.personalization import build_overlay, merge_scenes, materialized_stories
+from utils.placeholders import compiled_stories
+from utils.serialization import dumps
+from utils.story_cache import story_cache
+from utils.templating import get_template, PDF_TEMPLATE
+from utils.upload_store import store_stream
+from benchmarks.books import BOOK_SIZES, make_story, make_personalized_story
+from benchmarks.harness import Case, run_cases, results_document
+
+BENCH_DATABASE = 'personalized_books_bench'
+UPLOAD_SIZE = 2 * 1024 * 1024  # typisches Handyfoto
+PERSONAL_DATA = {'child_name': 'Max', 'role': 'Ritter'}
+
+
+def open_database(mongo_uri=None):
+    """In-Memory-Mongo (mongomock) oder eine lokale mongod, nie die Produktivdatenbank."""
+    if mongo_uri:
+        from pymongo import MongoClient
+        client = MongoClient(mongo_uri)
+        client.drop_database(BENCH_DATABASE)
+        return client[BENCH_DATABASE]
+    try:
+        import mongomock
+    except ImportError:
+        raise SystemExit('mongomock ist nicht installiert (pip install -r benchmarks/requirements.txt) '
+                         'oder --mongo-uri auf eine lokale mongod setzen')
+    return mongomock.MongoClient()[BENCH_DATABASE]
+
+
+def personalize_cases(database, size, client, user_id, auth):
+    story = make_story(size)
+    database.stories.insert_one(story)
+    story_id = str(story['_id'])
+    version = story_cache.get_with_etag(database.stories, story_id)[1]
+    overlay = build_overlay(user_id, story_id, version, story, PERSONAL_DATA, {})
+    overlay_id = str(database.personalized_stories.insert_one(overlay).inserted_id)
+
+    def create():
+        response = client.post('/api/personalize', json={'story_id': story_id, 'personal_data': PERSONAL_DATA}, headers=auth)
+        assert response.status_code == 201, response.status_code
+
+    def detail():
+        response = client.get(f'/api/personalized-stories/{overlay_id}', headers=auth)
+        assert response.status_code == 200, response.status_code
+
+    return [
+        Case(f'personalize.create[{size}]', create),
+        # Szenen kopieren und Platzhalter ersetzen (kompilierte Texte gecacht)
+        Case(f'personalize.merge_scenes[{size}]',
+             lambda: merge_scenes(story_id, version, story, PERSONAL_DATA, {})),
+        Case(f'personalize.merge_scenes_uncompiled[{size}]',
+             lambda _: merge_scenes(story_id, version, story, PERSONAL_DATA, {}),
+             setup=compiled_stories.clear),
+        # Lesen eines Overlays: ohne bzw. mit bereits zusammengeführten Szenen im Cache
+        Case(f'personalize.detail_cold[{size}]', lambda _: detail(), setup=materialized_stories.clear),
+        Case(f'personalize.detail_warm[{size}]', detail),
+    ]
+
+
+def summary_document(story):
+    # So wie SUMMARY_PROJECTION sie aus Mongo liefert
+    summary = {key: story[key] for key in ('_id', 'title', 'description', 'coverImage', 'roles', 'ageGroup')}
+    summary['pageCount'] = len(story['scenes'])
+    return summary
+
+
+def model_cases(size):
+    story_data = make_story(size)
+    personalized_data = make_personalized_story(story_data)
+    # Eine Seite eines Listen-Endpoints
+    page = [make_story(size) for _ in range(Config.PAGE_SIZE_DEFAULT)]
+    summaries = [summary_document(story) for story in page]
+    personalized_page = [make_personalized_story(story) for story in page]
+    return [
+        Case(f'model.story_to_dict[{size}]', lambda: Story(story_data).to_dict(), number=10),
+        Case(f'model.personalized_to_dict[{size}]', lambda: PersonalizedStory(personalized_data).to_dict(), number=10),
+        Case(f'model.story_json[{size}]', lambda: dumps(Story(story_data))),
+        Case(f'model.personalized_json[{size}]', lambda: dumps(PersonalizedStory(personalized_data))),
+        Case(f'model.story_list_json[{size}]', lambda: dumps(Story.many(page))),
+        Case(f'model.story_list_summary_json[{size}]', lambda: dumps(Story.many(summaries, Story.SUMMARY_FIELDS)), number=10),
+        Case(f'model.personalized_list_json[{size}]', lambda: dumps(PersonalizedStory.many(personalized_page))),
+    ]
+
+
+def pdf_cases(size):
+    story = Story(make_story(size))
+    template = get_template(PDF_TEMPLATE)
+    return [
+        Case(f'pdf.render_template[{size}]',
+             lambda: template.render(story=story, personal_data=PERSONAL_DATA)),
+    ]
+
+
+def upload_cases(upload_folder):
+    payload = os.urandom(UPLOAD_SIZE)
+
+    def fresh_payload():
+        # Neuer Inhalt pro Messung, sonst würde nur die Deduplizierung gemessen
+        return io.BytesIO(os.urandom(16) + payload)
+
+    return [
+        Case('upload.store_new[2MB]', lambda stream: store_stream(stream, upload_folder, 'jpg'), setup=fresh_payload),
+        Case('upload.store_duplicate[2MB]', lambda: store_stream(io.BytesIO(payload), upload_folder, 'jpg')),
+    ]
+
+
+def build_cases(database, sizes, client, user_id, auth, upload_folder):
+    cases = []
+    for size in sizes:
+        cases += personalize_cases(database, size, client, user_id, auth)
+        cases += model_cases(size)
+        cases += pdf_cases(size)
+    cases += upload_cases(upload_folder)
+    return cases
+
+
+def run(sizes=BOOK_SIZES, repeat=20, name_filter=None, mongo_uri=None, out=sys.stdout, memory=False):
+    database = open_database(mongo_uri)
+    upload_folder = tempfile.mkdtemp(prefix='bench-uploads-')
+    # Benchmarks messen den Code, nicht das Logging
+    logging.getLogger().setLevel(logging.WARNING)
+    story_cache.invalidate()
+    try:
+        with ExitStack() as stack:
+            for target in ('resources.personalize.db', 'resources.stories.db'):
+                stack.enter_context(patch(target, database))
+            user_id = str(ObjectId())
+            with app.app_context():
+                token = create_access_token(identity=user_id)
+            auth = {'Authorization': f'Bearer {token}'}
+            cases = build_cases(database, sizes, app.test_client(), user_id, auth, upload_folder)
+            return run_cases(cases, repeat, out, name_filter, memory)
+    finally:
+        shutil.rmtree(upload_folder, ignore_errors=True)
+        story_cache.invalidate()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Micro-Benchmarks für das Backend')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(BOOK_SIZES), help='Szenen pro synthetischem Buch')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--filter', dest='name_filter', help='nur Benchmarks, deren Name dies enthält')
+    parser.add_argument('--mongo-uri', help='lokale mongod statt mongomock')
+    parser.add_argument('--memory', action='store_true', help='zusätzlich Speicherspitze pro Aufruf messen (tracemalloc)')
+    parser.add_argument('--json', dest='json_path',
+                        help='Ergebnisse zusätzlich als JSON speichern (für python -m benchmarks.baseline)')
+    args = parser.parse_args(argv)
+    results = run(args.sizes, args.repeat, args.name_filter, args.mongo_uri, memory=args.memory)
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results_document('backend', results), f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+# benchmarks/bench_serialization.py
+#
+# Vergleicht den bisherigen Weg (to_dict + json.dumps) mit utils.serialization:
+#   python -m benchmarks.bench_serialization [--repeat 20]
+
+import argparse
+import json
+import sys
+import timeit
+from models.story import Story
+from models.personalized_story import PersonalizedStory
+from utils.serialization import dumps, orjson
+from benchmarks.books import BOOK_SIZES, make_story, make_personalized_story
+
+
+def bench(label, func, repeat):
+    # Bester Wert aus mehreren Läufen, in Millisekunden
+    return label, min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def run(repeat, out=sys.stdout):
+    encoder = 'orjson' if orjson is not None else 'json (orjson nicht installiert)'
+    out.write(f"Encoder: {encoder}\n")
+    out.write(f"{'Buch':<28}{'json.dumps':>14}{'serialization':>16}{'Faktor':>10}\n")
+    results = []
+    for size in BOOK_SIZES:
+        story = make_story(size)
+        personalized = make_personalized_story(story)
+        cases = (
+            (f'Story {size} Szenen', Story(story)),
+            (f'PersonalizedStory {size} Szenen', PersonalizedStory(personalized)),
+        )
+        for label, model in cases:
+            _, baseline = bench(label, lambda: json.dumps(model.to_dict()), repeat)
+            _, fast = bench(label, lambda: dumps(model), repeat)
+            results.append((label, baseline, fast))
+            out.write(f"{label:<28}{baseline:>12.2f}ms{fast:>14.2f}ms{baseline / fast:>9.1f}x\n")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='JSON-Serialisierung großer Bücher messen')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+    run(args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/books.py
+
+from datetime import datetime
+from bson.objectid import ObjectId
+
+# Szenen im Format des StoryMaker-Exports (book1/EinAbenteuerMitOma.json)
+BOOK_SIZES = (10, 100, 1000)
+
+
+def make_scene(page_number):
+    return {
+        'pageNumber': page_number,
+        'background': f'images/background_{page_number}.jpg',
+        'textElements': [
+            {
+                'content': f'Seite {page_number}: {{child_name}} erlebt als {{role}} ein neues Abenteuer mit Oma.',
+                'fontFamily': 'Arial',
+                'fontSize': 24,
+                'fontStyle': 'normal',
+                'color': '#000000',
+                'position': {'x': 40, 'y': 60},
+                'width': 300,
+                'layer': 1,
+                'rotation': 0,
+                'opacity': 1.0,
+                'visible': True,
+            }
+            for _ in range(3)
+        ],
+        'imageElements': [
+            {
+                'imageUrl': f'images/scene_{page_number}.jpg',
+                'imagePrompt': 'Bitte lade ein Bild von {child_name} hoch.',
+                'userProvided': True,
+                'position': {'x': 100, 'y': 200},
+                'width': 200,
+                'height': 150,
+                'layer': 0,
+                'rotation': 0,
+                'opacity': 1.0,
+                'visible': True,
+            }
+        ],
+    }
+
+
+def make_story(scene_count):
+    """Synthetische Vorlage mit scene_count Szenen, wie sie in db.stories liegt."""
+    return {
+        '_id': ObjectId(),
+        'title': f'Synthetisches Buch ({scene_count} Seiten)',
+        'description': 'Benchmark-Daten',
+        'coverImage': 'images/cover.jpg',
+        'roles': ['Ritter', 'Prinzessin'],
+        'ageGroup': 5,
+        'version': 1,
+        'scenes': [make_scene(i + 1) for i in range(scene_count)],
+    }
+
+
+def make_personalized_story(story, user_id=None):
+    return {
+        '_id': ObjectId(),
+        'user_id': user_id or str(ObjectId()),
+        'story_id': str(story['_id']),
+        'title': story['title'],
+        'description': story['description'],
+        'scenes': story['scenes'],
+        'personal_data': {'child_name': 'Max', 'role': 'Ritter'},
+        'created_at': datetime.utcnow(),
+    }
@@ -0,0 +1,123 @@
+# benchmarks/harness.py
+
+import datetime
+import math
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+# Format der JSON-Ergebnisse/Baselines; auch StoryMaker/benchmark.py schreibt es
+SCHEMA_VERSION = 1
+
+
+class Case:
+    """Ein Benchmark: ``func`` wird gemessen, ``setup`` läuft vor jeder Messung ungezählt.
+
+    ``setup`` liefert das Argument für ``func`` (oder None).
+    """
+
+    def __init__(self, name, func, setup=None, number=1):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.number = number
+
+
+def peak_allocation(case):
+    """Spitze des während eines Aufrufs neu belegten Speichers in KB (tracemalloc, ungezählter Extralauf)."""
+    argument = case.setup() if case.setup is not None else None
+    tracemalloc.start()
+    try:
+        result = case.func(argument) if case.setup is not None else case.func()
+        del result
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def measure(case, repeat, warmup=1, memory=False):
+    timings = []
+    for index in range(warmup + repeat):
+        argument = case.setup() if case.setup is not None else None
+        started = time.perf_counter()
+        for _ in range(case.number):
+            if case.setup is not None:
+                case.func(argument)
+            else:
+                case.func()
+        elapsed = (time.perf_counter() - started) / case.number
+        if index >= warmup:
+            timings.append(elapsed * 1000)
+    result = {
+        'name': case.name,
+        'repeat': repeat,
+        'min_ms': min(timings),
+        'median_ms': statistics.median(timings),
+        'mean_ms': statistics.fmean(timings),
+        'stdev_ms': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        # Einzelwerte für den Signifikanztest in benchmarks/baseline.py
+        'samples_ms': timings,
+    }
+    if memory:
+        result['peak_kb'] = peak_allocation(case)
+    return result
+
+
+def run_cases(cases, repeat, out, name_filter=None, memory=False):
+    results = []
+    out.write(f"{'Benchmark':<44}{'min':>11}{'median':>11}{'mean':>11}{'stdev':>11}{'peak':>12}\n"
+              if memory else f"{'Benchmark':<44}{'min':>11}{'median':>11}{'mean':>11}{'stdev':>11}\n")
+    for case in cases:
+        if name_filter and name_filter not in case.name:
+            continue
+        result = measure(case, repeat, memory=memory)
+        results.append(result)
+        peak = f"{result['peak_kb']:>10.1f}KB" if memory else ''
+        out.write(
+            f"{case.name:<44}{result['min_ms']:>9.3f}ms{result['median_ms']:>9.3f}ms"
+            f"{result['mean_ms']:>9.3f}ms{result['stdev_ms']:>9.3f}ms{peak}\n"
+        )
+        out.flush()
+    return results
+
+
+def percentile(values, fraction):
+    """Perzentil nach Nearest-Rank; values muss sortiert sein."""
+    if not values:
+        return None
+    rank = math.ceil(fraction * len(values))
+    return values[max(0, min(len(values), rank) - 1)]
+
+
+def git_commit(path=None):
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=path, capture_output=True, text=True,
+                              timeout=10, check=True).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    # Baselines sind nur auf derselben Maschine/Python-Version vergleichbar
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'git_commit': git_commit(os.path.dirname(os.path.abspath(__file__))),
+    }
+
+
+def results_document(suite, results):
+    return {
+        'schema_version': SCHEMA_VERSION,
+        'suite': suite,
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'environment': environment(),
+        'results': results,
+    }
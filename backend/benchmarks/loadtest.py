@@ -0,0 +1,299 @@
+# benchmarks/loadtest.py
+#
+# Lastgenerator für den kompletten Ablauf eines Elternteils gegen eine lokal laufende App:
+# registrieren -> anmelden -> Geschichten ansehen -> Bilder hochladen -> personalisieren
+# -> personalisierte Geschichte abrufen -> PDF erzeugen
+#
+#   python -m benchmarks.loadtest --base-url http://localhost:49158 --users 20 --duration 120
+#   python -m benchmarks.loadtest --seed-stories 5 --scenes 100 --mongo-uri mongodb://localhost:27017/ ...
+#
+# Nur gegen lokale Instanzen verwenden: es werden Benutzer, Bilder und Geschichten angelegt.
+
+import argparse
+import io
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.books import make_story
+from benchmarks.harness import percentile
+
+STEPS = ('register', 'login', 'browse_stories', 'upload_image', 'personalize', 'fetch_personalized', 'generate_pdf')
+PDF_POLL_INTERVAL = 0.5
+
+
+class StepError(Exception):
+    pass
+
+
+class Recorder:
+    """Sammelt (Schritt, Dauer, Erfolg) aller virtuellen Benutzer threadsicher."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.flows_completed = 0
+        self.flows_failed = 0
+        # Fehler im Lastgenerator selbst (nicht vom Server), nach Exception-Typ
+        self.unexpected = defaultdict(int)
+
+    def record(self, step, seconds, ok, status):
+        with self._lock:
+            self.samples[step].append(seconds)
+            self.statuses[step][status] += 1
+            if not ok:
+                self.errors[step] += 1
+
+    def flow_finished(self, ok, exception=None):
+        with self._lock:
+            if ok:
+                self.flows_completed += 1
+            else:
+                self.flows_failed += 1
+            if exception is not None:
+                self.unexpected[type(exception).__name__] += 1
+
+
+def make_image(width=1200, height=900):
+    # Eindeutiger Inhalt pro Aufruf, damit die Deduplizierung den Upload nicht abkürzt
+    from PIL import Image
+    color = tuple(random.randrange(256) for _ in range(3))
+    image = Image.new('RGB', (width, height), color)
+    image.putpixel((0, 0), tuple(uuid.uuid4().bytes[:3]))
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+class VirtualParent:
+    def __init__(self, base_url, recorder, options):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.options = options
+        self.session = requests.Session()
+
+    def _request(self, step, method, path, expected, **kwargs):
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.options.timeout, **kwargs)
+            status = response.status_code
+            ok = status in expected
+        except requests.RequestException:
+            response, ok = None, False
+        self.recorder.record(step, time.perf_counter() - started, ok, status)
+        if not ok:
+            raise StepError(f"{step} failed with {status}")
+        return response
+
+    def think(self):
+        if self.options.think_time > 0:
+            jitter = self.options.think_time * self.options.think_jitter
+            time.sleep(max(0.0, random.uniform(self.options.think_time - jitter, self.options.think_time + jitter)))
+
+    def generate_pdf(self, personalized_story_id):
+        if self.options.pdf_mode == 'sync':
+            self._request('generate_pdf', 'GET', f'/api/generate-pdf/{personalized_story_id}', (200,))
+            return
+        # Asynchron: Job anlegen und bis zum Ende pollen, gemessen wird die Gesamtdauer
+        started = time.perf_counter()
+        status = 'error'
+        ok = False
+        try:
+            response = self.session.post(self.base_url + '/api/pdf-jobs', json={'personalized_story_id': personalized_story_id},
+                                         timeout=self.options.timeout)
+            status = response.status_code
+            if status in (200, 202):
+                job_id = response.json()['id']
+                deadline = started + self.options.pdf_timeout
+                while time.perf_counter() < deadline:
+                    job = self.session.get(f'{self.base_url}/api/pdf-jobs/{job_id}', timeout=self.options.timeout).json()
+                    if job['status'] in ('done', 'failed'):
+                        status = job['status']
+                        ok = status == 'done'
+                        break
+                    time.sleep(PDF_POLL_INTERVAL)
+                else:
+                    status = 'timeout'
+        except (requests.RequestException, ValueError, KeyError):
+            pass
+        self.recorder.record('generate_pdf', time.perf_counter() - started, ok, status)
+        if not ok:
+            raise StepError(f"generate_pdf failed with {status}")
+
+    def run_flow(self):
+        username = f'load-{uuid.uuid4().hex[:12]}'
+        credentials = {'username': username, 'password': uuid.uuid4().hex}
+        self._request('register', 'POST', '/api/register', (201,), json=credentials)
+        token = self._request('login', 'POST', '/api/login', (200,), json=credentials).json()['access_token']
+        self.session.headers['Authorization'] = f'Bearer {token}'
+        self.think()
+
+        stories = self._request('browse_stories', 'GET', '/api/stories', (200,)).json()
+        if not stories:
+            raise StepError('no stories available, use --seed-stories')
+        story = random.choice(stories)
+        self.think()
+
+        user_images = {}
+        for index in range(self.options.images):
+            files = {'file': (f'kind_{index}.jpg', make_image(), 'image/jpeg')}
+            data = {'story_id': story['id'], 'scene_index': str(index)}
+            response = self._request('upload_image', 'POST', '/api/upload-image', (201,), files=files, data=data)
+            user_images[str(index)] = response.json()['file_path']
+        self.think()
+
+        payload = {
+            'story_id': story['id'],
+            'personal_data': {'child_name': random.choice(('Max', 'Mia', 'Emil', 'Lena')), 'role': 'Ritter'},
+            'user_images': user_images,
+        }
+        personalized_story_id = self._request('personalize', 'POST', '/api/personalize', (201,), json=payload).json()['personalized_story_id']
+        self._request('fetch_personalized', 'GET', f'/api/personalized-stories/{personalized_story_id}', (200,))
+        self.think()
+
+        if self.options.pdf_mode != 'skip':
+            self.generate_pdf(personalized_story_id)
+
+
+def virtual_user(base_url, recorder, options, stop_at, start_delay):
+    time.sleep(start_delay)
+    iterations = 0
+    while time.monotonic() < stop_at and (options.iterations is None or iterations < options.iterations):
+        try:
+            VirtualParent(base_url, recorder, options).run_flow()
+            recorder.flow_finished(True)
+        except (StepError, ValueError, KeyError):
+            # ValueError/KeyError: unerwartete Antwort (kein JSON, Feld fehlt)
+            recorder.flow_finished(False)
+        except Exception as e:
+            # Z.B. TypeError bei unerwarteter Nutzlast: als fehlgeschlagener Ablauf zählen und weitermachen,
+            # sonst fiele der Benutzer still weg und der Bericht unterschätzt Last und Fehler
+            print(f"Unexpected error in virtual user: {type(e).__name__}: {e}", file=sys.stderr)
+            recorder.flow_finished(False, e)
+        iterations += 1
+
+
+def seed_stories(mongo_uri, database_name, count, scenes):
+    from pymongo import MongoClient
+    stories = MongoClient(mongo_uri)[database_name].stories
+    documents = []
+    for _ in range(count):
+        story = make_story(scenes)
+        story['loadtest'] = True  # zum späteren Aufräumen: db.stories.deleteMany({loadtest: true})
+        documents.append(story)
+    stories.insert_many(documents)
+    return len(documents)
+
+
+def summarize(recorder, elapsed):
+    steps = {}
+    total_requests = 0
+    for step in STEPS:
+        samples = sorted(recorder.samples.get(step, []))
+        if not samples:
+            continue
+        total_requests += len(samples)
+        steps[step] = {
+            'count': len(samples),
+            'errors': recorder.errors.get(step, 0),
+            'error_rate': recorder.errors.get(step, 0) / len(samples),
+            'p50_ms': percentile(samples, 0.50) * 1000,
+            'p95_ms': percentile(samples, 0.95) * 1000,
+            'p99_ms': percentile(samples, 0.99) * 1000,
+            'mean_ms': sum(samples) / len(samples) * 1000,
+            'throughput_per_s': len(samples) / elapsed if elapsed else 0.0,
+            'statuses': {str(status): count for status, count in recorder.statuses[step].items()},
+        }
+    flows = recorder.flows_completed + recorder.flows_failed
+    return {
+        'elapsed_s': elapsed,
+        'flows_completed': recorder.flows_completed,
+        'flows_failed': recorder.flows_failed,
+        'flow_error_rate': recorder.flows_failed / flows if flows else 0.0,
+        'flows_per_s': recorder.flows_completed / elapsed if elapsed else 0.0,
+        'requests_per_s': total_requests / elapsed if elapsed else 0.0,
+        'unexpected_errors': dict(recorder.unexpected),
+        'steps': steps,
+    }
+
+
+def print_report(report, out=sys.stdout):
+    out.write(f"{'Schritt':<20}{'Anzahl':>8}{'Fehler':>8}{'Fehler%':>9}{'p50':>11}{'p95':>11}{'p99':>11}{'req/s':>9}\n")
+    for step, stats in report['steps'].items():
+        out.write(
+            f"{step:<20}{stats['count']:>8}{stats['errors']:>8}{stats['error_rate'] * 100:>8.1f}%"
+            f"{stats['p50_ms']:>9.1f}ms{stats['p95_ms']:>9.1f}ms{stats['p99_ms']:>9.1f}ms{stats['throughput_per_s']:>9.2f}\n"
+        )
+    out.write(
+        f"\nDauer {report['elapsed_s']:.1f}s, Abläufe ok/fehlgeschlagen: {report['flows_completed']}/{report['flows_failed']} "
+        f"({report['flow_error_rate'] * 100:.1f}% Fehler), {report['flows_per_s']:.2f} Abläufe/s, "
+        f"{report['requests_per_s']:.1f} Requests/s\n"
+    )
+    if report['unexpected_errors']:
+        errors = ', '.join(f"{name}: {count}" for name, count in sorted(report['unexpected_errors'].items()))
+        out.write(f"Unerwartete Fehler im Lastgenerator: {errors}\n")
+
+
+def run(options, out=sys.stdout):
+    recorder = Recorder()
+    started = time.monotonic()
+    stop_at = started + options.duration
+    with ThreadPoolExecutor(max_workers=options.users) as executor:
+        futures = []
+        for index in range(options.users):
+            # Benutzer gleichmäßig über die Ramp-up-Zeit verteilt starten
+            start_delay = options.ramp_up * index / options.users
+            futures.append(executor.submit(virtual_user, options.base_url, recorder, options, stop_at, start_delay))
+        for future in futures:
+            # Fehler außerhalb eines Ablaufs nicht verschlucken
+            future.result()
+    report = summarize(recorder, time.monotonic() - started)
+    print_report(report, out)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Lasttest des kompletten Ablaufs gegen eine lokale Instanz')
+    parser.add_argument('--base-url', default='http://localhost:49158')
+    parser.add_argument('--users', type=int, default=10, help='gleichzeitige Eltern')
+    parser.add_argument('--duration', type=float, default=60, help='Sekunden')
+    parser.add_argument('--iterations', type=int, help='Abläufe pro Benutzer (Standard: bis --duration)')
+    parser.add_argument('--ramp-up', type=float, default=10, help='Sekunden bis alle Benutzer laufen')
+    parser.add_argument('--think-time', type=float, default=1.0, help='Pause zwischen Schritten in Sekunden')
+    parser.add_argument('--think-jitter', type=float, default=0.5, help='Anteil zufälliger Abweichung der Pause')
+    parser.add_argument('--images', type=int, default=2, help='hochgeladene Bilder pro Ablauf')
+    parser.add_argument('--pdf-mode', choices=('async', 'sync', 'skip'), default='async',
+                        help='async: /api/pdf-jobs mit Polling, sync: /api/generate-pdf')
+    parser.add_argument('--pdf-timeout', type=float, default=120)
+    parser.add_argument('--timeout', type=float, default=30, help='Timeout pro HTTP-Request')
+    parser.add_argument('--seed-stories', type=int, default=0, help='vorab synthetische Geschichten anlegen')
+    parser.add_argument('--scenes', type=int, default=20, help='Szenen pro angelegter Geschichte')
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017/')
+    parser.add_argument('--database', default='personalized_books')
+    parser.add_argument('--json', dest='json_path', help='Bericht zusätzlich als JSON speichern')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    if options.seed_stories:
+        seeded = seed_stories(options.mongo_uri, options.database, options.seed_stories, options.scenes)
+        print(f"{seeded} Geschichten mit je {options.scenes} Szenen angelegt")
+    report = run(options)
+    if options.json_path:
+        with open(options.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,12 +3,79 @@
 import os
 
 class Config:
-    DEBUG = True
+    # development | testing | production; bestimmt DEBUG und das Standard-Log-Level
+    APP_ENV = os.environ.get('APP_ENV', 'development')
+    DEBUG = APP_ENV == 'development'
+    LOG_LEVEL = os.environ.get('LOG_LEVEL')  # z.B. 'INFO', überschreibt das Level der Umgebung
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')  # 'text' oder 'json'
+    LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', 1.0))  # Anteil der häufigen DEBUG-Records im Request-Pfad
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))  # Records in der Log-Queue, darüber wird verworfen
     TESTING = False
+    # Benutzer-IDs (kommagetrennt) mit Zugriff auf Betriebsendpunkte, siehe utils/operators.py
+    OPERATOR_USER_IDS = {user_id.strip() for user_id in os.environ.get('OPERATOR_USER_IDS', '').split(',') if user_id.strip()}
+    # Tracing-Spans im OpenTelemetry-Format (OTLP/JSON); außerhalb von development nur auf Wunsch
+    TRACING_ENABLED = os.environ.get('TRACING_ENABLED', '1' if APP_ENV == 'development' else '0') == '1'
+    TRACING_EXPORTER = os.environ.get('TRACING_EXPORTER', 'ring')  # 'ring', 'jsonl' oder 'both'
+    TRACING_JSONL_PATH = os.environ.get('TRACING_JSONL_PATH', os.path.join(os.getcwd(), 'logs', 'traces.jsonl'))
+    TRACING_RING_SIZE = int(os.environ.get('TRACING_RING_SIZE', 10000))  # Spans im Speicher
+    TRACING_SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE', 1.0 if APP_ENV == 'development' else 0.01))  # Anteil der Requests mit Trace
+    TRACING_SERVICE_NAME = os.environ.get('TRACING_SERVICE_NAME', 'storymagic-backend')
+    # GET /api/debug/traces (nur OPERATOR_USER_IDS); nur wenn ausdrücklich eingeschaltet, Spans enthalten IDs und Pfade
+    TRACING_DEBUG_ENDPOINT = os.environ.get('TRACING_DEBUG_ENDPOINT', '0') == '1'
+    # Mongo-Befehle über der Schwelle mit Filter, Projektion und Antwortgröße protokollieren
+    SLOW_QUERY_ENABLED = os.environ.get('SLOW_QUERY_ENABLED', '1') == '1'
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.environ.get('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', 0.1))  # Anteil mit explain
+    SLOW_QUERY_LOG_PATH = os.environ.get('SLOW_QUERY_LOG_PATH', os.path.join(os.getcwd(), 'logs', 'slow_queries.jsonl'))
+    SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024))
+    SLOW_QUERY_LOG_BACKUPS = int(os.environ.get('SLOW_QUERY_LOG_BACKUPS', 5))
+    SLOW_QUERY_RING_SIZE = int(os.environ.get('SLOW_QUERY_RING_SIZE', 500))
+    # Filterwerte (z.B. Benutzernamen) werden ersetzt, Klartext nur mit SLOW_QUERY_REDACT=0
+    SLOW_QUERY_REDACT = os.environ.get('SLOW_QUERY_REDACT', '1') == '1'
+    # GET /api/debug/slow-queries (nur OPERATOR_USER_IDS); nur wenn ausdrücklich eingeschaltet
+    SLOW_QUERY_DEBUG_ENDPOINT = os.environ.get('SLOW_QUERY_DEBUG_ENDPOINT', '0') == '1'
     MONGODB_URI = os.environ.get('MONGODB_URI', 'mongodb://192.168.178.25:49155/')
     DATABASE_NAME = 'personalized_books'
+    # Pro Prozess; Summe über alle Worker muss unter dem Verbindungslimit von Mongo bleiben
+    MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 50))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 2000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+    MONGO_READ_PREFERENCE = os.environ.get('MONGO_READ_PREFERENCE', 'primary')
+    MONGO_COMPRESSORS = os.environ.get('MONGO_COMPRESSORS', '')  # z.B. 'zstd,snappy,zlib'
+    MONGO_APP_NAME = os.environ.get('MONGO_APP_NAME', 'storymagic-backend')
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'static', 'uploads')
+    PDF_FOLDER = os.path.join(os.getcwd(), 'static', 'pdfs')
+    # '' = Flask streamt selbst, 'x-sendfile' (Apache) oder 'x-accel-redirect' (nginx)
+    PDF_SENDFILE_MODE = os.environ.get('PDF_SENDFILE_MODE', '')
+    PDF_ACCEL_REDIRECT_PREFIX = os.environ.get('PDF_ACCEL_REDIRECT_PREFIX', '/protected-pdfs/')
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB
+    DERIVATIVE_WORKERS = int(os.environ.get('DERIVATIVE_WORKERS', 2))
+    DERIVATIVE_THUMBNAIL_SIZE = 256  # längste Kante in Pixel
+    DERIVATIVE_SCREEN_SIZE = 1600
+    PRINT_DPI = int(os.environ.get('PRINT_DPI', 300))
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', '1') == '1'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))  # Bytes, kleinere Antworten unkomprimiert
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', 6))  # gzip 1-9
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 5))  # brotli 0-11
+    PAGE_SIZE_DEFAULT = 20
+    PAGE_SIZE_MAX = 100
+    STORY_CACHE_MAX_ENTRIES = int(os.environ.get('STORY_CACHE_MAX_ENTRIES', 256))
+    STORY_CACHE_MAX_BYTES = int(os.environ.get('STORY_CACHE_MAX_BYTES', 64 * 1024 * 1024))  # 64 MB
+    STORY_CACHE_TTL = int(os.environ.get('STORY_CACHE_TTL', 300))  # Sekunden
+    MATERIALIZED_CACHE_MAX_ENTRIES = int(os.environ.get('MATERIALIZED_CACHE_MAX_ENTRIES', 1024))
+    TEMPLATE_SNAPSHOT_CACHE_MAX_ENTRIES = int(os.environ.get('TEMPLATE_SNAPSHOT_CACHE_MAX_ENTRIES', 256))
+    PERSONALIZE_BATCH_MAX = int(os.environ.get('PERSONALIZE_BATCH_MAX', 200))
+    PDF_WORKER_PROCESSES = int(os.environ.get('PDF_WORKER_PROCESSES', 2))
+    PDF_QUEUE_MAX_DEPTH = int(os.environ.get('PDF_QUEUE_MAX_DEPTH', 1000))
+    PDF_JOB_POLL_INTERVAL = float(os.environ.get('PDF_JOB_POLL_INTERVAL', 1.0))  # Sekunden
+    PDF_JOB_STALE_AFTER = int(os.environ.get('PDF_JOB_STALE_AFTER', 300))  # Sekunden ohne Heartbeat
+    PDF_JOB_MAX_ATTEMPTS = int(os.environ.get('PDF_JOB_MAX_ATTEMPTS', 3))
+    # In Produktion aus: Templates werden nicht bei jedem Zugriff auf Änderungen geprüft
+    TEMPLATE_AUTO_RELOAD = os.environ.get('TEMPLATE_AUTO_RELOAD', '0') == '1'
+    TEMPLATE_BYTECODE_CACHE_DIR = os.environ.get('TEMPLATE_BYTECODE_CACHE_DIR', os.path.join(os.getcwd(), 'cache', 'jinja'))
+    ENSURE_INDEXES = os.environ.get('ENSURE_INDEXES', '1') == '1'
     SECRET_KEY = os.environ.get('SECRET_KEY', 'your_secret_key')
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'your_jwt_secret_key')
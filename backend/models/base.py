@@ -0,0 +1,143 @@
+# models/base.py
+
+class field:
+    """Attribut, das erst beim Zugriff aus dem Mongo-Dokument gelesen wird.
+
+    ``factory`` erzeugt veränderliche Standardwerte ([] / {}) pro Zugriff,
+    ``convert`` wird auf vorhandene Werte und Standardwerte angewendet.
+    """
+
+    __slots__ = ('key', 'default', 'factory', 'convert')
+
+    def __init__(self, key, default=None, factory=None, convert=None):
+        self.key = key
+        self.default = default
+        self.factory = factory
+        self.convert = convert
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        try:
+            value = obj._data[self.key]
+        except KeyError:
+            value = self.factory() if self.factory is not None else self.default
+        return self.convert(value) if self.convert is not None else value
+
+
+def _compile_serializer(cls, fields):
+    """Erzeugt ``serialize(data) -> dict`` für die JSON-Schlüssel ``fields``.
+
+    Wie dataclasses ``__init__`` erzeugt: ein einziges Dict-Literal, das direkt aus dem
+    Mongo-Dokument liest, ohne Zwischenobjekte und ohne Descriptor-Aufrufe pro Feld.
+    """
+    namespace = {'_cls': cls}
+    items = []
+    for index, key in enumerate(fields):
+        try:
+            attribute = cls._attributes[key]
+        except KeyError:
+            raise ValueError(f"Unknown field for {cls.__name__}: {key}")
+        descriptor = getattr(cls, attribute)
+        if not isinstance(descriptor, field):
+            # Berechnete Attribute (property) brauchen eine Sicht auf das Dokument
+            items.append(f"{key!r}: _cls(data).{attribute}")
+            continue
+        if descriptor.factory is not None:
+            namespace[f'_factory{index}'] = descriptor.factory
+            expression = f"(data[{descriptor.key!r}] if {descriptor.key!r} in data else _factory{index}())"
+        else:
+            namespace[f'_default{index}'] = descriptor.default
+            expression = f"data.get({descriptor.key!r}, _default{index})"
+        if descriptor.convert is not None:
+            namespace[f'_convert{index}'] = descriptor.convert
+            expression = f"_convert{index}({expression})"
+        items.append(f"{key!r}: {expression}")
+    source = f"def serialize(data):\n    return {{{', '.join(items)}}}\n"
+    exec(source, namespace)
+    return namespace['serialize']
+
+
+class DocumentView:
+    """Schlanke Sicht auf ein von pymongo dekodiertes Dokument, ohne es zu kopieren.
+
+    Unterklassen beschreiben ihre Felder mit ``field`` und die JSON-Ausgabe mit
+    ``DICT_FIELDS`` (JSON-Schlüssel, Attribut). ``fields`` schränkt die Ausgabe
+    auf einen Teil der JSON-Schlüssel ein (Projektion), sonst gilt ``DEFAULT_FIELDS``.
+    """
+
+    __slots__ = ('_data', '_fields')
+
+    DICT_FIELDS = ()
+    # JSON-Schlüssel von to_dict() ohne Projektion, None = alle aus DICT_FIELDS
+    DEFAULT_FIELDS = None
+
+    def __init__(self, data, fields=None):
+        self._data = data
+        self._fields = fields
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._attributes = dict(cls.DICT_FIELDS)
+        # Kompilierte Serialisierer pro Projektion, siehe _compile_serializer
+        cls._serializers = {}
+
+    @classmethod
+    def serializer(cls, fields=None):
+        # Schlüssel ist die übergebene Projektion (None = DEFAULT_FIELDS), Tupel sind hashbar
+        fields = tuple(fields) if fields is not None else None
+        serialize = cls._serializers.get(fields)
+        if serialize is None:
+            serialize = cls._serializers[fields] = _compile_serializer(cls, fields or cls.DEFAULT_FIELDS or tuple(cls._attributes))
+        return serialize
+
+    @property
+    def document(self):
+        return self._data
+
+    def to_dict(self, fields=None):
+        fields = fields or self._fields
+        serialize = self._serializers.get(fields) if fields is None or type(fields) is tuple else None
+        if serialize is None:
+            serialize = self.serializer(fields)
+        return serialize(self._data)
+
+    # Wird von utils.serialization beim Kodieren aufgerufen, Resources geben das Modell direkt zurück
+    __json__ = to_dict
+
+    @classmethod
+    def many(cls, documents, fields=None):
+        """Liste von Dokumenten für Listen-Endpoints, ohne ein Modellobjekt pro Dokument."""
+        return DocumentList(cls, documents, fields)
+
+    @classmethod
+    def mongo_projection(cls, fields):
+        """Mongo-Projektion für die JSON-Schlüssel ``fields`` (nur direkt gespeicherte Felder)."""
+        projection = {}
+        for key in fields:
+            descriptor = getattr(cls, cls._attributes[key])
+            if isinstance(descriptor, field) and descriptor.key != '_id':
+                projection[descriptor.key] = 1
+        return projection
+
+
+class DocumentList:
+    """Wird von utils.serialization als Ganzes kodiert: ein Aufruf statt einem pro Dokument."""
+
+    __slots__ = ('model', 'documents', 'fields')
+
+    def __init__(self, model, documents, fields=None):
+        self.model = model
+        # Cursor hier lesen, Fehler von Mongo sollen in der Resource auftreten, nicht beim Kodieren
+        self.documents = documents if isinstance(documents, list) else list(documents)
+        self.fields = fields
+
+    def __len__(self):
+        return len(self.documents)
+
+    def __iter__(self):
+        return (self.model(document, self.fields) for document in self.documents)
+
+    def __json__(self):
+        serialize = self.model.serializer(self.fields)
+        return [serialize(document) for document in self.documents]
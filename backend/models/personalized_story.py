@@ -1,24 +1,40 @@
 # models/personalized_story.py
 
-class PersonalizedStory:
-    def __init__(self, data):
-        self.id = str(data.get('_id', ''))
-        self.user_id = data.get('user_id', '')
-        self.story_id = data.get('story_id', '')
-        self.title = data.get('title', '')
-        self.description = data.get('description', '')
-        self.scenes = data.get('scenes', [])
-        self.personal_data = data.get('personal_data', {})
-        self.created_at = data.get('created_at')
+from models.base import DocumentView, field
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'story_id': self.story_id,
-            'title': self.title,
-            'description': self.description,
-            'scenes': self.scenes,
-            'personal_data': self.personal_data,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+class PersonalizedStory(DocumentView):
+    __slots__ = ()
+
+    id = field('_id', default='', convert=str)
+    user_id = field('user_id', default='')
+    story_id = field('story_id', default='')
+    title = field('title', default='')
+    description = field('description', default='')
+    scenes = field('scenes', factory=list)
+    personal_data = field('personal_data', factory=dict)
+    # Nur bei Overlays gesetzt, die Szenen sind dann bereits zusammengeführt
+    story_version = field('story_version')
+    image_overrides = field('image_overrides', factory=dict)
+    cover_image = field('coverImage')
+    created_at = field('created_at')
+    created_at_iso = field('created_at', convert=_isoformat)
+
+    DICT_FIELDS = (
+        ('id', 'id'),
+        ('user_id', 'user_id'),
+        ('story_id', 'story_id'),
+        ('title', 'title'),
+        ('description', 'description'),
+        ('scenes', 'scenes'),
+        ('personal_data', 'personal_data'),
+        ('coverImage', 'cover_image'),
+        ('created_at', 'created_at_iso'),
+    )
+    DEFAULT_FIELDS = ('id', 'user_id', 'story_id', 'title', 'description', 'scenes', 'personal_data', 'created_at')
+    SUMMARY_FIELDS = ('id', 'story_id', 'title', 'coverImage', 'created_at')
+
+    def to_summary_dict(self):
+        return self.to_dict(self.SUMMARY_FIELDS)
@@ -1,24 +1,37 @@
 # models/story.py
 
-#from bson.objectid import ObjectId
+from models.base import DocumentView, field
 
-# models/story.py
+class Story(DocumentView):
+    __slots__ = ()
+
+    id = field('_id', convert=str)
+    title = field('title')
+    description = field('description')
+    cover_image = field('coverImage')
+    scenes = field('scenes', factory=list)
+    roles = field('roles', factory=list)
+    age_group = field('ageGroup')
+    # Füge weitere Felder nach Bedarf hinzu
+
+    DICT_FIELDS = (
+        ('id', 'id'),
+        ('title', 'title'),
+        ('description', 'description'),
+        ('coverImage', 'cover_image'),
+        ('scenes', 'scenes'),  # Stelle sicher, dass 'scenes' enthalten ist
+        ('pageCount', 'page_count'),
+        ('roles', 'roles'),
+        ('ageGroup', 'age_group'),
+    )
+    DEFAULT_FIELDS = ('id', 'title', 'description', 'coverImage', 'scenes')
+    SUMMARY_FIELDS = ('id', 'title', 'description', 'coverImage', 'pageCount', 'roles', 'ageGroup')
 
-class Story:
-    def __init__(self, data):
-        self.id = str(data.get('_id'))
-        self.title = data.get('title')
-        self.description = data.get('description')
-        self.cover_image = data.get('coverImage')
-        self.scenes = data.get('scenes', [])
-        # Füge weitere Felder nach Bedarf hinzu
+    @property
+    def page_count(self):
+        # Bei Summary-Abfragen liefert Mongo nur die Seitenanzahl, nicht die Szenen
+        page_count = self._data.get('pageCount')
+        return page_count if page_count is not None else len(self.scenes)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'coverImage': self.cover_image,
-            'scenes': self.scenes,  # Stelle sicher, dass 'scenes' enthalten ist
-            # Füge weitere Felder hinzu
-        }
+    def to_summary_dict(self):
+        return self.to_dict(self.SUMMARY_FIELDS)
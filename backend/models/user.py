@@ -1,22 +1,23 @@
 # models/user.py
 
 from werkzeug.security import generate_password_hash, check_password_hash
+from models.base import DocumentView, field
+
+class User(DocumentView):
+    __slots__ = ()
+
+    id = field('_id', default='', convert=str)
+    username = field('username', default='')
+    password_hash = field('password_hash', default='')
+
+    DICT_FIELDS = (
+        ('id', 'id'),
+        ('username', 'username'),
+        # Passwort-Hash sollte nicht zurückgegeben werden
+    )
 
-class User:
-    def __init__(self, data):
-        self.id = str(data.get('_id', ''))
-        self.username = data.get('username', '')
-        self.password_hash = data.get('password_hash', '')
-    
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
-    
+        self._data['password_hash'] = generate_password_hash(password)
+
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'username': self.username,
-            # Passwort-Hash sollte nicht zurückgegeben werden
-        }
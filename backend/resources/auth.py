@@ -6,6 +6,7 @@ from models.user import User
 from flask import abort
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token
+from pymongo.errors import DuplicateKeyError
 import logging
 
 class Register(Resource):
@@ -24,8 +25,13 @@ class Register(Resource):
 
         password_hash = generate_password_hash(password)
         user = {'username': username, 'password_hash': password_hash}
-        result = db.users.insert_one(user)
-        logging.debug(f"User registered with ID: {result.inserted_id}")
+        try:
+            result = db.users.insert_one(user)
+        except DuplicateKeyError:
+            # Gleichzeitige Registrierung, der Unique-Index auf username greift
+            logging.warning(f"Username already exists: {username}")
+            return {'message': 'Username already exists'}, 400
+        logging.debug("User registered with ID: %s", result.inserted_id)
         return {'message': 'User registered successfully'}, 201
 
 class Login(Resource):
@@ -49,5 +55,5 @@ class Login(Resource):
             return {'message': 'Invalid username or password'}, 401
 
         access_token = create_access_token(identity=user.id)
-        logging.debug(f"User logged in: {username}")
+        logging.debug("User logged in: %s", username)
         return {'access_token': access_token}, 200
@@ -1,15 +1,167 @@
 # resources/generate_pdf.py
 
 from flask_restful import Resource
-from flask import current_app, send_file, abort
+from flask import current_app, send_file, abort, Response
 from utils.database import db
 from models.personalized_story import PersonalizedStory
-from models.story import Story
 from bson.objectid import ObjectId
+from utils.personalization import materialize, template_version, TemplateNotFound
+from utils.templating import get_template, layout_version, PDF_TEMPLATE
+from utils.tracing import tracer
+from config import Config
+import hashlib
+import json
 import logging
 import os
-from weasyprint import HTML
-from jinja2 import Environment, FileSystemLoader
+
+try:
+    from weasyprint import HTML, default_url_fetcher
+except (ImportError, OSError):
+    # WeasyPrint braucht Pango/Cairo; ohne diese Bibliotheken startet die API trotzdem
+    HTML = None
+    default_url_fetcher = None
+
+
+class PDFRenderError(Exception):
+    def __init__(self, message, status=500):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+# Felder der personalisierten Geschichte, die in das PDF einfließen
+# (Overlay: Verweis auf die Vorlage und Overrides; alte Dokumente: vollständige Szenen)
+PDF_INPUT_PROJECTION = {
+    'format': 1, 'story_id': 1, 'story_version': 1, 'title': 1, 'scenes': 1,
+    'personal_data': 1, 'image_overrides': 1
+}
+
+
+def pdf_cache_key(p_story_data, template_etag):
+    basis = json.dumps({
+        'layout': layout_version(),
+        'story_id': p_story_data.get('story_id'),
+        'template': template_etag,
+        # Nur bei alten Dokumenten gesetzt, die ihre Szenen selbst enthalten
+        'scenes': p_story_data.get('scenes'),
+        'personal_data': p_story_data.get('personal_data') or {},
+        'image_overrides': p_story_data.get('image_overrides') or {},
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(basis.encode('utf-8')).hexdigest()
+
+
+def pdf_cache_path(key):
+    # Zweistufig verteilt, damit kein Verzeichnis zu groß wird
+    return os.path.join(Config.PDF_FOLDER, key[:2], f"{key}.pdf")
+
+
+def traced_url_fetcher(url, *args, **kwargs):
+    # Bilder lädt WeasyPrint während des Layouts, jeder Abruf wird ein eigener Span
+    with tracer.span('weasyprint.fetch', **{'url.full': url}) as span:
+        result = default_url_fetcher(url, *args, **kwargs)
+        if isinstance(result, dict) and result.get('string') is not None:
+            span.set_attribute('http.response.body.size', len(result['string']))
+        return result
+
+
+def render_personalized_story_pdf(personalized_story_id, progress=None):
+    # Wird von GeneratePDF und vom PDF-Worker (workers/pdf_worker.py) genutzt
+    with tracer.span('pdf.render', **{'personalized_story.id': personalized_story_id}) as span:
+        pdf_path = _render_pdf(personalized_story_id, progress, span)
+        span.set_attribute('pdf.path', pdf_path)
+        return pdf_path
+
+
+def _render_pdf(personalized_story_id, progress, span):
+    def report(fraction, stage):
+        if progress is not None:
+            progress(fraction, stage)
+
+    # Hole die personalisierte Geschichte
+    report(0.05, 'loading')
+    p_story_data = db.personalized_stories.find_one({'_id': ObjectId(personalized_story_id)}, PDF_INPUT_PROJECTION)
+    if not p_story_data:
+        logging.warning(f"Personalized story not found: {personalized_story_id}")
+        raise PDFRenderError('Personalized story not found', 404)
+    story_id = p_story_data.get('story_id')
+    if not ObjectId.is_valid(story_id):
+        logging.warning(f"Invalid story ID in personalized story {personalized_story_id}: {story_id}")
+        raise PDFRenderError('Story not found', 404)
+
+    # Version der Vorlage, aus der die Szenen stammen (festgeschrieben beim Personalisieren)
+    with tracer.span('story.template_version', **{'story.id': story_id}):
+        try:
+            template_etag = template_version(db.stories, p_story_data)
+        except TemplateNotFound:
+            raise PDFRenderError('Story not found', 404)
+
+    # Gleiche Eingaben ergeben dieselbe Datei, dann nicht neu rendern
+    pdf_path = pdf_cache_path(pdf_cache_key(p_story_data, template_etag))
+    if os.path.exists(pdf_path):
+        logging.debug("PDF cache hit: %s", pdf_path)
+        span.set_attribute('pdf.cache_hit', True)
+        report(1.0, 'done')
+        return pdf_path
+    span.set_attribute('pdf.cache_hit', False)
+
+    if HTML is None:
+        raise PDFRenderError('PDF rendering is not available')
+    # Szenen wie in der API: Vorlage mit personal_data und den hochgeladenen Bildern (image_overrides)
+    personalized_story = PersonalizedStory(materialize(db.stories, p_story_data))
+
+    # Render das HTML-Template
+    report(0.2, 'template')
+    with tracer.span('jinja.render', template=PDF_TEMPLATE, **{'story.scenes': len(personalized_story.scenes)}) as render_span:
+        template = get_template(PDF_TEMPLATE)
+        html_out = template.render(
+            story=personalized_story,
+            personal_data=personalized_story.personal_data
+        )
+        render_span.set_attribute('html.size', len(html_out))
+
+    # Layout und PDF getrennt, damit der Fortschritt sichtbar ist
+    report(0.3, 'layout')
+    with tracer.span('weasyprint.layout') as layout_span:
+        document = HTML(string=html_out, url_fetcher=traced_url_fetcher).render()
+        layout_span.set_attribute('pdf.pages', len(document.pages))
+    report(0.8, 'writing')
+    os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
+    # Erst in eine temporäre Datei schreiben, damit nie ein halbes PDF ausgeliefert wird
+    tmp_path = f"{pdf_path}.{os.getpid()}.tmp"
+    with tracer.span('weasyprint.write_pdf'):
+        document.write_pdf(tmp_path)
+    os.replace(tmp_path, pdf_path)
+    report(1.0, 'done')
+    logging.debug("PDF generated at: %s", pdf_path)
+    return pdf_path
+
+
+def send_pdf(pdf_path, key, download_name):
+    mode = current_app.config['PDF_SENDFILE_MODE']
+    if mode in ('x-sendfile', 'x-accel-redirect'):
+        # Der Webserver (Apache/nginx) liefert die Bytes aus, inkl. Range-Anfragen
+        response = Response(status=200, mimetype='application/pdf')
+        if mode == 'x-sendfile':
+            response.headers['X-Sendfile'] = os.path.abspath(pdf_path)
+        else:
+            relative_path = os.path.relpath(pdf_path, Config.PDF_FOLDER).replace(os.sep, '/')
+            response.headers['X-Accel-Redirect'] = current_app.config['PDF_ACCEL_REDIRECT_PREFIX'] + relative_path
+        response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+        response.set_etag(key)
+        return response
+    # Streamt die Datei und beantwortet Range/If-Range/If-None-Match selbst
+    response = send_file(
+        pdf_path,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=download_name,
+        conditional=True,
+        etag=key
+    )
+    # Werkzeug setzt den Header nur bei 206; Clients sollen Downloads fortsetzen können
+    response.headers['Accept-Ranges'] = 'bytes'
+    return response
+
 
 class GeneratePDF(Resource):
     def get(self, personalized_story_id):
@@ -17,48 +169,38 @@ class GeneratePDF(Resource):
             logging.warning(f"Invalid personalized story ID: {personalized_story_id}")
             return {'message': 'Invalid personalized story ID'}, 400
         try:
-            # Hole die personalisierte Geschichte
-            p_story_data = db.personalized_stories.find_one({'_id': ObjectId(personalized_story_id)})
-            if not p_story_data:
-                logging.warning(f"Personalized story not found: {personalized_story_id}")
-                return {'message': 'Personalized story not found'}, 404
-            personalized_story = PersonalizedStory(p_story_data)
-            
-            # Hole die ursprüngliche Geschichte
-            story_data = db.stories.find_one({'_id': ObjectId(personalized_story.story_id)})
-            if not story_data:
-                logging.warning(f"Story not found: {personalized_story.story_id}")
-                return {'message': 'Story not found'}, 404
-            story = Story(story_data)
-            
-            # Render das HTML-Template
-            env = Environment(loader=FileSystemLoader('templates'))
-            template = env.get_template('pdf_template.html')
-            html_out = template.render(
-                story=story,
-                personal_data=personalized_story.personal_data,
-                user_images=personalized_story.user_images
-            )
-            
-            # Generiere das PDF
-            pdf_filename = f"{personalized_story_id}.pdf"
-            pdf_path = os.path.join('static', 'uploads', pdf_filename)
-            HTML(string=html_out).write_pdf(pdf_path)
-            logging.debug(f"PDF generated at: {pdf_path}")
+            pdf_path = render_personalized_story_pdf(personalized_story_id)
             return {'pdf_path': pdf_path}, 200
+        except PDFRenderError as e:
+            return {'message': e.message}, e.status
         except Exception as e:
             logging.error(f"Error generating PDF: {e}")
             return {'message': 'Error generating PDF'}, 500
 
 class DownloadPDF(Resource):
     def get(self, personalized_story_id):
-        pdf_filename = f"{personalized_story_id}.pdf"
-        pdf_path = os.path.join('static', 'uploads', pdf_filename)
-        if not os.path.exists(pdf_path):
-            logging.warning(f"PDF not found: {pdf_path}")
-            return {'message': 'PDF not found'}, 404
+        if not ObjectId.is_valid(personalized_story_id):
+            logging.warning(f"Invalid personalized story ID: {personalized_story_id}")
+            return {'message': 'Invalid personalized story ID'}, 400
         try:
-            return send_file(pdf_path, as_attachment=True, attachment_filename=pdf_filename)
+            p_story_data = db.personalized_stories.find_one({'_id': ObjectId(personalized_story_id)}, PDF_INPUT_PROJECTION)
+            if not p_story_data:
+                logging.warning(f"Personalized story not found: {personalized_story_id}")
+                return {'message': 'Personalized story not found'}, 404
+            story_id = p_story_data.get('story_id')
+            if not ObjectId.is_valid(story_id):
+                logging.warning(f"Invalid story ID in personalized story {personalized_story_id}: {story_id}")
+                return {'message': 'Story not found'}, 404
+            try:
+                template_etag = template_version(db.stories, p_story_data)
+            except TemplateNotFound:
+                return {'message': 'Story not found'}, 404
+            key = pdf_cache_key(p_story_data, template_etag)
+            pdf_path = pdf_cache_path(key)
+            if not os.path.exists(pdf_path):
+                logging.warning(f"PDF not found: {pdf_path}")
+                return {'message': 'PDF not found'}, 404
+            return send_pdf(pdf_path, key, f"{personalized_story_id}.pdf")
         except Exception as e:
             logging.error(f"Error sending PDF: {e}")
             abort(500, 'Error sending PDF')
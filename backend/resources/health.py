@@ -0,0 +1,23 @@
+# resources/health.py
+
+from flask_restful import Resource
+from utils.database import ping, pool_stats
+import logging
+
+class Liveness(Resource):
+    def get(self):
+        return {'status': 'ok'}, 200
+
+class Readiness(Resource):
+    def get(self):
+        try:
+            ping()
+        except Exception as e:
+            # Fehlertext nur ins Log, er enthält Hosts und Ports der Mongo-Topologie
+            logging.warning(f"Readiness check failed: {e}")
+            return {'status': 'unavailable', 'mongo': 'unreachable', 'pool': pool_stats()}, 503
+        return {'status': 'ok', 'pool': pool_stats()}, 200
+
+class PoolStats(Resource):
+    def get(self):
+        return pool_stats(), 200
@@ -0,0 +1,39 @@
+# resources/metrics.py
+
+from flask import Response
+from flask_restful import Resource
+from utils.database import db, pool_stats
+from utils.metrics import registry, gauge_lines
+from utils.pdf_jobs import queue_stats
+from utils.story_cache import story_cache
+import logging
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+class Metrics(Resource):
+    def get(self):
+        lines = registry.render()
+        cache = story_cache.stats()
+        lines += gauge_lines('story_cache_entries', 'Stories held in the story cache', [({}, cache['entries'])])
+        lines += gauge_lines('story_cache_bytes', 'Bytes held in the story cache', [({}, cache['bytes'])])
+        lines += gauge_lines('story_cache_requests', 'Story cache lookups by result', [
+            ({'result': result}, cache[result]) for result in ('hits', 'misses', 'revalidations', 'evictions')
+        ])
+        pool = pool_stats()
+        lines += gauge_lines('mongodb_pool_connections', 'Mongo connections of this process by state', [
+            ({'state': state}, pool[state]) for state in ('open', 'checked_out', 'idle')
+        ])
+        lines += gauge_lines('mongodb_pool_checkout_failures', 'Failed connection checkouts', [({}, pool['checkout_failures'])])
+        try:
+            queue = queue_stats(db)
+        except Exception as e:
+            # /metrics soll auch ohne Mongo antworten
+            logging.warning(f"PDF queue stats unavailable: {e}")
+        else:
+            lines += gauge_lines('pdf_jobs', 'PDF jobs by status', [
+                ({'status': status}, queue[status]) for status in ('queued', 'running')
+            ])
+            lines += gauge_lines('pdf_workers', 'Live PDF workers', [
+                ({'state': 'alive'}, queue['workers']), ({'state': 'busy'}, queue['busy_workers'])
+            ])
+        return Response('\n'.join(lines) + '\n', mimetype=None, content_type=PROMETHEUS_CONTENT_TYPE)
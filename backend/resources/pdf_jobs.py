@@ -0,0 +1,69 @@
+# resources/pdf_jobs.py
+
+from flask_restful import Resource
+from flask import request, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from bson.objectid import ObjectId
+from utils.database import db
+from utils.validations import is_valid_object_id
+from utils.operators import operator_required
+from utils.pdf_jobs import enqueue_job, get_job, job_to_dict, queue_stats, QueueFullError
+import logging
+
+class PDFJobs(Resource):
+    @jwt_required()
+    def post(self):
+        current_user_id = get_jwt_identity()
+        data = request.get_json(silent=True) or {}
+        personalized_story_id = data.get('personalized_story_id')
+        if not is_valid_object_id(personalized_story_id):
+            logging.warning(f"Invalid personalized story ID: {personalized_story_id}")
+            return {'message': 'Invalid personalized story ID'}, 400
+        try:
+            owned = db.personalized_stories.find_one(
+                {'_id': ObjectId(personalized_story_id), 'user_id': current_user_id},
+                {'_id': 1}
+            )
+            if not owned:
+                logging.warning(f"Personalized story not found or access denied: {personalized_story_id}")
+                return {'message': 'Personalized story not found'}, 404
+            job, created = enqueue_job(
+                db, personalized_story_id, current_user_id, current_app.config['PDF_QUEUE_MAX_DEPTH']
+            )
+            logging.debug("PDF job %s: %s", 'queued' if created else 'reused', job['_id'])
+            return job_to_dict(job), 202 if created else 200
+        except QueueFullError:
+            logging.warning("PDF queue is full")
+            return {'message': 'PDF queue is full, please retry later'}, 503, {'Retry-After': '30'}
+        except Exception as e:
+            logging.error(f"Error queueing PDF job: {e}", exc_info=True)
+            return {'message': 'Error queueing PDF job'}, 500
+
+class PDFJobStatus(Resource):
+    @jwt_required()
+    def get(self, job_id):
+        current_user_id = get_jwt_identity()
+        if not is_valid_object_id(job_id):
+            logging.warning(f"Invalid PDF job ID: {job_id}")
+            return {'message': 'Invalid PDF job ID'}, 400
+        try:
+            job = get_job(db, job_id)
+            if not job or job.get('user_id') != current_user_id:
+                logging.warning(f"PDF job not found or access denied: {job_id}")
+                return {'message': 'PDF job not found'}, 404
+            return job_to_dict(job), 200
+        except Exception as e:
+            logging.error(f"Error retrieving PDF job: {e}", exc_info=True)
+            return {'message': 'Error retrieving PDF job'}, 500
+
+class PDFJobMetrics(Resource):
+    @operator_required
+    def get(self):
+        try:
+            stats = queue_stats(db)
+            stats['pool_size'] = current_app.config['PDF_WORKER_PROCESSES']
+            stats['max_queue_depth'] = current_app.config['PDF_QUEUE_MAX_DEPTH']
+            return stats, 200
+        except Exception as e:
+            logging.error(f"Error retrieving PDF queue metrics: {e}", exc_info=True)
+            return {'message': 'Error retrieving PDF queue metrics'}, 500
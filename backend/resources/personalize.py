@@ -1,28 +1,102 @@
 # resources/personalize.py
 
 from flask_restful import Resource
-from flask import request
+from flask import request, current_app
 from utils.database import db
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.personalized_story import PersonalizedStory
-from datetime import datetime
 import logging
 from bson.objectid import ObjectId
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
 from utils.validations import is_valid_object_id, is_valid_name
+from utils.story_cache import story_cache
+from utils.personalization import (build_overlay, normalize_image_overrides, materialize, snapshot_template,
+                                   template_version, TemplateNotFound)
+from utils.pagination import InvalidPageRequest, parse_limit, parse_time_cursor, time_cursor_query, encode_time_cursor, fetch_page
+from utils.logging_config import HOT_PATH_SAMPLE
+from utils.etag import make_etag, is_not_modified, not_modified_response, etag_headers
+
+# Personalisierte Geschichten werden nach dem Anlegen nicht mehr verändert,
+# daher reichen _id, created_at und ggf. updated_at/version für das ETag.
+# Bei Overlays kommt die Version der Vorlage hinzu, aus der die Szenen stammen.
+PERSONALIZED_VERSION_PROJECTION = {'created_at': 1, 'updated_at': 1, 'version': 1, 'format': 1, 'story_id': 1, 'story_version': 1}
+PERSONALIZED_CACHE_CONTROL = 'private, no-cache'
+
+def personalized_story_etag(story_data):
+    return make_etag(
+        story_data.get('_id'),
+        story_data.get('created_at'),
+        story_data.get('updated_at'),
+        story_data.get('version'),
+        template_version(db.stories, story_data)
+    )
+
+USER_STORY_SUMMARY_PROJECTION = PersonalizedStory.mongo_projection(PersonalizedStory.SUMMARY_FIELDS)
+USER_STORY_SORT = [('created_at', -1), ('_id', -1)]
 
 class UserStories(Resource):
     @jwt_required()
     def get(self):
         current_user_id = get_jwt_identity()
+        view = request.args.get('view', 'full')
+        if view not in ('full', 'summary'):
+            logging.warning(f"Invalid view requested: {view}")
+            return {'message': 'Invalid view'}, 400
+        # Die Summary-Ansicht ist immer paginiert, die volle Ansicht nur auf Anfrage
+        paginate = view == 'summary' or 'limit' in request.args or 'after' in request.args
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            after = parse_time_cursor(request.args.get('after'))
+        except InvalidPageRequest as e:
+            logging.warning(f"Invalid pagination parameters: {e}")
+            return {'message': str(e)}, 400
         try:
-            stories_cursor = db.personalized_stories.find({'user_id': current_user_id})
-            stories = [PersonalizedStory(s).to_dict() for s in stories_cursor]
-            logging.debug(f"Personalized stories retrieved for user {current_user_id}")
-            return stories, 200
+            query = {'user_id': current_user_id}
+            if after is not None:
+                query.update(time_cursor_query(after))
+            projection = USER_STORY_SUMMARY_PROJECTION if view == 'summary' else None
+            # Sortierung über den Index (user_id, created_at, _id)
+            stories_cursor = db.personalized_stories.find(query, projection).sort(USER_STORY_SORT)
+            headers = {}
+            if paginate:
+                documents, has_more = fetch_page(stories_cursor, limit)
+                if has_more:
+                    last = documents[-1]
+                    headers['X-Next-Cursor'] = encode_time_cursor(last.get('created_at'), last['_id'])
+                headers['X-Total-Count'] = str(db.personalized_stories.count_documents({'user_id': current_user_id}))
+            else:
+                documents = stories_cursor
+            if view == 'summary':
+                stories = [self._summary(s) for s in documents]
+            else:
+                stories = PersonalizedStory.many(self._materialize_all(documents))
+            logging.debug("Personalized stories retrieved for user %s", current_user_id, extra=HOT_PATH_SAMPLE)
+            return stories, 200, headers
         except Exception as e:
             logging.error(f"Error retrieving personalized stories: {e}", exc_info=True)
             return {'message': 'Error retrieving personalized stories'}, 500
 
+    @staticmethod
+    def _materialize_all(documents):
+        materialized = []
+        for story_data in documents:
+            try:
+                materialized.append(materialize(db.stories, story_data))
+            except TemplateNotFound:
+                # Ohne Vorlage und Snapshot gibt es keine Szenen; nicht die ganze Liste scheitern lassen
+                logging.warning(f"Personalized story without template omitted: {story_data.get('_id')}")
+        return materialized
+
+    @staticmethod
+    def _summary(story_data):
+        summary = PersonalizedStory(story_data).to_summary_dict()
+        if summary['coverImage'] is None and is_valid_object_id(summary['story_id']):
+            # Ältere Dokumente ohne Cover: aus der (gecachten) Vorlage übernehmen
+            template = story_cache.get(db.stories, summary['story_id'])
+            summary['coverImage'] = template.get('coverImage') if template else None
+        return summary
+
 class DeletePersonalizedStory(Resource):
     @jwt_required()
     def delete(self, personalized_story_id):
@@ -38,7 +112,7 @@ class DeletePersonalizedStory(Resource):
             if result.deleted_count == 0:
                 logging.warning(f"Personalized story not found or access denied: {personalized_story_id}")
                 return {'message': 'Personalized story not found or access denied'}, 404
-            logging.debug(f"Personalized story deleted: {personalized_story_id}")
+            logging.debug("Personalized story deleted: %s", personalized_story_id)
             return {'message': 'Personalized story deleted successfully'}, 200
         except Exception as e:
             logging.error(f"Error deleting personalized story: {e}", exc_info=True)
@@ -65,50 +139,103 @@ class PersonalizeStory(Resource):
             return {'message': "Child's name is required"}, 400
         try:
             # Hole die ursprüngliche Geschichte
-            original_story = db.stories.find_one({'_id': ObjectId(story_id)})
+            original_story, version = story_cache.get_with_etag(db.stories, story_id)
             if not original_story:
                 logging.warning(f"Story not found: {story_id}")
                 return {'message': 'Story not found'}, 404
 
-            # personalisieren der Szenen
-            personalized_scenes = []
-            for index, scene in enumerate(original_story.get('scenes', [])):
-                personalized_scene = scene.copy()
-
-                # Bilder der Szene zuordnen
-                if str(index) in user_images:
-                    for img_elem in personalized_scene.get('imageElements', []):
-                        img_elem['imageUrl'] = user_images[str(index)]
-                personalized_scenes.append(personalized_scene)
-
-            # Ersetze Platzhalter in den Textelementen
-            child_name = personal_data.get('child_name', '...')
-            role = personal_data.get('role', '...')
-
-            for scene in personalized_scenes:
-                for text_elem in scene.get('textElements', []):
-                    content = text_elem.get('content', '')
-                    content = content.replace('{child_name}', child_name).replace('{role}', role)
-                    text_elem['content'] = content
-
-            # Erstelle die personalisierte Geschichte
-            personalized_story = {
-                'user_id': current_user_id,
-                'story_id': story_id,
-                'title': original_story.get('title', ''),
-                'description': original_story.get('description', ''),
-                'scenes': personalized_scenes,
-                'personal_data': personal_data,
-                'created_at': datetime.utcnow()
-            }
+            # Nur Verweis auf die Vorlage, personal_data und Bild-Overrides speichern;
+            # die Szenen werden beim Lesen zusammengeführt, aus genau dieser Version
+            snapshot_template(db.stories, story_id, version, original_story)
+            personalized_story = build_overlay(
+                current_user_id,
+                story_id,
+                version,
+                original_story,
+                personal_data,
+                normalize_image_overrides(user_images)
+            )
             result = db.personalized_stories.insert_one(personalized_story)
-            logging.debug(f"Personalized story created with ID: {result.inserted_id}")
+            logging.debug("Personalized story created with ID: %s", result.inserted_id)
             return {'personalized_story_id': str(result.inserted_id)}, 201
 
         except Exception as e:
             logging.error(f"Error creating personalized story: {e}", exc_info=True)
             return {'message': 'Error creating personalized story'}, 500
 
+class PersonalizeStoryBatch(Resource):
+    @jwt_required()
+    def post(self):
+        current_user_id = get_jwt_identity()
+        data = request.get_json(silent=True) or {}
+
+        story_id = data.get('story_id')
+        children = data.get('children')
+        max_batch_size = current_app.config['PERSONALIZE_BATCH_MAX']
+
+        if not is_valid_object_id(story_id):
+            logging.warning(f"Invalid story ID: {story_id}")
+            return {'message': 'Invalid story ID'}, 400
+        if not isinstance(children, list) or not children:
+            logging.warning("Batch personalization without children")
+            return {'message': 'At least one child is required'}, 400
+        if len(children) > max_batch_size:
+            logging.warning(f"Batch too large: {len(children)}")
+            return {'message': f'At most {max_batch_size} children per batch'}, 400
+        try:
+            # Vorlage nur einmal für den ganzen Batch laden
+            original_story, version = story_cache.get_with_etag(db.stories, story_id)
+            if not original_story:
+                logging.warning(f"Story not found: {story_id}")
+                return {'message': 'Story not found'}, 404
+            snapshot_template(db.stories, story_id, version, original_story)
+
+            results = []
+            operations = []
+            operation_items = []
+            for index, child in enumerate(children):
+                personal_data = child.get('personal_data') if isinstance(child, dict) else None
+                if not isinstance(personal_data, dict) or not is_valid_name(personal_data.get('child_name')):
+                    results.append({'index': index, 'status': 'error', 'message': "Child's name is required"})
+                    continue
+                personalized_story = build_overlay(
+                    current_user_id,
+                    story_id,
+                    version,
+                    original_story,
+                    personal_data,
+                    normalize_image_overrides(child.get('user_images', {}))
+                )
+                personalized_story['_id'] = ObjectId()
+                operations.append(InsertOne(personalized_story))
+                operation_items.append(len(results))
+                results.append({'index': index, 'status': 'created', 'personalized_story_id': str(personalized_story['_id'])})
+
+            if operations:
+                try:
+                    db.personalized_stories.bulk_write(operations, ordered=False)
+                except BulkWriteError as e:
+                    # Ungeordnet: alle anderen Einfügungen sind trotzdem durchgelaufen
+                    for write_error in e.details.get('writeErrors', []):
+                        item = results[operation_items[write_error['index']]]
+                        item.pop('personalized_story_id', None)
+                        item.update({'status': 'error', 'message': 'Error creating personalized story'})
+                    logging.error(f"Batch personalization partially failed: {e.details.get('writeErrors')}")
+
+            created = sum(1 for item in results if item['status'] == 'created')
+            logging.debug("Batch personalization for story %s: %d/%d created", story_id, created, len(results))
+            if created == len(results):
+                status = 201
+            elif created:
+                status = 207
+            else:
+                status = 400
+            return {'created': created, 'results': results}, status
+
+        except Exception as e:
+            logging.error(f"Error creating personalized stories: {e}", exc_info=True)
+            return {'message': 'Error creating personalized stories'}, 500
+
 class PersonalizedStoryDetail(Resource):
     @jwt_required()
     def get(self, personalized_story_id):
@@ -117,16 +244,27 @@ class PersonalizedStoryDetail(Resource):
             logging.warning(f"Invalid personalized story ID: {personalized_story_id}")
             return {'message': 'Invalid personalized story ID'}, 400
         try:
-            story_data = db.personalized_stories.find_one({
+            query = {
                 '_id': ObjectId(personalized_story_id),
                 'user_id': current_user_id
-            })
+            }
+            if request.if_none_match:
+                # Erst nur die Versionsfelder lesen; bei Treffer keine Szenen laden
+                version_data = db.personalized_stories.find_one(query, PERSONALIZED_VERSION_PROJECTION)
+                if version_data:
+                    etag = personalized_story_etag(version_data)
+                    if is_not_modified(etag):
+                        return not_modified_response(etag, PERSONALIZED_CACHE_CONTROL)
+            story_data = db.personalized_stories.find_one(query)
             if not story_data:
                 logging.warning(f"Personalized story not found or access denied: {personalized_story_id}")
                 return {'message': 'Personalized story not found'}, 404
-            personalized_story = PersonalizedStory(story_data)
-            logging.debug(f"Personalized story retrieved: {personalized_story.to_dict()}")
-            return personalized_story.to_dict(), 200
+            personalized_story = PersonalizedStory(materialize(db.stories, story_data))
+            logging.debug("Personalized story retrieved: %s (%d scenes)", personalized_story_id, len(personalized_story.scenes), extra=HOT_PATH_SAMPLE)
+            headers = etag_headers(personalized_story_etag(story_data), PERSONALIZED_CACHE_CONTROL)
+            return personalized_story, 200, headers
+        except TemplateNotFound:
+            return {'message': 'Story not found'}, 404
         except Exception as e:
             logging.error(f"Error retrieving personalized story: {e}", exc_info=True)
             return {'message': 'Error retrieving personalized story'}, 500
@@ -145,7 +283,7 @@ class PersonalizedStoryDetail(Resource):
             if result.deleted_count == 0:
                 logging.warning(f"Personalized story not found or access denied: {personalized_story_id}")
                 return {'message': 'Personalized story not found or access denied'}, 404
-            logging.debug(f"Personalized story deleted: {personalized_story_id}")
+            logging.debug("Personalized story deleted: %s", personalized_story_id)
             return {'message': 'Personalized story deleted successfully'}, 200
         except Exception as e:
             logging.error(f"Error deleting personalized story: {e}", exc_info=True)
@@ -0,0 +1,24 @@
+# resources/slow_queries.py
+
+from flask import request, current_app
+from flask_restful import Resource
+from utils.operators import operator_required
+from utils.slow_queries import slow_query_monitor
+
+class SlowQueries(Resource):
+    @operator_required
+    def get(self):
+        # Nur mit SLOW_QUERY_DEBUG_ENDPOINT=1; ältere Einträge stehen im rotierenden Log
+        if not current_app.config['SLOW_QUERY_DEBUG_ENDPOINT']:
+            return {'message': 'Not found'}, 404
+        try:
+            limit = int(request.args.get('limit', 0)) or None
+        except ValueError:
+            return {'message': 'Invalid limit'}, 400
+        entries = slow_query_monitor.entries(request.args.get('collection'), limit)
+        return {
+            'entries': entries,
+            'count': len(entries),
+            'dropped': slow_query_monitor.dropped,
+            'threshold_ms': slow_query_monitor.threshold_micros / 1000,
+        }, 200
@@ -5,27 +5,70 @@ from flask import request
 from utils.database import db
 from models.story import Story
 import logging
-from bson.objectid import ObjectId
 from flask import abort
 from utils.validations import is_valid_object_id
+from utils.story_cache import story_cache
+from utils.logging_config import HOT_PATH_SAMPLE
+from utils.etag import is_not_modified, not_modified_response, etag_headers
+from utils.serialization import json_body, JSON_MIMETYPE
+from utils.compression import IDENTITY, negotiate_encoding, encode_body, encoded_response
+from utils.pagination import InvalidPageRequest, parse_limit, parse_object_id_cursor, fetch_page
+
+# Projektionen für die Katalogansichten
+FULL_PROJECTION = Story.mongo_projection(Story.DEFAULT_FIELDS)
+SUMMARY_PROJECTION = {
+    'title': 1,
+    'description': 1,
+    'coverImage': 1,
+    'roles': 1,
+    'ageGroup': 1,
+    # Nur die Anzahl der Szenen übertragen, nicht die Szenen selbst
+    'pageCount': {'$size': {'$ifNull': ['$scenes', []]}},
+}
+
+# Clients dürfen speichern, müssen aber per If-None-Match revalidieren
+STORY_CACHE_CONTROL = 'no-cache'
 
 class StoriesList(Resource):
     def get(self):
         role = request.args.get('role')
         child_age = request.args.get('childAge', type=int)
+        view = request.args.get('view', 'full')
+        if view not in ('full', 'summary'):
+            logging.warning(f"Invalid view requested: {view}")
+            return {'message': 'Invalid view'}, 400
+        # Die Summary-Ansicht ist immer paginiert, die volle Ansicht nur auf Anfrage
+        paginate = view == 'summary' or 'limit' in request.args or 'after' in request.args
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            after = parse_object_id_cursor(request.args.get('after'))
+        except InvalidPageRequest as e:
+            logging.warning(f"Invalid pagination parameters: {e}")
+            return {'message': str(e)}, 400
+
         query = {}
         if role:
             query['roles'] = role
         if child_age is not None:
             query['ageGroup'] = child_age
+        if after is not None:
+            query['_id'] = {'$gt': after}
+        projection = SUMMARY_PROJECTION if view == 'summary' else FULL_PROJECTION
         try:
-            logging.debug(f"Querying books with filters: {query}")
-            # Inkludiere 'scenes' im Abfrageergebnis
-            stories_cursor = db.stories.find(query, {'title': 1, 'description': 1, 'coverImage': 1, 'scenes': 1})
-            stories = [Story(s).to_dict() for s in stories_cursor]
-            logging.debug(f"Number of stories retrieved: {len(stories)}")
-            logging.debug(f"Stories data: {stories}")
-            return stories, 200
+            logging.debug("Querying stories with filters: %s", query, extra=HOT_PATH_SAMPLE)
+            stories_cursor = db.stories.find(query, projection)
+            headers = {}
+            if paginate:
+                # Stabile Sortierung nach _id, damit der Cursor eindeutig ist
+                documents, has_more = fetch_page(stories_cursor.sort('_id', 1), limit)
+                if has_more:
+                    headers['X-Next-Cursor'] = str(documents[-1]['_id'])
+            else:
+                documents = stories_cursor
+            # Dokumente werden erst beim Kodieren gelesen, ohne Modellobjekt oder Kopie pro Geschichte
+            stories = Story.many(documents, Story.SUMMARY_FIELDS if view == 'summary' else None)
+            logging.debug("Number of stories retrieved: %d", len(stories), extra=HOT_PATH_SAMPLE)
+            return stories, 200, headers
         except Exception as e:
             logging.error(f"Error retrieving stories: {e}")
             abort(500, 'Error retrieving stories')
@@ -37,15 +80,20 @@ class StoryDetail(Resource):
             logging.warning(f"Invalid story ID: {story_id}")
             abort(400, 'Invalid story ID')
         try:
-            logging.debug(f"Looking for story with ID: {story_id}")
-            # Inkludiere 'scenes' im Abfrageergebnis
-            story_data = db.books.find_one({'_id': ObjectId(story_id)}, {'title': 1, 'description': 1, 'coverImage': 1, 'scenes': 1})
+            story_data, etag = story_cache.get_with_etag(db.stories, story_id)
             if not story_data:
                 logging.warning(f"Story not found: {story_id}")
-                abort(404, 'Story not found')
+                return {'message': 'Story not found'}, 404
+            if is_not_modified(etag):
+                return not_modified_response(etag, STORY_CACHE_CONTROL)
             story = Story(story_data)
-            logging.debug(f"Story retrieved: {story.to_dict()}")
-            return story.to_dict(), 200
+            logging.debug("Story retrieved: %s (%d scenes)", story_id, len(story.scenes), extra=HOT_PATH_SAMPLE)
+            # Heiße Geschichten werden einmal pro Version und Kodierung serialisiert und komprimiert
+            encoding = negotiate_encoding() or IDENTITY
+            body, applied = story_cache.encoded_body(
+                story_id, etag, encoding, lambda: encode_body(json_body(story), encoding if encoding != IDENTITY else None)
+            )
+            return encoded_response(body, applied, JSON_MIMETYPE, 200, etag_headers(etag, STORY_CACHE_CONTROL))
         except Exception as e:
             logging.error(f"Error retrieving story: {e}")
             abort(500, 'Error retrieving story')
@@ -0,0 +1,21 @@
+# resources/traces.py
+
+from flask import request, current_app
+from flask_restful import Resource
+from utils.operators import operator_required
+from utils.tracing import dump, tracer
+
+class TraceDump(Resource):
+    @operator_required
+    def get(self):
+        # Nur mit TRACING_DEBUG_ENDPOINT=1, Spans enthalten Benutzer-/Story-IDs und Pfade
+        if not current_app.config['TRACING_DEBUG_ENDPOINT']:
+            return {'message': 'Not found'}, 404
+        if tracer.ring_buffer() is None:
+            return {'message': 'Ring buffer exporter is not enabled (TRACING_EXPORTER=ring or both)'}, 404
+        try:
+            limit = int(request.args.get('limit', 0)) or None
+        except ValueError:
+            return {'message': 'Invalid limit'}, 400
+        spans = dump(request.args.get('trace_id'), limit)
+        return {'spans': spans, 'count': len(spans)}, 200
@@ -5,9 +5,13 @@ from flask import request, current_app, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
 import os
 from werkzeug.utils import secure_filename
-from utils.validations import allowed_file
+from utils.validations import allowed_file, is_valid_object_id
+from utils.upload_store import store_stream, normalize_extension
+from utils.derivatives import print_variant_sizes, variant_paths, derivatives_ready, submit_derivatives
+from utils.story_cache import story_cache
 from datetime import datetime
 from utils.database import db
+from pymongo.errors import DuplicateKeyError
 import logging
 
 class UploadImage(Resource):
@@ -23,22 +27,84 @@ class UploadImage(Resource):
             return {'message': 'No selected file'}, 400
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            # Füge Benutzer-ID und Timestamp zum Dateinamen hinzu
-            unique_filename = f"{current_user_id}_{int(datetime.utcnow().timestamp())}_{filename}"
             upload_folder = current_app.config['UPLOAD_FOLDER']
-            os.makedirs(upload_folder, exist_ok=True)
-            file_path = os.path.join(upload_folder, unique_filename)
-            file.save(file_path)
-            logging.debug(f"File uploaded: {file_path}")
-            # Speichere den Bildpfad in der Datenbank
-            db.user_images.insert_one({
-                'user_id': current_user_id,
-                'file_path': file_path,
-                'uploaded_at': datetime.utcnow()
-            })
+            # Inhalt wird beim Schreiben gehasht; gleiche Bilder liegen nur einmal auf der Platte
+            digest, relative_path, size, created = store_stream(file.stream, upload_folder, normalize_extension(filename))
+            file_path = os.path.join(upload_folder, *relative_path.split('/'))
+            logging.debug("File uploaded: %s (%s)", file_path, 'new' if created else 'deduplicated')
+            # Pro Benutzer nur ein Verweis auf denselben Inhalt
+            now = datetime.utcnow()
+            try:
+                db.user_images.update_one(
+                    {'user_id': current_user_id, 'sha256': digest},
+                    {
+                        '$setOnInsert': {
+                            'file_path': file_path,
+                            'relative_path': relative_path,
+                            'size': size,
+                            'original_filename': filename,
+                            'uploaded_at': now
+                        },
+                        '$set': {'last_uploaded_at': now}
+                    },
+                    upsert=True
+                )
+            except DuplicateKeyError:
+                # Gleichzeitiger Upload desselben Bildes, der Verweis existiert bereits
+                pass
+            # Vorschaubild, Bildschirm- und Druckversionen im Hintergrund erzeugen
+            print_sizes = print_variant_sizes(scene_image_elements(request.form))
+            paths = variant_paths(relative_path, print_sizes)
+            if derivatives_ready(upload_folder, paths):
+                variants_status = 'ready'
+            else:
+                variants_status = 'pending'
+                submit_derivatives(db, upload_folder, digest, relative_path, print_sizes)
             # Erstelle eine URL, die vom Frontend verwendet werden kann
-            file_url = url_for('static', filename=f'uploads/{unique_filename}', _external=True)
-            return {'file_path': file_url}, 201
+            file_url = url_for('static', filename=f'uploads/{relative_path}', _external=True)
+            return {
+                'file_path': file_url,
+                'sha256': digest,
+                'variants': variant_urls(paths),
+                'variants_status': variants_status
+            }, 201
         else:
             logging.warning("File type not allowed")
             return {'message': 'File type not allowed'}, 400
+
+
+class UploadedImage(Resource):
+    @jwt_required()
+    def get(self, sha256):
+        current_user_id = get_jwt_identity()
+        try:
+            image = db.user_images.find_one({'user_id': current_user_id, 'sha256': sha256})
+            if not image:
+                logging.warning(f"Uploaded image not found: {sha256}")
+                return {'message': 'Image not found'}, 404
+            return {
+                'file_path': url_for('static', filename=f"uploads/{image['relative_path']}", _external=True),
+                'sha256': sha256,
+                'variants': variant_urls(image.get('variants', {})),
+                'variants_status': image.get('variants_status', 'pending')
+            }, 200
+        except Exception as e:
+            logging.error(f"Error retrieving uploaded image: {e}", exc_info=True)
+            return {'message': 'Error retrieving uploaded image'}, 500
+
+
+def scene_image_elements(form):
+    # Optional: story_id und scene_index bestimmen die Druckgrößen der Bildelemente
+    story_id = form.get('story_id')
+    scene_index = form.get('scene_index', type=int)
+    if not is_valid_object_id(story_id) or scene_index is None:
+        return []
+    story = story_cache.get(db.stories, story_id)
+    scenes = story.get('scenes', []) if story else []
+    if not 0 <= scene_index < len(scenes):
+        return []
+    return scenes[scene_index].get('imageElements', [])
+
+
+def variant_urls(paths):
+    return {name: url_for('static', filename=f'uploads/{path}', _external=True) for name, path in paths.items()}
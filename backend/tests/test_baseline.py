@@ -0,0 +1,103 @@
+# tests/test_baseline.py
+
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import unittest
+from benchmarks import baseline
+from benchmarks.harness import Case, measure, results_document
+
+STORYMAKER_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'StoryMaker')
+
+def load_storymaker_benchmark():
+    # StoryMaker/benchmark.py schreibt das Format von Hand; None, wenn PyQt5 fehlt
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    sys.path.insert(0, STORYMAKER_FOLDER)
+    try:
+        spec = importlib.util.spec_from_file_location('storymaker_benchmark', os.path.join(STORYMAKER_FOLDER, 'benchmark.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    except ImportError:
+        return None
+    finally:
+        sys.path.remove(STORYMAKER_FOLDER)
+
+def result(name, samples):
+    return {'name': name, 'median_ms': sorted(samples)[len(samples) // 2], 'samples_ms': samples}
+
+class TestBaseline(unittest.TestCase):
+    def test_mann_whitney_detects_shift(self):
+        fast = [10.0 + i * 0.1 for i in range(20)]
+        slow = [15.0 + i * 0.1 for i in range(20)]
+        self.assertLess(baseline.mann_whitney_greater(slow, fast), 0.001)
+        self.assertGreater(baseline.mann_whitney_greater(fast, slow), 0.99)
+        self.assertEqual(baseline.mann_whitney_greater([5.0] * 5, [5.0] * 5), 1.0)
+
+    def test_compare_flags_significant_regressions_only(self):
+        base_samples = [10.0 + (i % 5) * 0.2 for i in range(20)]
+        base = results_document('backend', [
+            result('personalize.merge_scenes[100]', base_samples),
+            result('pdf.render_template[100]', base_samples),
+            result('model.story_json[100]', base_samples),
+            result('upload.store_new[2MB]', base_samples),
+        ])
+        current = results_document('backend', [
+            result('personalize.merge_scenes[100]', [value * 2 for value in base_samples]),
+            # 20 % langsamer, aber unter der eigenen Schwelle für pdf.*
+            result('pdf.render_template[100]', [value * 1.2 for value in base_samples]),
+            result('model.story_json[100]', [value * 0.5 for value in base_samples]),
+            result('new.case', base_samples),
+        ])
+        comparison = baseline.compare(base, current, threshold=0.1, overrides=[('pdf.*', 0.25)])
+        statuses = {row['name']: row['status'] for row in comparison['rows']}
+        self.assertEqual(statuses['personalize.merge_scenes[100]'], baseline.REGRESSION)
+        self.assertEqual(statuses['pdf.render_template[100]'], baseline.UNCHANGED)
+        self.assertEqual(statuses['model.story_json[100]'], baseline.IMPROVEMENT)
+        self.assertEqual(comparison['missing'], ['upload.store_new[2MB]'])
+        self.assertEqual(comparison['new'], ['new.case'])
+
+    def test_noisy_difference_is_not_a_regression(self):
+        base = results_document('backend', [result('a', [10.0, 30.0, 10.0, 30.0, 10.0, 30.0])])
+        current = results_document('backend', [result('a', [30.0, 10.0, 30.0, 16.0, 30.0, 10.0])])
+        row = baseline.compare(base, current)['rows'][0]
+        self.assertGreater(row['change'], 0.1)
+        self.assertEqual(row['status'], baseline.UNCHANGED)
+
+    def test_record_and_compare_cli(self):
+        with tempfile.TemporaryDirectory() as folder:
+            results_path = os.path.join(folder, 'run.json')
+            with open(results_path, 'w', encoding='utf-8') as f:
+                json.dump(results_document('storymaker', [result('storymaker.render_pages[10]', [7.0, 7.1, 7.2])]), f)
+            baseline.record(results_path, folder)
+            self.assertTrue(os.path.exists(os.path.join(folder, 'storymaker.json')))
+            code = baseline.main(['compare', results_path, '--baseline', os.path.join(folder, 'storymaker.json')])
+            self.assertEqual(code, 0)
+            with open(results_path, 'w', encoding='utf-8') as f:
+                json.dump({'results': []}, f)
+            self.assertEqual(baseline.main(['compare', results_path]), 2)
+
+    def test_storymaker_documents_match_schema(self):
+        storymaker = load_storymaker_benchmark()
+        if storymaker is None:
+            self.skipTest('PyQt5 nicht installiert')
+        self.assertEqual(storymaker.SCHEMA_VERSION, baseline.SCHEMA_VERSION)
+        storymaker_result = storymaker.measure('storymaker.noop', lambda: None, 3)
+        backend_result = measure(Case('backend.noop', lambda: None), 3)
+        self.assertEqual(set(storymaker_result), set(backend_result))
+        document = storymaker.results_document([storymaker_result])
+        reference = results_document('storymaker', [backend_result])
+        self.assertEqual(set(document), set(reference))
+        self.assertEqual(set(document['environment']), set(reference['environment']))
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'storymaker.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(document, f)
+            loaded = baseline.load_document(path)
+        self.assertEqual(loaded['suite'], 'storymaker')
+        self.assertEqual(baseline.compare(loaded, loaded)['rows'][0]['status'], baseline.UNCHANGED)
+
+if __name__ == '__main__':
+    unittest.main()
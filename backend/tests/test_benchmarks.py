@@ -0,0 +1,64 @@
+# tests/test_benchmarks.py
+
+import io
+import unittest
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+from benchmarks import bench_backend
+from benchmarks.books import make_story
+from types import SimpleNamespace
+from unittest.mock import patch
+from benchmarks.loadtest import Recorder, StepError, summarize, virtual_user
+
+class TestBenchmarks(unittest.TestCase):
+    def test_synthetic_book_shape(self):
+        story = make_story(10)
+        self.assertEqual(len(story['scenes']), 10)
+        self.assertIn('{child_name}', story['scenes'][0]['textElements'][0]['content'])
+
+    @unittest.skipIf(mongomock is None, 'mongomock nicht installiert')
+    def test_suite_runs_offline(self):
+        out = io.StringIO()
+        results = bench_backend.run(sizes=[10], repeat=1, out=out)
+        names = {result['name'] for result in results}
+        for expected in ('personalize.create[10]', 'personalize.merge_scenes[10]', 'model.story_to_dict[10]',
+                         'pdf.render_template[10]', 'upload.store_new[2MB]'):
+            self.assertIn(expected, names)
+        self.assertTrue(all(result['min_ms'] >= 0 for result in results))
+
+    def test_loadtest_summary(self):
+        recorder = Recorder()
+        for index in range(100):
+            recorder.record('browse_stories', (index + 1) / 1000, True, 200)
+        recorder.record('generate_pdf', 0.5, False, 500)
+        recorder.flow_finished(True)
+        recorder.flow_finished(False)
+        report = summarize(recorder, elapsed=10.0)
+        browse = report['steps']['browse_stories']
+        self.assertEqual(browse['count'], 100)
+        self.assertAlmostEqual(browse['p50_ms'], 50.0)
+        self.assertAlmostEqual(browse['p95_ms'], 95.0)
+        self.assertAlmostEqual(browse['p99_ms'], 99.0)
+        self.assertEqual(report['steps']['generate_pdf']['error_rate'], 1.0)
+        self.assertEqual(report['steps']['generate_pdf']['statuses'], {'500': 1})
+        self.assertEqual(report['flow_error_rate'], 0.5)
+        self.assertAlmostEqual(report['requests_per_s'], 10.1)
+        self.assertNotIn('login', report['steps'])
+
+    def test_virtual_user_counts_unexpected_errors(self):
+        recorder = Recorder()
+        options = SimpleNamespace(iterations=3)
+        with patch('benchmarks.loadtest.VirtualParent') as parent, patch('sys.stderr', io.StringIO()):
+            parent.return_value.run_flow.side_effect = [StepError('login'), TypeError('payload'), None]
+            virtual_user('http://localhost', recorder, options, stop_at=float('inf'), start_delay=0)
+        report = summarize(recorder, elapsed=1.0)
+        # Der Benutzer läuft nach dem TypeError weiter
+        self.assertEqual((report['flows_completed'], report['flows_failed']), (1, 2))
+        self.assertEqual(report['unexpected_errors'], {'TypeError': 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# tests/test_compression.py
+
+import gzip
+import unittest
+from unittest.mock import patch
+from bson.objectid import ObjectId
+from app import app
+from utils import compression
+from utils.story_cache import story_cache
+
+def large_story(story_id):
+    scenes = [{'pageNumber': i, 'textElements': [{'content': 'Es war einmal {child_name}.'}]} for i in range(200)]
+    return {'_id': ObjectId(story_id), 'title': 'Großes Buch', 'scenes': scenes}
+
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        story_cache.invalidate()
+
+    @patch('resources.stories.db')
+    def test_list_is_gzipped_when_accepted(self, mock_db):
+        mock_db.stories.find.return_value = [large_story(str(ObjectId()))]
+        response = self.app.get('/api/stories', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertIn('Großes Buch', gzip.decompress(response.data).decode('utf-8'))
+
+    @patch('resources.stories.db')
+    def test_brotli_preferred(self, mock_db):
+        if compression.brotli is None:
+            self.skipTest('brotli nicht installiert')
+        mock_db.stories.find.return_value = [large_story(str(ObjectId()))]
+        response = self.app.get('/api/stories', headers={'Accept-Encoding': 'gzip, br'})
+        self.assertEqual(response.headers['Content-Encoding'], 'br')
+        self.assertIn('Großes Buch', compression.brotli.decompress(response.data).decode('utf-8'))
+
+    @patch('resources.stories.db')
+    def test_small_or_unaccepted_responses_stay_uncompressed(self, mock_db):
+        mock_db.stories.find.return_value = [{'_id': ObjectId(), 'title': 'Klein'}]
+        response = self.app.get('/api/stories', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        mock_db.stories.find.return_value = [large_story(str(ObjectId()))]
+        response = self.app.get('/api/stories')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.get_json()[0]['title'], 'Großes Buch')
+
+    @patch('resources.stories.db')
+    def test_story_detail_compressed_once_per_version(self, mock_db):
+        story_id = str(ObjectId())
+        mock_db.stories.find_one.return_value = large_story(story_id)
+        with patch('utils.compression.compress', wraps=compression.compress) as mock_compress:
+            first = self.app.get(f'/api/stories/{story_id}', headers={'Accept-Encoding': 'gzip'})
+            second = self.app.get(f'/api/stories/{story_id}', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(mock_compress.call_count, 1)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(second.headers['Content-Encoding'], 'gzip')
+        self.assertTrue(second.headers['ETag'].startswith('W/'))
+        self.assertEqual(gzip.decompress(second.data).count(b'pageNumber'), 200)
+        # Der schwache ETag der komprimierten Antwort revalidiert weiterhin
+        response = self.app.get(f'/api/stories/{story_id}', headers={'If-None-Match': second.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+        # Unkomprimierte Variante wird getrennt gecacht
+        plain = self.app.get(f'/api/stories/{story_id}')
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertEqual(len(plain.get_json()['scenes']), 200)
+        self.assertGreater(story_cache.stats()['bytes'], len(plain.data))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+# tests/test_database.py
+
+import os
+import unittest
+from unittest.mock import patch
+from app import app
+from utils import database
+
+class TestDatabase(unittest.TestCase):
+    def test_client_options_from_config(self):
+        options = database.client_options()
+        self.assertEqual(options['maxPoolSize'], app.config['MONGO_MAX_POOL_SIZE'])
+        self.assertEqual(options['waitQueueTimeoutMS'], app.config['MONGO_WAIT_QUEUE_TIMEOUT_MS'])
+        self.assertEqual(options['serverSelectionTimeoutMS'], app.config['MONGO_SERVER_SELECTION_TIMEOUT_MS'])
+
+    def test_client_is_per_process(self):
+        client = database.get_client()
+        self.assertIs(database.get_client(), client)
+        with patch('utils.database.os.getpid', return_value=os.getpid() + 1):
+            forked_client = database.get_client()
+        self.assertIsNot(forked_client, client)
+        forked_client.close()
+
+    def test_lazy_database_proxy(self):
+        self.assertEqual(database.db.stories.name, 'stories')
+        self.assertEqual(database.db['users'].full_name, f"{app.config['DATABASE_NAME']}.users")
+
+    def test_pool_listener_counts(self):
+        listener = database.PoolStatsListener()
+        listener.connection_created(None)
+        listener.connection_created(None)
+        listener.connection_checked_out(None)
+        listener.connection_closed(None)
+        self.assertEqual(listener.snapshot()['open'], 1)
+        self.assertEqual(listener.snapshot()['checked_out'], 1)
+        self.assertEqual(listener.snapshot()['idle'], 0)
+
+class TestHealth(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+
+    def test_liveness(self):
+        self.assertEqual(self.app.get('/api/health/live').status_code, 200)
+
+    @patch('resources.health.ping', side_effect=Exception('mongo-1:27017: timed out'))
+    def test_readiness_unavailable(self, mock_ping):
+        response = self.app.get('/api/health/ready')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.get_json()['mongo'], 'unreachable')
+        self.assertIn('max_pool_size', response.get_json()['pool'])
+
+    @patch('resources.health.ping')
+    def test_readiness_ok(self, mock_ping):
+        response = self.app.get('/api/health/ready')
+        self.assertEqual(response.status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
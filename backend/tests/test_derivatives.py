@@ -0,0 +1,75 @@
+# tests/test_derivatives.py
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from PIL import Image
+from utils.derivatives import print_variant_sizes, variant_paths, generate_derivatives, submit_derivatives, derivatives_ready
+
+class TestDerivatives(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.upload_folder = self.tmp.name
+        self.relative_path = 'ab/cd/abcd1234.jpg'
+        source = os.path.join(self.upload_folder, 'ab', 'cd', 'abcd1234.jpg')
+        os.makedirs(os.path.dirname(source))
+        image = Image.new('RGB', (3000, 2000), color='red')
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: 90° gedreht
+        exif[0x010F] = 'Kamera'
+        image.save(source, 'JPEG', exif=exif)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _open(self, path):
+        return Image.open(os.path.join(self.upload_folder, *path.split('/')))
+
+    def test_print_variant_sizes(self):
+        sizes = print_variant_sizes([{'width': 192, 'height': 96}, {'width': 'x'}], dpi=300)
+        self.assertEqual(sizes, {'print_600x300': (600, 300)})
+
+    def test_generate_derivatives(self):
+        print_sizes = {'print_600x300': (600, 300)}
+        paths = generate_derivatives(self.upload_folder, self.relative_path, print_sizes)
+        self.assertEqual(set(paths), {'thumbnail', 'screen', 'print_600x300'})
+        with self._open(paths['thumbnail']) as thumbnail:
+            # EXIF-Drehung angewendet: Hochformat
+            self.assertEqual(thumbnail.size, (171, 256))
+            self.assertEqual(len(thumbnail.getexif()), 0)
+        with self._open(paths['screen']) as screen:
+            self.assertEqual(max(screen.size), 1600)
+        with self._open(paths['print_600x300']) as printed:
+            self.assertEqual(printed.size, (600, 300))
+        self.assertTrue(derivatives_ready(self.upload_folder, paths))
+
+    def test_no_upscaling_for_print(self):
+        paths = generate_derivatives(self.upload_folder, self.relative_path, {'print_6000x4000': (6000, 4000)})
+        with self._open(paths['print_6000x4000']) as printed:
+            self.assertLessEqual(printed.width, 2000)
+            self.assertAlmostEqual(printed.width / printed.height, 1.5, places=2)
+
+    def test_transparent_png_on_white(self):
+        relative_path = 'ef/01/ef012345.png'
+        source = os.path.join(self.upload_folder, 'ef', '01', 'ef012345.png')
+        os.makedirs(os.path.dirname(source))
+        image = Image.new('RGBA', (400, 400), (0, 0, 0, 0))
+        image.paste((0, 0, 255, 255), (100, 100, 300, 300))
+        image.save(source, 'PNG')
+        paths = generate_derivatives(self.upload_folder, relative_path, {})
+        with self._open(paths['screen']) as screen:
+            self.assertEqual(screen.mode, 'RGB')
+            self.assertEqual(screen.getpixel((0, 0)), (255, 255, 255))
+            r, g, b = screen.getpixel((200, 200))
+            self.assertTrue(b > 200 and r < 50 and g < 50)
+
+    def test_submit_records_variants(self):
+        db = MagicMock()
+        submit_derivatives(db, self.upload_folder, 'abcd1234', self.relative_path, {}).result()
+        update = db.user_images.update_many.call_args[0][1]['$set']
+        self.assertEqual(update['variants_status'], 'ready')
+        self.assertEqual(update['variants.thumbnail'], variant_paths(self.relative_path, {})['thumbnail'])
+
+if __name__ == '__main__':
+    unittest.main()
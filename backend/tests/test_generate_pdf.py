@@ -4,6 +4,9 @@ import unittest
 from app import app
 from unittest.mock import patch
 from bson.objectid import ObjectId
+from resources.generate_pdf import pdf_cache_key
+import os
+import tempfile
 
 class TestGeneratePDF(unittest.TestCase):
     def setUp(self):
@@ -12,14 +15,13 @@ class TestGeneratePDF(unittest.TestCase):
     @patch('resources.generate_pdf.db')
     @patch('resources.generate_pdf.HTML')
     @patch('resources.generate_pdf.os')
-    @patch('resources.generate_pdf.Environment')
-    def test_generate_pdf_success(self, mock_env, mock_os, mock_html, mock_db):
+    @patch('resources.generate_pdf.get_template')
+    def test_generate_pdf_success(self, mock_get_template, mock_os, mock_html, mock_db):
         personalized_story_id = str(ObjectId())
         mock_db.personalized_stories.find_one.return_value = {
             '_id': ObjectId(personalized_story_id),
             'story_id': str(ObjectId()),
             'personal_data': {'child_name': 'Max'},
-            'user_images': [],
             'created_at': None
         }
         mock_db.stories.find_one.return_value = {
@@ -27,7 +29,7 @@ class TestGeneratePDF(unittest.TestCase):
             'title': 'Geschichte 1',
             'scenes': []
         }
-        mock_template = mock_env.return_value.get_template.return_value
+        mock_template = mock_get_template.return_value
         mock_template.render.return_value = '<html></html>'
         mock_html.return_value.write_pdf.return_value = True
         mock_os.path.join.return_value = '/path/to/pdf.pdf'
@@ -36,26 +38,140 @@ class TestGeneratePDF(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn('pdf_path', response.get_json())
     
+    @patch('resources.generate_pdf.db')
+    @patch('resources.generate_pdf.HTML')
+    @patch('resources.generate_pdf.pdf_cache_path')
+    def test_generate_pdf_uses_image_overrides(self, mock_cache_path, mock_html, mock_db):
+        personalized_story_id = str(ObjectId())
+        story_id = str(ObjectId())
+        mock_db.personalized_stories.find_one.return_value = {
+            '_id': ObjectId(personalized_story_id),
+            'format': 'overlay',
+            'story_id': story_id,
+            'title': 'Geschichte 1',
+            'personal_data': {'child_name': 'Max'},
+            'image_overrides': {'1': '/static/uploads/ab/cd/max.jpg'}
+        }
+        mock_db.stories.find_one.return_value = {
+            '_id': ObjectId(story_id),
+            'title': 'Geschichte 1',
+            'scenes': [
+                {'textElements': [{'content': 'Hallo {child_name}', 'position': {'x': 0, 'y': 0}}],
+                 'imageElements': [{'imageUrl': 'vorlage0.jpg', 'position': {'x': 0, 'y': 0}}]},
+                {'textElements': [],
+                 'imageElements': [{'imageUrl': 'vorlage1.jpg', 'position': {'x': 0, 'y': 0}}]}
+            ]
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            mock_cache_path.return_value = os.path.join(tmp, 'book.pdf')
+            mock_html.return_value.render.return_value.write_pdf.side_effect = lambda path: open(path, 'wb').close()
+            response = self.app.get(f'/api/generate-pdf/{personalized_story_id}')
+        self.assertEqual(response.status_code, 200)
+        html = mock_html.call_args.kwargs['string']
+        self.assertIn('file:///static/uploads/ab/cd/max.jpg', html)
+        self.assertIn('vorlage0.jpg', html)
+        self.assertNotIn('vorlage1.jpg', html)
+        self.assertIn('Hallo Max', html)
+
     def test_generate_pdf_invalid_id(self):
         response = self.app.get('/api/generate-pdf/invalid_id')
         self.assertEqual(response.status_code, 400)
         self.assertIn('Invalid personalized story ID', str(response.data))
     
-    @patch('resources.generate_pdf.os')
-    def test_download_pdf_success(self, mock_os):
+    def _download_setup(self, mock_db):
         personalized_story_id = str(ObjectId())
-        mock_os.path.exists.return_value = True
-        response = self.app.get(f'/api/download-pdf/{personalized_story_id}')
+        mock_db.personalized_stories.find_one.return_value = {
+            '_id': ObjectId(personalized_story_id),
+            'story_id': str(ObjectId()),
+            'personal_data': {'child_name': 'Max'}
+        }
+        mock_db.stories.find_one.return_value = {'_id': ObjectId(), 'title': 'Geschichte 1', 'scenes': []}
+        return personalized_story_id
+
+    @patch('resources.generate_pdf.db')
+    @patch('resources.generate_pdf.pdf_cache_path')
+    def test_download_pdf_success(self, mock_cache_path, mock_db):
+        personalized_story_id = self._download_setup(mock_db)
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_path = os.path.join(tmp, 'book.pdf')
+            with open(pdf_path, 'wb') as f:
+                f.write(b'%PDF-1.7 ' + b'x' * 1000)
+            mock_cache_path.return_value = pdf_path
+            response = self.app.get(f'/api/download-pdf/{personalized_story_id}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers['Content-Type'], 'application/pdf')
+            self.assertIn('ETag', response.headers)
+            self.assertEqual(response.headers['Accept-Ranges'], 'bytes')
+            response.close()
+
+    @patch('resources.generate_pdf.db')
+    @patch('resources.generate_pdf.pdf_cache_path')
+    def test_download_pdf_range(self, mock_cache_path, mock_db):
+        personalized_story_id = self._download_setup(mock_db)
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_path = os.path.join(tmp, 'book.pdf')
+            with open(pdf_path, 'wb') as f:
+                f.write(b'0123456789')
+            mock_cache_path.return_value = pdf_path
+            url = f'/api/download-pdf/{personalized_story_id}'
+            etag = self.app.get(url).headers['ETag']
+            response = self.app.get(url, headers={'Range': 'bytes=2-5', 'If-Range': etag})
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(response.data, b'2345')
+            response.close()
+            # Veraltetes If-Range -> komplette Datei
+            response = self.app.get(url, headers={'Range': 'bytes=2-5', 'If-Range': '"stale"'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data, b'0123456789')
+            response.close()
+
+    @patch('resources.generate_pdf.db')
+    @patch('resources.generate_pdf.os.path.exists', return_value=True)
+    def test_download_pdf_x_accel_redirect(self, mock_exists, mock_db):
+        personalized_story_id = self._download_setup(mock_db)
+        app.config['PDF_SENDFILE_MODE'] = 'x-accel-redirect'
+        try:
+            response = self.app.get(f'/api/download-pdf/{personalized_story_id}')
+        finally:
+            app.config['PDF_SENDFILE_MODE'] = ''
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.headers['Content-Type'], 'application/pdf')
-    
+        self.assertTrue(response.headers['X-Accel-Redirect'].startswith('/protected-pdfs/'))
+        self.assertTrue(response.headers['X-Accel-Redirect'].endswith('.pdf'))
+        self.assertEqual(response.data, b'')
+
+    @patch('resources.generate_pdf.db')
     @patch('resources.generate_pdf.os')
-    def test_download_pdf_not_found(self, mock_os):
-        personalized_story_id = str(ObjectId())
+    def test_download_pdf_not_found(self, mock_os, mock_db):
+        personalized_story_id = self._download_setup(mock_db)
         mock_os.path.exists.return_value = False
         response = self.app.get(f'/api/download-pdf/{personalized_story_id}')
         self.assertEqual(response.status_code, 404)
         self.assertIn('PDF not found', str(response.data))
 
+    @patch('resources.generate_pdf.db')
+    def test_download_pdf_invalid_story_id(self, mock_db):
+        personalized_story_id = self._download_setup(mock_db)
+        mock_db.personalized_stories.find_one.return_value['story_id'] = 'kaputt'
+        response = self.app.get(f'/api/download-pdf/{personalized_story_id}')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.get_json(), {'message': 'Story not found'})
+
+    @patch('resources.generate_pdf.db')
+    def test_download_pdf_template_deleted(self, mock_db):
+        personalized_story_id = self._download_setup(mock_db)
+        mock_db.personalized_stories.find_one.return_value.update({'format': 'overlay', 'story_version': 'v1'})
+        mock_db.stories.find_one.return_value = None
+        mock_db.stories.database.__getitem__.return_value.find_one.return_value = None
+        response = self.app.get(f'/api/download-pdf/{personalized_story_id}')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.get_json(), {'message': 'Story not found'})
+
+    def test_pdf_cache_key_depends_on_inputs(self):
+        base = {'personal_data': {'child_name': 'Max'}, 'image_overrides': {'0': 'a.jpg'}}
+        key = pdf_cache_key(base, 'v1')
+        self.assertEqual(key, pdf_cache_key(dict(base), 'v1'))
+        self.assertNotEqual(key, pdf_cache_key(base, 'v2'))
+        self.assertNotEqual(key, pdf_cache_key(dict(base, personal_data={'child_name': 'Lena'}), 'v1'))
+
 if __name__ == '__main__':
     unittest.main()
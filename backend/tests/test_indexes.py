@@ -0,0 +1,55 @@
+# tests/test_indexes.py
+
+import io
+import unittest
+from unittest.mock import MagicMock
+from utils.indexes import INDEXES, ensure_indexes, check_indexes
+
+class TestIndexes(unittest.TestCase):
+    def _db(self):
+        collections = {name: MagicMock(name=name) for name in INDEXES}
+        db = MagicMock()
+        db.__getitem__.side_effect = collections.__getitem__
+        return db, collections
+
+    def test_ensure_indexes_creates_registry(self):
+        db, collections = self._db()
+        ensure_indexes(db)
+        for collection_name, models in INDEXES.items():
+            collections[collection_name].create_indexes.assert_called_once_with(models)
+        users_index = INDEXES['users'][0].document
+        self.assertTrue(users_index['unique'])
+        # Alte Uploads ohne sha256 dürfen den eindeutigen Index nicht verhindern
+        images_index = INDEXES['user_images'][0].document
+        self.assertEqual(images_index['partialFilterExpression'], {'sha256': {'$exists': True}})
+
+    def test_check_reports_missing_and_collscan(self):
+        db, collections = self._db()
+        for collection_name in INDEXES:
+            collections[collection_name].list_indexes.return_value = [{'name': '_id_'}]
+            collections[collection_name].aggregate.return_value = []
+        db.command.return_value = {
+            'queryPlanner': {'winningPlan': {'stage': 'COLLSCAN'}},
+            'executionStats': {'totalDocsExamined': 1000}
+        }
+        out = io.StringIO()
+        problems = check_indexes(db, out=out)
+        self.assertGreater(problems, 0)
+        self.assertIn('MISSING  users.username_unique', out.getvalue())
+        self.assertIn('COLLSCAN auth.login', out.getvalue())
+
+    def test_check_ok_with_index_scan(self):
+        db, collections = self._db()
+        for collection_name, models in INDEXES.items():
+            collections[collection_name].list_indexes.return_value = [{'name': m.document['name']} for m in models]
+            collections[collection_name].aggregate.return_value = []
+        db.command.return_value = {
+            'queryPlanner': {'winningPlan': {'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN'}}},
+            'executionStats': {'totalDocsExamined': 1}
+        }
+        out = io.StringIO()
+        self.assertEqual(check_indexes(db, out=out), 0)
+        self.assertIn('FETCH>IXSCAN', out.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
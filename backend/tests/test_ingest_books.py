@@ -0,0 +1,116 @@
+# tests/test_ingest_books.py
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+from utils.ingest_books import ingest, load_book, resolve_asset
+
+def _book(title, cover, image):
+    return {
+        'title': title,
+        'coverImage': cover,
+        'scenes': [{
+            'pageNumber': 1,
+            'background': None,
+            'textElements': [{'content': 'Es war einmal [Name]', 'position': {'x': 10, 'y': 10}}],
+            'imageElements': [{'imageUrl': image, 'position': {'x': 0, 'y': 0}, 'userProvided': False}],
+        }],
+    }
+
+@unittest.skipIf(mongomock is None, 'mongomock nicht installiert')
+class TestIngestBooks(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.uploads = tempfile.mkdtemp()
+        self.db = mongomock.MongoClient().db
+        self.out = io.StringIO()
+        for name in ('book1', 'book2'):
+            os.makedirs(os.path.join(self.root, name))
+            # Gleiches Titelbild in beiden Büchern -> nur einmal im Upload-Speicher
+            with open(os.path.join(self.root, name, 'cover.jpg'), 'wb') as f:
+                f.write(b'gleiches cover')
+            with open(os.path.join(self.root, name, 'bild.png'), 'wb') as f:
+                f.write(name.encode())
+            self._write(name, _book(name, f'C:\\Users\\autor\\books\\{name}\\cover.jpg', f'C:/git/books/{name}/bild.png'))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+        shutil.rmtree(self.uploads)
+
+    def _write(self, name, data):
+        with open(os.path.join(self.root, name, f'{name}.json'), 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def _ingest(self, **kwargs):
+        return ingest(self.db, self.root, self.uploads, workers=2, out=self.out, **kwargs)
+
+    def test_resolve_windows_path_by_file_name(self):
+        folder = os.path.join(self.root, 'book1')
+        self.assertEqual(resolve_asset('C:\\x\\y\\cover.jpg', folder), os.path.join(folder, 'cover.jpg'))
+        self.assertIsNone(resolve_asset('C:\\x\\y\\fehlt.jpg', folder))
+
+    def test_ingest_rewrites_paths_and_deduplicates(self):
+        result = self._ingest()
+        self.assertEqual(result['upserted'], 2)
+        stories = {story['title']: story for story in self.db.stories.find()}
+        book1, book2 = stories['book1'], stories['book2']
+        self.assertTrue(book1['coverImage'].startswith('/static/uploads/'))
+        self.assertEqual(book1['coverImage'], book2['coverImage'])
+        self.assertNotEqual(book1['scenes'][0]['imageElements'][0]['imageUrl'], book2['scenes'][0]['imageElements'][0]['imageUrl'])
+        self.assertEqual(book1['ingest']['source'], 'book1/book1.json')
+        self.assertEqual(book1['version'], 1)
+        relative_path = book1['coverImage'][len('/static/uploads/'):]
+        self.assertTrue(os.path.isfile(os.path.join(self.uploads, *relative_path.split('/'))))
+        self.assertIn('3 stored, 1 already present', self.out.getvalue())
+
+    def test_rerun_skips_unchanged_and_updates_changed(self):
+        self._ingest()
+        story_id = self.db.stories.find_one({'title': 'book1'})['_id']
+        self._write('book1', _book('book1 neu', 'cover.jpg', 'bild.png'))
+        result = self._ingest()
+        self.assertEqual(result['skipped'], 1)
+        self.assertEqual(result['modified'], 1)
+        story = self.db.stories.find_one({'ingest.source': 'book1/book1.json'})
+        # Gleiche _id, damit personalisierte Geschichten ihre Vorlage behalten
+        self.assertEqual(story['_id'], story_id)
+        self.assertEqual(story['title'], 'book1 neu')
+        self.assertEqual(story['version'], 2)
+        self.assertEqual(self.db.stories.count_documents({}), 2)
+
+    def test_invalid_book_blocks_import(self):
+        data = _book('book2', 'cover.jpg', 'bild.png')
+        data['scenes'][0]['pageNumber'] = 'eins'
+        self._write('book2', data)
+        result = self._ingest()
+        self.assertEqual(result['invalid'], 1)
+        self.assertEqual(self.db.stories.count_documents({}), 0)
+        self.assertIn('INVALID book2/book2.json: scene 0: pageNumber must be an integer', self.out.getvalue())
+        self.assertEqual(os.listdir(self.uploads), [])
+
+    def test_missing_asset(self):
+        self._write('book2', _book('book2', 'cover.jpg', 'fehlt.png'))
+        path = os.path.join(self.root, 'book2', 'book2.json')
+        self.assertIn('imageUrl: asset not found: fehlt.png', load_book(path, self.root).errors)
+        self.assertEqual(load_book(path, self.root, missing_assets='drop').errors, [])
+        self._ingest(missing_assets='drop')
+        story = self.db.stories.find_one({'title': 'book2'})
+        self.assertIsNone(story['scenes'][0]['imageElements'][0]['imageUrl'])
+
+    def test_dry_run_writes_nothing(self):
+        result = self._ingest(dry_run=True)
+        self.assertEqual(result['upserted'], 0)
+        self.assertEqual(self.db.stories.count_documents({}), 0)
+        self.assertEqual(os.listdir(self.uploads), [])
+        self.assertIn('WOULD IMPORT book1/book1.json', self.out.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+# tests/test_logging_config.py
+
+import io
+import json
+import logging
+import os
+import queue
+import unittest
+from unittest.mock import patch
+from utils import logging_config
+from utils.logging_config import (
+    DeferredQueueHandler, SamplingFilter, JsonFormatter, HOT_PATH_SAMPLE, resolve_log_level
+)
+
+class Expensive:
+    # Zählt, wie oft der Inhalt formatiert wird
+    calls = 0
+
+    def __str__(self):
+        Expensive.calls += 1
+        return 'teuer'
+
+class TestLoggingConfig(unittest.TestCase):
+    def test_level_per_environment(self):
+        self.assertEqual(resolve_log_level('development'), logging.DEBUG)
+        self.assertEqual(resolve_log_level('production'), logging.WARNING)
+        self.assertEqual(resolve_log_level('production', 'info'), logging.INFO)
+        self.assertEqual(resolve_log_level('unbekannt'), logging.WARNING)
+
+    def test_sampling_only_affects_marked_debug_records(self):
+        sampling = SamplingFilter(0.0)
+        hot = logging.makeLogRecord(dict(HOT_PATH_SAMPLE, levelno=logging.DEBUG))
+        plain = logging.makeLogRecord({'levelno': logging.DEBUG})
+        warning = logging.makeLogRecord(dict(HOT_PATH_SAMPLE, levelno=logging.WARNING))
+        self.assertFalse(sampling.filter(hot))
+        self.assertTrue(sampling.filter(plain))
+        self.assertTrue(sampling.filter(warning))
+        self.assertTrue(SamplingFilter(1.0).filter(hot))
+
+    def test_queue_handler_defers_formatting(self):
+        records = []
+        handler = DeferredQueueHandler(type('Q', (), {'put_nowait': staticmethod(records.append)})())
+        logger = logging.getLogger('test.deferred')
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            Expensive.calls = 0
+            logger.warning('Wert: %s', Expensive())
+        finally:
+            logger.removeHandler(handler)
+        self.assertEqual(Expensive.calls, 0)
+        self.assertEqual(records[0].getMessage(), 'Wert: teuer')
+
+    def test_configure_logging_writes_through_listener(self):
+        stream = io.StringIO()
+        root = logging.getLogger()
+        saved_handlers, saved_level = list(root.handlers), root.level
+        try:
+            with patch('logging.StreamHandler', return_value=logging.StreamHandler(stream)):
+                listener = logging_config.configure_logging('production', log_format='json')
+            logging.debug('nicht sichtbar')
+            logging.warning('Story %s not found', 'abc', extra={'story_id': 'abc'})
+            listener.stop()
+            logging_config._listener = None
+        finally:
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            for handler in saved_handlers:
+                root.addHandler(handler)
+            root.setLevel(saved_level)
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]['message'], 'Story abc not found')
+        self.assertEqual(lines[0]['story_id'], 'abc')
+        self.assertEqual(lines[0]['level'], 'WARNING')
+
+    def test_full_queue_drops_records(self):
+        handler = DeferredQueueHandler(queue.Queue(maxsize=1))
+        handler.emit(logging.makeLogRecord({'msg': 'eins'}))
+        handler.emit(logging.makeLogRecord({'msg': 'zwei'}))
+        self.assertEqual(handler.queue.qsize(), 1)
+        self.assertEqual(handler.dropped, 1)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'needs os.fork')
+    def test_listener_restarted_after_fork(self):
+        stream = io.StringIO()
+        root = logging.getLogger()
+        saved_handlers, saved_level = list(root.handlers), root.level
+        try:
+            with patch('logging.StreamHandler', return_value=logging.StreamHandler(stream)):
+                parent_listener = logging_config.configure_logging('production')
+            pid = os.fork()
+            if pid == 0:
+                # Kindprozess: eigener, laufender Listener, der die Queue leert
+                listener = logging_config._listener
+                ok = listener is not parent_listener and listener._thread.is_alive()
+                logging.warning('aus dem Kindprozess')
+                listener.stop()
+                ok = ok and logging_config._queue_handler.queue.empty()
+                os._exit(0 if ok else 1)
+            _, status = os.waitpid(pid, 0)
+            parent_listener.stop()
+            logging_config._listener = None
+        finally:
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            for handler in saved_handlers:
+                root.addHandler(handler)
+            root.setLevel(saved_level)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+
+    def test_json_formatter_includes_exception(self):
+        try:
+            raise ValueError('kaputt')
+        except ValueError:
+            import sys
+            record = logging.makeLogRecord({'msg': 'Fehler', 'levelname': 'ERROR', 'exc_info': sys.exc_info()})
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertIn('ValueError: kaputt', entry['exc_info'])
+
+if __name__ == '__main__':
+    unittest.main()
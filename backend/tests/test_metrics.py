@@ -0,0 +1,64 @@
+# tests/test_metrics.py
+
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+from bson.objectid import ObjectId
+from app import app
+from utils.metrics import Histogram, registry, command_listener, REQUEST_LATENCY, REQUEST_MONGO_COMMANDS
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        registry.clear()
+
+    def test_histogram_renders_cumulative_buckets(self):
+        histogram = Histogram('demo_seconds', 'Demo', ('endpoint',), buckets=(0.1, 1.0))
+        histogram.observe(0.05, endpoint='a')
+        histogram.observe(0.5, endpoint='a')
+        histogram.observe(5, endpoint='a')
+        lines = histogram.render()
+        self.assertIn('demo_seconds_bucket{endpoint="a",le="0.1"} 1', lines)
+        self.assertIn('demo_seconds_bucket{endpoint="a",le="1"} 2', lines)
+        self.assertIn('demo_seconds_bucket{endpoint="a",le="+Inf"} 3', lines)
+        self.assertIn('demo_seconds_count{endpoint="a"} 3', lines)
+        self.assertIn('demo_seconds_sum{endpoint="a"} 5.55', lines)
+
+    @patch('resources.stories.db')
+    def test_request_records_latency_and_mongo_commands(self, mock_db):
+        def find(*args, **kwargs):
+            # Simuliert die Ereignisse, die pymongo im Thread des Requests auslöst
+            command_listener.succeeded(SimpleNamespace(command_name='find', duration_micros=2500))
+            return [{'_id': ObjectId(), 'title': 'A'}]
+        mock_db.stories.find.side_effect = find
+        response = self.app.get('/api/stories')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('mongo;dur=2.5;desc="1 commands"', response.headers['Server-Timing'])
+        self.assertEqual(REQUEST_LATENCY.count(endpoint='storieslist', method='GET'), 1)
+        self.assertEqual(REQUEST_MONGO_COMMANDS.count(endpoint='storieslist'), 1)
+
+    @patch('resources.metrics.queue_stats')
+    @patch('resources.stories.db')
+    def test_metrics_endpoint_prometheus_format(self, mock_db, mock_queue_stats):
+        mock_db.stories.find.return_value = []
+        mock_queue_stats.return_value = {'queued': 3, 'running': 1, 'workers': 2, 'busy_workers': 1}
+        self.app.get('/api/stories')
+        response = self.app.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        body = response.get_data(as_text=True)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('http_requests_total{endpoint="storieslist",method="GET",status="200"} 1', body)
+        self.assertIn('pdf_jobs{status="queued"} 3', body)
+        self.assertIn('story_cache_requests{result="hits"}', body)
+        self.assertIn('mongodb_pool_connections{state="open"}', body)
+
+    @patch('resources.metrics.queue_stats')
+    def test_metrics_without_mongo(self, mock_queue_stats):
+        mock_queue_stats.side_effect = Exception('no server')
+        response = self.app.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('pdf_jobs{', response.get_data(as_text=True))
+
+if __name__ == '__main__':
+    unittest.main()
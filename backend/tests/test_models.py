@@ -0,0 +1,64 @@
+# tests/test_models.py
+
+import unittest
+from datetime import datetime
+from bson.objectid import ObjectId
+from models.story import Story
+from models.personalized_story import PersonalizedStory
+from models.user import User
+from utils.serialization import dumps, loads
+
+class TestModels(unittest.TestCase):
+    def setUp(self):
+        self.document = {'_id': ObjectId(), 'title': 'Titel', 'coverImage': 'cover.jpg',
+                         'scenes': [{'pageNumber': 1}, {'pageNumber': 2}], 'roles': ['Ritter'], 'ageGroup': 4}
+
+    def test_story_is_a_view_without_copy(self):
+        story = Story(self.document)
+        self.assertFalse(hasattr(story, '__dict__'))
+        self.assertIs(story.scenes, self.document['scenes'])
+        self.assertIs(story.to_dict()['scenes'], self.document['scenes'])
+        self.assertEqual(story.id, str(self.document['_id']))
+        self.assertEqual(story.page_count, 2)
+        with self.assertRaises(AttributeError):
+            story.title = 'Neu'
+
+    def test_defaults_for_projected_documents(self):
+        story = Story({'_id': ObjectId(), 'title': 'Titel', 'pageCount': 12})
+        self.assertEqual(story.scenes, [])
+        self.assertEqual(story.page_count, 12)
+        personalized = PersonalizedStory({})
+        self.assertEqual(personalized.to_dict(), {
+            'id': '', 'user_id': '', 'story_id': '', 'title': '', 'description': '',
+            'scenes': [], 'personal_data': {}, 'created_at': None,
+        })
+
+    def test_field_projection(self):
+        story = Story(self.document, ('id', 'title'))
+        self.assertEqual(story.to_dict(), {'id': str(self.document['_id']), 'title': 'Titel'})
+        self.assertEqual(Story(self.document).to_summary_dict()['pageCount'], 2)
+        self.assertEqual(set(Story(self.document).to_dict(['title', 'ageGroup'])), {'title', 'ageGroup'})
+        with self.assertRaises(ValueError):
+            Story(self.document).to_dict(('unknown',))
+        self.assertEqual(Story.mongo_projection(('id', 'title', 'coverImage', 'pageCount')), {'title': 1, 'coverImage': 1})
+
+    def test_many_serializes_like_single_models(self):
+        created = datetime(2024, 3, 1, 8, 0)
+        documents = [dict(self.document, _id=ObjectId(), created_at=created) for _ in range(3)]
+        stories = Story.many(iter(documents), Story.SUMMARY_FIELDS)
+        self.assertEqual(len(stories), 3)
+        self.assertEqual(loads(dumps(stories)), [Story(d).to_summary_dict() for d in documents])
+        self.assertEqual([story.title for story in stories], ['Titel'] * 3)
+        personalized = loads(dumps(PersonalizedStory.many(documents)))
+        self.assertEqual(personalized[0]['created_at'], created.isoformat())
+
+    def test_user_password_roundtrip(self):
+        document = {'_id': ObjectId(), 'username': 'anna'}
+        user = User(document)
+        user.set_password('geheim')
+        self.assertTrue(user.check_password('geheim'))
+        self.assertFalse(user.check_password('falsch'))
+        self.assertEqual(user.to_dict(), {'id': str(document['_id']), 'username': 'anna'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+# tests/test_pdf_jobs.py
+
+import unittest
+from datetime import datetime
+from unittest.mock import patch, MagicMock
+from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
+from flask_jwt_extended import create_access_token
+from app import app
+from utils import pdf_jobs
+
+class TestPDFJobStore(unittest.TestCase):
+    def test_enqueue_new_job(self):
+        db = MagicMock()
+        db.pdf_jobs.find_one.return_value = None
+        db.pdf_jobs.count_documents.return_value = 0
+        db.pdf_jobs.insert_one.return_value.inserted_id = ObjectId()
+        job, created = pdf_jobs.enqueue_job(db, 'story', 'user', max_depth=10)
+        self.assertTrue(created)
+        self.assertEqual(job['status'], pdf_jobs.QUEUED)
+        self.assertTrue(job['active'])
+
+    def test_enqueue_deduplicates_active_job(self):
+        db = MagicMock()
+        existing = {'_id': ObjectId(), 'status': pdf_jobs.RUNNING}
+        db.pdf_jobs.find_one.return_value = existing
+        job, created = pdf_jobs.enqueue_job(db, 'story', 'user', max_depth=10)
+        self.assertFalse(created)
+        self.assertIs(job, existing)
+        db.pdf_jobs.insert_one.assert_not_called()
+
+    def test_enqueue_race_returns_other_job(self):
+        db = MagicMock()
+        other = {'_id': ObjectId(), 'status': pdf_jobs.QUEUED}
+        db.pdf_jobs.find_one.side_effect = [None, other]
+        db.pdf_jobs.count_documents.return_value = 0
+        db.pdf_jobs.insert_one.side_effect = DuplicateKeyError('dup')
+        job, created = pdf_jobs.enqueue_job(db, 'story', 'user', max_depth=10)
+        self.assertFalse(created)
+        self.assertIs(job, other)
+
+    def test_enqueue_rejects_full_queue(self):
+        db = MagicMock()
+        db.pdf_jobs.find_one.return_value = None
+        db.pdf_jobs.count_documents.return_value = 10
+        with self.assertRaises(pdf_jobs.QueueFullError):
+            pdf_jobs.enqueue_job(db, 'story', 'user', max_depth=10)
+
+    def test_complete_job_releases_dedupe_slot(self):
+        db = MagicMock()
+        job_id = ObjectId()
+        pdf_jobs.complete_job(db, job_id, 'static/uploads/x.pdf')
+        update = db.pdf_jobs.update_one.call_args[0][1]
+        self.assertEqual(update['$set']['status'], pdf_jobs.DONE)
+        self.assertIn('active', update['$unset'])
+
+class TestPDFJobResources(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.user_id = str(ObjectId())
+        with app.app_context():
+            self.headers = {'Authorization': f'Bearer {create_access_token(identity=self.user_id)}'}
+
+    @patch('resources.pdf_jobs.db')
+    def test_post_job(self, mock_db):
+        personalized_story_id = str(ObjectId())
+        mock_db.personalized_stories.find_one.return_value = {'_id': ObjectId(personalized_story_id)}
+        mock_db.pdf_jobs.find_one.return_value = None
+        mock_db.pdf_jobs.count_documents.return_value = 0
+        mock_db.pdf_jobs.insert_one.return_value.inserted_id = ObjectId()
+        response = self.app.post('/api/pdf-jobs', json={'personalized_story_id': personalized_story_id}, headers=self.headers)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.get_json()['status'], 'queued')
+
+        mock_db.pdf_jobs.find_one.return_value = {
+            '_id': ObjectId(), 'personalized_story_id': personalized_story_id,
+            'status': 'running', 'progress': 0.3, 'created_at': datetime.utcnow()
+        }
+        response = self.app.post('/api/pdf-jobs', json={'personalized_story_id': personalized_story_id}, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['progress'], 0.3)
+
+    @patch('resources.pdf_jobs.db')
+    def test_job_status_of_other_user(self, mock_db):
+        mock_db.pdf_jobs.find_one.return_value = {'_id': ObjectId(), 'user_id': 'someone else', 'status': 'done'}
+        response = self.app.get(f'/api/pdf-jobs/{ObjectId()}', headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    @patch('resources.pdf_jobs.db')
+    def test_metrics(self, mock_db):
+        mock_db.pdf_jobs.count_documents.return_value = 4
+        mock_db.pdf_workers.count_documents.return_value = 2
+        # Wie die Debug-Endpunkte nur für Betreiber
+        self.assertEqual(self.app.get('/api/pdf-jobs/metrics').status_code, 401)
+        self.assertEqual(self.app.get('/api/pdf-jobs/metrics', headers=self.headers).status_code, 403)
+        with patch.dict(app.config, {'OPERATOR_USER_IDS': {self.user_id}}):
+            response = self.app.get('/api/pdf-jobs/metrics', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['queued'], 4)
+        self.assertEqual(data['pool_size'], app.config['PDF_WORKER_PROCESSES'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+# tests/test_personalization.py
+
+import io
+import unittest
+from unittest.mock import MagicMock
+from bson.objectid import ObjectId
+from utils.personalization import (build_overlay, materialize, merge_scenes, snapshot_template, template_version,
+                                   materialized_stories, template_snapshots, TemplateNotFound)
+from utils.migrate_overlays import convert, migrate
+from utils.story_cache import story_cache
+
+class TestPersonalization(unittest.TestCase):
+    def setUp(self):
+        self.story_id = str(ObjectId())
+        self.template = {
+            '_id': ObjectId(self.story_id),
+            'title': 'Geschichte',
+            'scenes': [
+                {'textElements': [{'content': 'Hallo {child_name}'}], 'imageElements': [{'imageUrl': 'a.jpg'}]},
+                {'textElements': [{'content': '{role} lacht'}], 'imageElements': [{'imageUrl': 'b.jpg'}]},
+            ]
+        }
+        self.stories = MagicMock()
+        self.stories.find_one.return_value = self.template
+        self.snapshots = MagicMock()
+        self.snapshots.find_one.return_value = None
+        self.stories.database.__getitem__.return_value = self.snapshots
+        story_cache.invalidate(self.story_id)
+        materialized_stories.clear()
+        template_snapshots.clear()
+
+    def _overlay(self):
+        _, version = story_cache.get_with_etag(self.stories, self.story_id)
+        overlay = build_overlay('user', self.story_id, version, self.template,
+                                {'child_name': 'Max', 'role': 'Oma'}, {'1': 'max.jpg'})
+        overlay['_id'] = ObjectId()
+        return overlay
+
+    def test_materialize_overlay(self):
+        overlay = self._overlay()
+        scenes = materialize(self.stories, overlay)['scenes']
+        self.assertEqual(scenes[0]['textElements'][0]['content'], 'Hallo Max')
+        self.assertEqual(scenes[1]['textElements'][0]['content'], 'Oma lacht')
+        self.assertEqual(scenes[0]['imageElements'][0]['imageUrl'], 'a.jpg')
+        self.assertEqual(scenes[1]['imageElements'][0]['imageUrl'], 'max.jpg')
+        self.assertNotIn('scenes', overlay)
+        # Zweiter Aufruf nutzt den Cache
+        self.assertIs(materialize(self.stories, overlay)['scenes'], scenes)
+
+    def _change_template(self, template):
+        self.stories.find_one.return_value = template
+        story_cache.invalidate(self.story_id)
+        materialized_stories.clear()
+        template_snapshots.clear()
+
+    def test_materialize_keeps_pinned_version(self):
+        overlay = self._overlay()
+        snapshot_template(self.stories, self.story_id, overlay['story_version'], self.template)
+        update = self.snapshots.update_one.call_args[0]
+        self.assertEqual(update[0], {'_id': f"{self.story_id}:{overlay['story_version']}"})
+        self.snapshots.find_one.return_value = update[1]['$setOnInsert']
+        # Vorlage wird nachträglich geändert (z.B. erneuter Import): gekaufte Bücher bleiben gleich
+        changed = dict(self.template, scenes=[{'textElements': [{'content': 'Neu'}], 'imageElements': []}])
+        self._change_template(changed)
+        materialized = materialize(self.stories, overlay)
+        self.assertEqual(materialized['scenes'][0]['textElements'][0]['content'], 'Hallo Max')
+        self.assertEqual(materialized['template_version'], overlay['story_version'])
+        self.assertEqual(template_version(self.stories, overlay), overlay['story_version'])
+        # Auch ohne Vorlage bleibt der Snapshot lesbar
+        self._change_template(None)
+        self.assertEqual(len(materialize(self.stories, overlay)['scenes']), 2)
+
+    def test_materialize_without_template_or_snapshot(self):
+        overlay = self._overlay()
+        self._change_template(None)
+        with self.assertRaises(TemplateNotFound):
+            materialize(self.stories, overlay)
+
+    def test_snapshot_written_once_per_version(self):
+        snapshot_template(self.stories, self.story_id, 'v1', self.template)
+        snapshot_template(self.stories, self.story_id, 'v1', self.template)
+        self.assertEqual(self.snapshots.update_one.call_count, 1)
+
+    def test_materialize_legacy_document_unchanged(self):
+        legacy = {'_id': ObjectId(), 'story_id': self.story_id, 'scenes': [{'textElements': []}]}
+        self.assertIs(materialize(self.stories, legacy), legacy)
+
+    def test_convert_legacy_document(self):
+        scenes = merge_scenes(self.story_id, 'v', self.template, {'child_name': 'Max'}, {'0': 'max.jpg'})
+        legacy = {'_id': ObjectId(), 'story_id': self.story_id, 'personal_data': {'child_name': 'Max'}, 'scenes': scenes}
+        fields = convert(self.stories, legacy)
+        self.assertEqual(fields['format'], 'overlay')
+        self.assertEqual(fields['image_overrides'], {'0': 'max.jpg'})
+
+    def test_convert_skips_diverged_document(self):
+        scenes = merge_scenes(self.story_id, 'v', self.template, {'child_name': 'Max'}, {})
+        scenes[0]['textElements'][0]['content'] = 'Manuell geändert'
+        legacy = {'_id': ObjectId(), 'story_id': self.story_id, 'personal_data': {'child_name': 'Max'}, 'scenes': scenes}
+        self.assertIsNone(convert(self.stories, legacy))
+
+    def test_migrate_bulk_writes(self):
+        scenes = merge_scenes(self.story_id, 'v', self.template, {'child_name': 'Max'}, {})
+        db = MagicMock()
+        db.stories = self.stories
+        db.personalized_stories.find.return_value = [
+            {'_id': ObjectId(), 'story_id': self.story_id, 'personal_data': {'child_name': 'Max'}, 'scenes': scenes},
+            {'_id': ObjectId(), 'story_id': 'invalid', 'scenes': []},
+        ]
+        converted, skipped = migrate(db, out=io.StringIO())
+        self.assertEqual((converted, skipped), (1, 1))
+        operations = db.personalized_stories.bulk_write.call_args[0][0]
+        self.assertEqual(len(operations), 1)
+        self.assertEqual(operations[0]._doc['$unset'], {'scenes': ''})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,8 @@ import unittest
 from app import app
 from unittest.mock import patch
 from bson.objectid import ObjectId
+from datetime import datetime
+from flask_jwt_extended import create_access_token
 
 class TestPersonalize(unittest.TestCase):
     def setUp(self):
@@ -24,6 +26,80 @@ class TestPersonalize(unittest.TestCase):
         self.assertEqual(response.status_code, 201)
         self.assertIn('personalized_story_id', response.get_json())
     
+    @patch('resources.personalize.db')
+    def test_personalize_story_replaces_placeholders(self, mock_db):
+        with app.app_context():
+            headers = {'Authorization': f'Bearer {create_access_token(identity=str(ObjectId()))}'}
+        story_id = str(ObjectId())
+        template = {
+            '_id': ObjectId(story_id),
+            'title': 'Geschichte',
+            'scenes': [{
+                'textElements': [{'content': '{child_name} backt mit {role}.'}],
+                'imageElements': [{'imageUrl': 'original.jpg'}]
+            }]
+        }
+        mock_db.stories.find_one.return_value = template
+        mock_db.personalized_stories.insert_one.return_value = type('obj', (object,), {'inserted_id': ObjectId()})
+
+        data = {
+            'story_id': story_id,
+            'personal_data': {'child_name': 'Max', 'role': 'Oma'},
+            'user_images': {'0': 'uploads/max.jpg'}
+        }
+        response = self.app.post('/api/personalize', json=data, headers=headers)
+        self.assertEqual(response.status_code, 201)
+        inserted = mock_db.personalized_stories.insert_one.call_args[0][0]
+        # Es wird nur das Overlay gespeichert, keine Kopie der Szenen
+        self.assertNotIn('scenes', inserted)
+        self.assertEqual(inserted['format'], 'overlay')
+        self.assertEqual(inserted['image_overrides'], {'0': 'uploads/max.jpg'})
+        self.assertIsNotNone(inserted['story_version'])
+
+        inserted['_id'] = ObjectId()
+        mock_db.personalized_stories.find_one.return_value = inserted
+        response = self.app.get(f"/api/personalized-stories/{inserted['_id']}", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        scene = response.get_json()['scenes'][0]
+        self.assertEqual(scene['textElements'][0]['content'], 'Max backt mit Oma.')
+        self.assertEqual(scene['imageElements'][0]['imageUrl'], 'uploads/max.jpg')
+        # Die Vorlage bleibt unverändert
+        self.assertEqual(template['scenes'][0]['textElements'][0]['content'], '{child_name} backt mit {role}.')
+        self.assertEqual(template['scenes'][0]['imageElements'][0]['imageUrl'], 'original.jpg')
+
+    @patch('resources.personalize.db')
+    def test_personalize_batch(self, mock_db):
+        with app.app_context():
+            headers = {'Authorization': f'Bearer {create_access_token(identity=str(ObjectId()))}'}
+        story_id = str(ObjectId())
+        mock_db.stories.find_one.return_value = {'_id': ObjectId(story_id), 'title': 'Geschichte', 'scenes': []}
+        data = {
+            'story_id': story_id,
+            'children': [
+                {'personal_data': {'child_name': 'Max'}, 'user_images': {'0': 'max.jpg'}},
+                {'personal_data': {}},
+                {'personal_data': {'child_name': 'Lena'}},
+            ]
+        }
+        response = self.app.post('/api/personalize/batch', json=data, headers=headers)
+        self.assertEqual(response.status_code, 207)
+        body = response.get_json()
+        self.assertEqual(body['created'], 2)
+        self.assertEqual([item['status'] for item in body['results']], ['created', 'error', 'created'])
+        # Vorlage einmal laden, ein einziger ungeordneter bulk_write
+        mock_db.stories.find_one.assert_called_once()
+        mock_db.personalized_stories.bulk_write.assert_called_once()
+        operations = mock_db.personalized_stories.bulk_write.call_args[0][0]
+        self.assertEqual(len(operations), 2)
+        self.assertFalse(mock_db.personalized_stories.bulk_write.call_args[1]['ordered'])
+        self.assertEqual(str(operations[0]._doc['_id']), body['results'][0]['personalized_story_id'])
+
+    def test_personalize_batch_requires_children(self):
+        with app.app_context():
+            headers = {'Authorization': f'Bearer {create_access_token(identity=str(ObjectId()))}'}
+        response = self.app.post('/api/personalize/batch', json={'story_id': str(ObjectId()), 'children': []}, headers=headers)
+        self.assertEqual(response.status_code, 400)
+
     @patch('resources.personalize.db')
     def test_personalize_story_missing_name(self, mock_db):
         story_id = str(ObjectId())
@@ -61,10 +137,78 @@ class TestPersonalize(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn('Max', str(response.data))
     
+    @patch('resources.personalize.db')
+    def test_get_personalized_story_etag_not_modified(self, mock_db):
+        user_id = str(ObjectId())
+        with app.app_context():
+            headers = {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+        personalized_story_id = str(ObjectId())
+        mock_db.personalized_stories.find_one.return_value = {
+            '_id': ObjectId(personalized_story_id),
+            'user_id': user_id,
+            'story_id': str(ObjectId()),
+            'personal_data': {'child_name': 'Max'},
+            'scenes': [],
+            'created_at': datetime(2024, 10, 15)
+        }
+        url = f'/api/personalized-stories/{personalized_story_id}'
+        response = self.app.get(url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+
+        mock_db.personalized_stories.find_one.reset_mock()
+        response = self.app.get(url, headers=dict(headers, **{'If-None-Match': etag}))
+        self.assertEqual(response.status_code, 304)
+        # Nur die Versionsabfrage, keine volle Geschichte
+        mock_db.personalized_stories.find_one.assert_called_once()
+        self.assertIn('created_at', mock_db.personalized_stories.find_one.call_args[0][1])
+
     def test_get_personalized_story_invalid_id(self):
         response = self.app.get('/api/personalized-story/invalid_id')
         self.assertEqual(response.status_code, 400)
         self.assertIn('Invalid personalized story ID', str(response.data))
 
+    @patch('resources.personalize.story_cache')
+    @patch('resources.personalize.db')
+    def test_user_stories_summary_paginated(self, mock_db, mock_cache):
+        user_id = str(ObjectId())
+        created = datetime(2024, 5, 1, 12, 0, 0, 123000)
+        docs = [
+            {'_id': ObjectId(), 'title': f'Buch {i}', 'created_at': created, 'story_id': str(ObjectId())}
+            for i in range(3)
+        ]
+        docs[0]['coverImage'] = 'cover.jpg'
+        mock_db.personalized_stories.find.return_value.sort.return_value.limit.return_value = docs
+        mock_db.personalized_stories.count_documents.return_value = 7
+        mock_cache.get.return_value = {'coverImage': 'template.jpg'}
+        with app.app_context():
+            headers = {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+        response = self.app.get('/api/user-stories?view=summary&limit=2', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual([s['title'] for s in data], ['Buch 0', 'Buch 1'])
+        self.assertEqual(data[0]['coverImage'], 'cover.jpg')
+        self.assertEqual(data[1]['coverImage'], 'template.jpg')
+        self.assertNotIn('scenes', data[0])
+        self.assertEqual(response.headers['X-Total-Count'], '7')
+        cursor = response.headers['X-Next-Cursor']
+        self.assertTrue(cursor.endswith(str(docs[1]['_id'])))
+        # Projektion ohne Szenen, Sortierung passend zum Index
+        query, projection = mock_db.personalized_stories.find.call_args[0]
+        self.assertNotIn('scenes', projection)
+        mock_db.personalized_stories.find.return_value.sort.assert_called_with([('created_at', -1), ('_id', -1)])
+
+        response = self.app.get(f'/api/user-stories?view=summary&limit=2&after={cursor}', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        query = mock_db.personalized_stories.find.call_args[0][0]
+        self.assertEqual(query['user_id'], user_id)
+        self.assertIn({'created_at': created, '_id': {'$lt': docs[1]['_id']}}, query['$or'])
+
+    def test_user_stories_invalid_cursor(self):
+        with app.app_context():
+            headers = {'Authorization': f'Bearer {create_access_token(identity=str(ObjectId()))}'}
+        response = self.app.get('/api/user-stories?view=summary&after=kaputt', headers=headers)
+        self.assertEqual(response.status_code, 400)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,44 @@
+# tests/test_placeholders.py
+
+import unittest
+from utils.placeholders import compile_text, render, personalize_text, placeholder_values, CompiledStoryCache, personalize_scenes
+
+class TestPlaceholders(unittest.TestCase):
+    def test_compile_and_render(self):
+        compiled = compile_text('{child_name} und {role} backen, {child_name} lacht.')
+        self.assertEqual(compiled[1], ('child_name', 'role', 'child_name'))
+        text = render(compiled, {'child_name': 'Max', 'role': 'Oma'})
+        self.assertEqual(text, 'Max und Oma backen, Max lacht.')
+
+    def test_text_without_placeholders(self):
+        self.assertEqual(render(compile_text('Es war einmal.'), {}), 'Es war einmal.')
+        self.assertEqual(render(compile_text(''), {}), '')
+
+    def test_unknown_placeholder_kept(self):
+        self.assertEqual(personalize_text('Hallo {pet_name}!', {'child_name': 'Max'}), 'Hallo {pet_name}!')
+
+    def test_values_are_not_reinterpreted(self):
+        self.assertEqual(personalize_text('{child_name}', {'child_name': '{role}', 'role': 'Oma'}), '{role}')
+
+    def test_defaults(self):
+        values = placeholder_values({'child_name': 'Max', 'child_age': 4})
+        self.assertEqual(values['role'], '...')
+        self.assertEqual(values['child_age'], '4')
+
+    def test_compiled_story_cache_per_version(self):
+        cache = CompiledStoryCache(max_entries=2)
+        scenes = [{'textElements': [{'content': 'Hallo {child_name}'}]}]
+        first = cache.get('a', 'v1', scenes)
+        self.assertIs(cache.get('a', 'v1', scenes), first)
+        changed = [{'textElements': [{'content': 'Tschüss {child_name}'}]}]
+        self.assertIsNot(cache.get('a', 'v2', changed), first)
+
+    def test_personalize_scenes(self):
+        scenes = [{'textElements': [{'content': '{child_name} und {role}'}, {}]}, {}]
+        compiled = CompiledStoryCache().get('a', 'v1', scenes)
+        personalize_scenes(scenes, compiled, {'child_name': 'Max', 'role': 'Papa'})
+        self.assertEqual(scenes[0]['textElements'][0]['content'], 'Max und Papa')
+        self.assertEqual(scenes[0]['textElements'][1]['content'], '')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+# tests/test_serialization.py
+
+import json
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+from bson.objectid import ObjectId
+from app import app
+from models.story import Story
+from models.personalized_story import PersonalizedStory
+from utils import serialization
+from utils.serialization import dumps, loads
+
+class TestSerialization(unittest.TestCase):
+    def test_dumps_handles_object_id_and_datetime(self):
+        oid = ObjectId()
+        created = datetime(2024, 5, 1, 12, 30, 0, 123000)
+        data = loads(dumps({'_id': oid, 'created_at': created, 'name': 'Jürgen'}))
+        self.assertEqual(data, {'_id': str(oid), 'created_at': created.isoformat(), 'name': 'Jürgen'})
+
+    def test_models_serialize_like_to_dict(self):
+        story = Story({'_id': ObjectId(), 'title': 'Titel', 'scenes': [{'pageNumber': 1}]})
+        self.assertEqual(loads(dumps(story)), story.to_dict())
+        personalized = PersonalizedStory({'_id': ObjectId(), 'created_at': datetime(2024, 1, 2)})
+        self.assertEqual(loads(dumps([personalized]))[0], json.loads(json.dumps(personalized.to_dict())))
+
+    def test_fallback_without_orjson(self):
+        oid = ObjectId()
+        with patch.object(serialization, 'orjson', None):
+            body = dumps({'id': oid, 'title': 'Märchen'})
+        self.assertIsInstance(body, bytes)
+        self.assertEqual(json.loads(body), {'id': str(oid), 'title': 'Märchen'})
+
+    def test_unknown_type_raises(self):
+        with self.assertRaises(TypeError):
+            dumps({'value': object()})
+
+    def test_api_uses_fast_representation(self):
+        with patch('resources.stories.db') as mock_db:
+            mock_db.stories.find.return_value = [{'_id': ObjectId(), 'title': 'A', 'scenes': []}]
+            response = app.test_client().get('/api/stories')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(response.get_json()[0]['title'], 'A')
+
+if __name__ == '__main__':
+    unittest.main()
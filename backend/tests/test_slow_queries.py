@@ -0,0 +1,106 @@
+# tests/test_slow_queries.py
+
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from bson.objectid import ObjectId
+from flask_jwt_extended import create_access_token
+from app import app
+from utils.slow_queries import SlowQueryMonitor, slow_query_monitor, redact
+
+EXPLAIN_COLLSCAN = {
+    'queryPlanner': {'winningPlan': {'stage': 'PROJECTION_SIMPLE', 'inputStage': {'stage': 'COLLSCAN'}}},
+    'executionStats': {'nReturned': 2, 'totalDocsExamined': 5000, 'totalKeysExamined': 0, 'executionTimeMillis': 180},
+}
+
+def _events(command_name, command, reply, duration_ms, request_id=1):
+    # Paar aus started/succeeded wie von pymongo
+    started = SimpleNamespace(command_name=command_name, command=command, database_name='personalized_books',
+                              connection_id=('localhost', 27017), request_id=request_id)
+    succeeded = SimpleNamespace(command_name=command_name, reply=reply, duration_micros=int(duration_ms * 1000),
+                                database_name='personalized_books', connection_id=('localhost', 27017), request_id=request_id)
+    return started, succeeded
+
+class TestSlowQueries(unittest.TestCase):
+    def setUp(self):
+        self.database = MagicMock()
+        self.database.return_value.command.return_value = EXPLAIN_COLLSCAN
+        self.monitor = SlowQueryMonitor(100, explain_sample_rate=1.0, database=self.database)
+
+    def _run(self, command_name, command, reply, duration_ms):
+        started, succeeded = _events(command_name, command, reply, duration_ms)
+        self.monitor.started(started)
+        self.monitor.succeeded(succeeded)
+        self.monitor.flush()
+        return self.monitor.entries()
+
+    def test_fast_commands_are_ignored(self):
+        self.assertEqual(self._run('find', {'find': 'stories', 'filter': {}}, {'cursor': {'firstBatch': []}}, 5), [])
+
+    def test_slow_find_records_filter_projection_and_size(self):
+        documents = [{'_id': ObjectId(), 'scenes': ['x' * 1000]}, {'_id': ObjectId(), 'scenes': []}]
+        command = {'find': 'stories', 'filter': {'roles': 'Ritter', 'ageGroup': {'$gte': 3}},
+                   'projection': {'title': 1, 'scenes': 1}, 'lsid': {'id': 'session'}}
+        entry, = self._run('find', command, {'cursor': {'firstBatch': documents}}, 250)
+        self.assertEqual(entry['collection'], 'stories')
+        self.assertEqual(entry['duration_ms'], 250)
+        self.assertEqual(entry['filter'], {'roles': '?', 'ageGroup': {'$gte': '?'}})
+        self.assertEqual(entry['projection'], {'title': 1, 'scenes': 1})
+        self.assertEqual(entry['docs_returned'], 2)
+        self.assertGreater(entry['returned_bytes'], 1000)
+        self.assertTrue(entry['explain']['collscan'])
+        self.assertEqual(entry['explain']['docs_examined'], 5000)
+        # explain mit den echten Werten, aber ohne Session-Felder
+        explain_command = self.database.return_value.command.call_args[0][0]
+        self.assertEqual(explain_command['explain'], {'find': 'stories', 'filter': command['filter'], 'projection': command['projection']})
+        self.assertEqual(explain_command['verbosity'], 'executionStats')
+
+    def test_writes_are_logged_without_explain(self):
+        command = {'update': 'pdf_jobs', 'updates': [{'q': {'_id': ObjectId()}, 'u': {'$set': {'status': 'done'}}}]}
+        entry, = self._run('update', command, {'n': 1}, 150)
+        self.assertEqual(entry['filter'], {'_id': '?'})
+        self.assertIsNone(entry['explain'])
+        self.database.assert_not_called()
+
+    def test_explain_error_is_recorded(self):
+        self.database.return_value.command.side_effect = Exception('not authorized')
+        entry, = self._run('count', {'count': 'users', 'query': {}}, {'n': 3}, 120)
+        self.assertEqual(entry['explain'], {'error': 'not authorized'})
+
+    def test_rotating_log_file(self):
+        with tempfile.TemporaryDirectory() as folder:
+            self.monitor.log_path = os.path.join(folder, 'slow_queries.jsonl')
+            self._run('find', {'find': 'stories', 'filter': {}}, {'cursor': {'firstBatch': []}}, 300)
+            self.monitor.close()
+            with open(self.monitor.log_path, encoding='utf-8') as f:
+                lines = [json.loads(line) for line in f]
+        self.assertEqual(lines[0]['collection'], 'stories')
+
+    def test_redact_keeps_operators(self):
+        self.assertEqual(redact({'$or': [{'a': 1}, {'b': {'$in': [1, 2]}}]}), {'$or': [{'a': '?'}, {'b': {'$in': ['?', '?']}}]})
+
+    @patch.object(slow_query_monitor, 'log_path', None)
+    @patch.object(slow_query_monitor, 'explain_sample_rate', 0.0)
+    def test_debug_endpoint(self):
+        slow_query_monitor.clear()
+        slow_query_monitor.record('find', 'personalized_books', {'find': 'stories', 'filter': {'title': 'Max'}}, {'cursor': {'firstBatch': []}}, 200000)
+        client, url = app.test_client(), '/api/debug/slow-queries?collection=stories'
+        operator_id = str(ObjectId())
+        with app.app_context():
+            headers = {'Authorization': f'Bearer {create_access_token(identity=operator_id)}'}
+            customer_headers = {'Authorization': f'Bearer {create_access_token(identity=str(ObjectId()))}'}
+        with patch.dict(app.config, {'OPERATOR_USER_IDS': {operator_id}}):
+            self.assertEqual(client.get(url, headers=headers).status_code, 404)
+            with patch.dict(app.config, {'SLOW_QUERY_DEBUG_ENDPOINT': True}):
+                self.assertEqual(client.get(url).status_code, 401)
+                # Angemeldet allein reicht nicht, der Ring enthält Filter und Projektionen
+                self.assertEqual(client.get(url, headers=customer_headers).status_code, 403)
+                response = client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['count'], 1)
+        # Filterwerte werden standardmäßig ersetzt, unabhängig von DEBUG
+        self.assertEqual(response.get_json()['entries'][0]['filter'], {'title': '?'})
+        slow_query_monitor.clear()
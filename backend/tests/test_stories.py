@@ -40,6 +40,62 @@ class TestStories(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn('Geschichte 1', str(response.data))
     
+    @patch('resources.stories.db')
+    def test_get_stories_summary_paginated(self, mock_db):
+        ids = sorted(ObjectId() for _ in range(3))
+        mock_cursor = mock_db.stories.find.return_value.sort.return_value
+        mock_cursor.limit.return_value = [
+            {'_id': ids[0], 'title': 'Geschichte 1', 'pageCount': 12, 'roles': ['Oma'], 'ageGroup': 3},
+            {'_id': ids[1], 'title': 'Geschichte 2', 'pageCount': 8, 'roles': ['Papa'], 'ageGroup': 4},
+            {'_id': ids[2], 'title': 'Geschichte 3', 'pageCount': 5, 'roles': [], 'ageGroup': 5},
+        ]
+        response = self.app.get(f'/api/stories?view=summary&limit=2&after={ids[0]}')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data[0]['pageCount'], 12)
+        self.assertNotIn('scenes', data[0])
+        self.assertEqual(response.headers['X-Next-Cursor'], str(ids[1]))
+        query, projection = mock_db.stories.find.call_args[0]
+        self.assertEqual(query['_id'], {'$gt': ids[0]})
+        self.assertNotIn('scenes', projection)
+        mock_db.stories.find.return_value.sort.assert_called_once_with('_id', 1)
+        mock_cursor.limit.assert_called_once_with(3)
+
+    @patch('resources.stories.db')
+    def test_get_stories_last_page_has_no_cursor(self, mock_db):
+        mock_db.stories.find.return_value.sort.return_value.limit.return_value = [
+            {'_id': ObjectId(), 'title': 'Geschichte 1', 'scenes': []},
+        ]
+        response = self.app.get('/api/stories?limit=5')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('scenes', response.get_json()[0])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+    def test_get_stories_invalid_cursor(self):
+        response = self.app.get('/api/stories?view=summary&after=invalid')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Invalid cursor', str(response.data))
+
+    @patch('resources.stories.db')
+    def test_get_story_detail_etag_not_modified(self, mock_db):
+        story_id = str(ObjectId())
+        mock_db.stories.find_one.return_value = {
+            '_id': ObjectId(story_id),
+            'title': 'Geschichte 1',
+            'scenes': [{'textElements': [{'content': 'Hallo {child_name}'}]}]
+        }
+        response = self.app.get(f'/api/stories/{story_id}')
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        self.assertTrue(etag.startswith('"'))
+        response = self.app.get(f'/api/stories/{story_id}', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        self.assertEqual(response.headers['ETag'], etag)
+        response = self.app.get(f'/api/stories/{story_id}', headers={'If-None-Match': '"other"'})
+        self.assertEqual(response.status_code, 200)
+
     def test_get_story_detail_invalid_id(self):
         response = self.app.get('/api/stories/invalid_id')
         self.assertEqual(response.status_code, 400)
@@ -0,0 +1,95 @@
+# tests/test_story_cache.py
+
+import unittest
+from unittest.mock import MagicMock, patch
+from bson.objectid import ObjectId
+from utils.story_cache import StoryCache
+
+class TestStoryCache(unittest.TestCase):
+    def setUp(self):
+        self.collection = MagicMock()
+        self.documents = {}
+        self.collection.find_one.side_effect = self._find_one
+
+    def _find_one(self, query, projection=None):
+        document = self.documents.get(query['_id'])
+        if document is None or projection is None:
+            return document
+        return {k: v for k, v in document.items() if k in projection or k == '_id'}
+
+    def _add(self, version=1, scenes=None):
+        oid = ObjectId()
+        self.documents[oid] = {'_id': oid, 'title': 'Geschichte', 'version': version, 'scenes': scenes or []}
+        return str(oid)
+
+    def test_hit_after_miss(self):
+        cache = StoryCache(max_entries=10, max_bytes=1024 * 1024, ttl=60)
+        story_id = self._add()
+        first = cache.get(self.collection, story_id)
+        second = cache.get(self.collection, story_id)
+        self.assertIs(first, second)
+        self.assertEqual(self.collection.find_one.call_count, 1)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_missing_story_is_not_cached(self):
+        cache = StoryCache(max_entries=10, max_bytes=1024 * 1024, ttl=60)
+        self.assertIsNone(cache.get(self.collection, str(ObjectId())))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_lru_eviction_by_entry_count(self):
+        cache = StoryCache(max_entries=2, max_bytes=1024 * 1024, ttl=60)
+        a, b, c = self._add(), self._add(), self._add()
+        cache.get(self.collection, a)
+        cache.get(self.collection, b)
+        cache.get(self.collection, a)
+        cache.get(self.collection, c)
+        stats = cache.stats()
+        self.assertEqual(stats['entries'], 2)
+        self.assertEqual(stats['evictions'], 1)
+        cache.get(self.collection, a)
+        self.assertEqual(cache.stats()['hits'], 2)
+
+    def test_eviction_by_bytes(self):
+        cache = StoryCache(max_entries=10, max_bytes=600, ttl=60)
+        big = [{'textElements': [{'content': 'x' * 200}]}]
+        a, b = self._add(scenes=big), self._add(scenes=big)
+        cache.get(self.collection, a)
+        cache.get(self.collection, b)
+        stats = cache.stats()
+        self.assertEqual(stats['entries'], 1)
+        self.assertLessEqual(stats['bytes'], 600)
+
+    @patch('utils.story_cache.time')
+    def test_expired_entry_revalidated_by_version(self, mock_time):
+        mock_time.monotonic.return_value = 0
+        cache = StoryCache(max_entries=10, max_bytes=1024 * 1024, ttl=60)
+        story_id = self._add(version=1)
+        first = cache.get(self.collection, story_id)
+        mock_time.monotonic.return_value = 120
+        self.assertIs(cache.get(self.collection, story_id), first)
+        _, projection = self.collection.find_one.call_args[0]
+        self.assertNotIn('scenes', projection)
+        self.assertEqual(cache.stats()['revalidations'], 1)
+
+    @patch('utils.story_cache.time')
+    def test_version_change_reloads(self, mock_time):
+        mock_time.monotonic.return_value = 0
+        cache = StoryCache(max_entries=10, max_bytes=1024 * 1024, ttl=60)
+        story_id = self._add(version=1)
+        cache.get(self.collection, story_id)
+        self.documents[ObjectId(story_id)] = dict(self.documents[ObjectId(story_id)], version=2, title='Neu')
+        mock_time.monotonic.return_value = 120
+        self.assertEqual(cache.get(self.collection, story_id)['title'], 'Neu')
+        self.assertEqual(cache.stats()['misses'], 2)
+
+    def test_invalidate(self):
+        cache = StoryCache(max_entries=10, max_bytes=1024 * 1024, ttl=60)
+        story_id = self._add()
+        cache.get(self.collection, story_id)
+        cache.invalidate(story_id)
+        self.assertEqual(cache.stats()['entries'], 0)
+        self.assertEqual(cache.stats()['bytes'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
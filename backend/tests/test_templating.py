@@ -0,0 +1,31 @@
+# tests/test_templating.py
+
+import unittest
+from jinja2 import FileSystemBytecodeCache
+from utils.templating import get_environment, get_template, precompile_templates, layout_version, PDF_TEMPLATE
+
+class TestTemplating(unittest.TestCase):
+    def test_environment_is_shared(self):
+        self.assertIs(get_environment(), get_environment())
+        self.assertIs(get_template(PDF_TEMPLATE), get_template(PDF_TEMPLATE))
+
+    def test_environment_settings(self):
+        env = get_environment()
+        self.assertFalse(env.auto_reload)
+        self.assertIsInstance(env.bytecode_cache, FileSystemBytecodeCache)
+        self.assertIn('personalize', env.filters)
+
+    def test_precompile_all_layouts(self):
+        self.assertIn(PDF_TEMPLATE, precompile_templates())
+
+    def test_render_pdf_template(self):
+        story = {'title': 'Geschichte', 'scenes': [{'textElements': [{'content': 'Hallo {child_name}', 'position': {'x': 10, 'y': 20}}], 'imageElements': []}]}
+        html = get_template().render(story=story, personal_data={'child_name': 'Max'})
+        self.assertIn('Hallo Max', html)
+
+    def test_layout_version_is_stable(self):
+        self.assertEqual(layout_version(), layout_version(PDF_TEMPLATE))
+        self.assertEqual(len(layout_version()), 64)
+
+if __name__ == '__main__':
+    unittest.main()
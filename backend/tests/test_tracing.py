@@ -0,0 +1,112 @@
+# tests/test_tracing.py
+
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+from bson.objectid import ObjectId
+from flask_jwt_extended import create_access_token
+from app import app
+from utils.tracing import tracer, tracing_listener, dump, parse_traceparent, JsonlExporter, Tracer, STATUS_ERROR
+
+def _attributes(span):
+    return {attribute['key']: list(attribute['value'].values())[0] for attribute in span['attributes']}
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        tracer.ring_buffer().clear()
+
+    def test_nested_spans_share_trace(self):
+        with tracer.span('outer') as outer:
+            with tracer.span('inner', template='pdf_template.html'):
+                pass
+        inner_span, outer_span = dump()
+        self.assertEqual(inner_span['traceId'], outer.trace_id)
+        self.assertEqual(inner_span['parentSpanId'], outer_span['spanId'])
+        self.assertEqual(outer_span['parentSpanId'], '')
+        self.assertEqual(_attributes(inner_span), {'template': 'pdf_template.html'})
+        self.assertLessEqual(int(outer_span['startTimeUnixNano']), int(inner_span['startTimeUnixNano']))
+
+    def test_exception_marks_span_as_error(self):
+        with self.assertRaises(ValueError):
+            with tracer.span('failing'):
+                raise ValueError('kaputt')
+        span = dump()[0]
+        self.assertEqual(span['status'], {'code': STATUS_ERROR, 'message': 'ValueError: kaputt'})
+
+    @patch('resources.stories.db')
+    def test_resource_span_with_mongo_child(self, mock_db):
+        def find(*args, **kwargs):
+            # Simuliert die Ereignisse, die pymongo im Thread des Requests auslöst
+            event = SimpleNamespace(command_name='find', command={'find': 'stories'}, database_name='personalized_books',
+                                    request_id=1, operation_id=1, connection_id=('localhost', 27017))
+            tracing_listener.started(event)
+            tracing_listener.succeeded(event)
+            return [{'_id': ObjectId(), 'title': 'A'}]
+        mock_db.stories.find.side_effect = find
+        response = self.app.get('/api/stories')
+        self.assertEqual(response.status_code, 200)
+        trace_id = response.headers['X-Trace-Id']
+        mongo_span, resource_span = dump(trace_id)
+        self.assertEqual(resource_span['name'], 'GET StoriesList')
+        self.assertEqual(resource_span['kind'], 'SPAN_KIND_SERVER')
+        self.assertEqual(_attributes(resource_span)['http.response.status_code'], '200')
+        self.assertEqual(mongo_span['name'], 'mongodb.find')
+        self.assertEqual(mongo_span['parentSpanId'], resource_span['spanId'])
+        self.assertEqual(_attributes(mongo_span)['db.mongodb.collection'], 'stories')
+
+    def test_mongo_commands_outside_trace_are_ignored(self):
+        event = SimpleNamespace(command_name='ping', command={'ping': 1}, database_name='admin',
+                                request_id=2, operation_id=2, connection_id=None)
+        tracing_listener.started(event)
+        tracing_listener.succeeded(event)
+        self.assertEqual(dump(), [])
+
+    def test_incoming_traceparent_is_continued(self):
+        trace_id = '4bf92f3577b34da6a3ce929d0e0e4736'
+        response = self.app.get('/api/health/live', headers={'traceparent': f'00-{trace_id}-00f067aa0ba902b7-01'})
+        self.assertEqual(response.headers['X-Trace-Id'], trace_id)
+        self.assertEqual(dump(trace_id)[0]['parentSpanId'], '00f067aa0ba902b7')
+        self.assertIsNone(parse_traceparent('00-invalid-01'))
+
+    def test_unsampled_trace_is_not_exported(self):
+        unsampled = Tracer('test', sample_rate=0.0, exporters=[tracer.ring_buffer()])
+        with unsampled.span('outer'):
+            with unsampled.span('inner'):
+                pass
+        self.assertEqual(dump(), [])
+
+    def test_jsonl_exporter_writes_one_span_per_line(self):
+        with tempfile.TemporaryDirectory() as folder:
+            exporter = JsonlExporter(os.path.join(folder, 'traces', 'spans.jsonl'))
+            file_tracer = Tracer('test', exporters=[exporter])
+            with file_tracer.span('outer'):
+                with file_tracer.span('inner'):
+                    pass
+            exporter.close()
+            with open(exporter.path, encoding='utf-8') as f:
+                spans = [json.loads(line) for line in f]
+        self.assertEqual([span['name'] for span in spans], ['inner', 'outer'])
+        self.assertEqual(spans[0]['resource']['service.name'], 'test')
+
+    def test_debug_endpoint_filters_by_trace(self):
+        trace_id = self.app.get('/api/health/live').headers['X-Trace-Id']
+        self.app.get('/api/health/live')
+        url = f'/api/debug/traces?trace_id={trace_id}'
+        operator_id, customer_id = str(ObjectId()), str(ObjectId())
+        with app.app_context():
+            headers = {'Authorization': f'Bearer {create_access_token(identity=operator_id)}'}
+            customer_headers = {'Authorization': f'Bearer {create_access_token(identity=customer_id)}'}
+        with patch.dict(app.config, {'OPERATOR_USER_IDS': {operator_id}}):
+            # Standardmäßig aus, nie ohne Anmeldung und nie für normale Benutzer
+            self.assertEqual(self.app.get(url, headers=headers).status_code, 404)
+            with patch.dict(app.config, {'TRACING_DEBUG_ENDPOINT': True}):
+                self.assertEqual(self.app.get(url).status_code, 401)
+                self.assertEqual(self.app.get(url, headers=customer_headers).status_code, 403)
+                response = self.app.get(url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['count'], 1)
+        self.assertEqual(response.get_json()['spans'][0]['name'], 'GET Liveness')
@@ -4,6 +4,11 @@ import unittest
 from app import app
 from unittest.mock import patch
 from io import BytesIO
+from bson.objectid import ObjectId
+from flask_jwt_extended import create_access_token
+import hashlib
+import os
+import tempfile
 
 class TestUpload(unittest.TestCase):
     def setUp(self):
@@ -19,6 +24,40 @@ class TestUpload(unittest.TestCase):
         self.assertEqual(response.status_code, 201)
         self.assertIn('file_path', response.get_json())
     
+    @patch('resources.upload.submit_derivatives')
+    @patch('resources.upload.db')
+    def test_upload_image_deduplicates_content(self, mock_db, mock_submit):
+        with app.app_context():
+            headers = {'Authorization': f'Bearer {create_access_token(identity=str(ObjectId()))}'}
+        content = b'\xff\xd8 gleiche Bilddaten'
+        digest = hashlib.sha256(content).hexdigest()
+        with tempfile.TemporaryDirectory() as tmp:
+            old_folder = app.config['UPLOAD_FOLDER']
+            app.config['UPLOAD_FOLDER'] = tmp
+            try:
+                urls = []
+                for name in ('foto.jpg', 'kopie.JPEG'):
+                    data = {'file': (BytesIO(content), name)}
+                    response = self.app.post('/api/upload-image', content_type='multipart/form-data', data=data, headers=headers)
+                    self.assertEqual(response.status_code, 201)
+                    self.assertEqual(response.get_json()['sha256'], digest)
+                    urls.append(response.get_json()['file_path'])
+            finally:
+                app.config['UPLOAD_FOLDER'] = old_folder
+            self.assertEqual(urls[0], urls[1])
+            self.assertTrue(urls[0].endswith(f'uploads/{digest[:2]}/{digest[2:4]}/{digest}.jpg'))
+            stored = os.path.join(tmp, digest[:2], digest[2:4], f'{digest}.jpg')
+            with open(stored, 'rb') as f:
+                self.assertEqual(f.read(), content)
+            self.assertEqual(os.listdir(os.path.join(tmp, 'tmp')), [])
+        query, update = mock_db.user_images.update_one.call_args[0]
+        self.assertEqual(query['sha256'], digest)
+        self.assertTrue(mock_db.user_images.update_one.call_args[1]['upsert'])
+        self.assertIn('relative_path', update['$setOnInsert'])
+        self.assertEqual(mock_submit.call_count, 2)
+        self.assertEqual(set(response.get_json()['variants']), {'thumbnail', 'screen'})
+        self.assertEqual(response.get_json()['variants_status'], 'pending')
+
     def test_upload_image_no_file(self):
         response = self.app.post('/api/upload-image', content_type='multipart/form-data', data={})
         self.assertEqual(response.status_code, 400)
@@ -32,5 +71,14 @@ class TestUpload(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertIn('File type not allowed', str(response.data))
 
+    @patch('resources.upload.db')
+    def test_uploaded_image_database_error(self, mock_db):
+        with app.app_context():
+            headers = {'Authorization': f'Bearer {create_access_token(identity=str(ObjectId()))}'}
+        mock_db.user_images.find_one.side_effect = RuntimeError('Mongo nicht erreichbar')
+        response = self.app.get(f"/api/uploaded-images/{'a' * 64}", headers=headers)
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.get_json(), {'message': 'Error retrieving uploaded image'})
+
 if __name__ == '__main__':
     unittest.main()
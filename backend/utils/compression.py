@@ -0,0 +1,78 @@
+# utils/compression.py
+
+import gzip
+from flask import request, current_app, make_response
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dann nur gzip
+    brotli = None
+
+IDENTITY = 'identity'
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript'}
+
+
+def available_encodings():
+    # Reihenfolge = Präferenz des Servers bei gleicher Qualität im Accept-Encoding
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding():
+    """Beste Kodierung laut Accept-Encoding des Requests oder None."""
+    if not current_app.config['COMPRESSION_ENABLED']:
+        return None
+    return request.accept_encodings.best_match(available_encodings())
+
+
+def compress(body, encoding):
+    config = current_app.config
+    if encoding == 'br':
+        return brotli.compress(body, quality=config['COMPRESSION_BROTLI_QUALITY'])
+    if encoding == 'gzip':
+        # mtime=0, damit gleiche Eingaben gleiche Bytes ergeben
+        return gzip.compress(body, compresslevel=config['COMPRESSION_LEVEL'], mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def encode_body(body, encoding):
+    """Komprimiert body, falls sich das lohnt; liefert (bytes, angewandte Kodierung)."""
+    if encoding is None or len(body) < current_app.config['COMPRESSION_MIN_SIZE']:
+        return body, IDENTITY
+    return compress(body, encoding), encoding
+
+
+def _weaken_etag(response):
+    # Die komprimierte Darstellung ist nicht bytegleich, daher nur noch schwacher ETag
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        response.headers['ETag'] = 'W/' + etag
+
+
+def _finish(response, encoding):
+    response.vary.add('Accept-Encoding')
+    if encoding != IDENTITY:
+        response.headers['Content-Encoding'] = encoding
+        _weaken_etag(response)
+    return response
+
+
+def encoded_response(body, encoding, mimetype, status=200, headers=None):
+    """Antwort aus bereits (z.B. im Cache) kodierten Bytes."""
+    response = make_response(body, status)
+    response.headers.extend(headers or {})
+    response.mimetype = mimetype
+    return _finish(response, encoding)
+
+
+def compress_response(response):
+    """after_request-Hook: komprimiert große JSON-/Text-Antworten nach Accept-Encoding."""
+    if (response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.status_code != 200
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers):
+        return response
+    encoding = negotiate_encoding()
+    body, encoding = encode_body(response.get_data(), encoding)
+    if encoding != IDENTITY:
+        response.set_data(body)
+    return _finish(response, encoding)
@@ -1,7 +1,141 @@
 # utils/database.py
 
-from pymongo import MongoClient
+import os
+import threading
+
+from pymongo import MongoClient, monitoring
 from config import Config
+from utils.metrics import command_listener
+from utils.tracing import tracing_listener
+from utils.slow_queries import slow_query_monitor
+
+_client = None
+_client_pid = None
+_pool_listener = None
+_lock = threading.Lock()
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    # Zählt Verbindungen des Pools in diesem Prozess (CMAP-Ereignisse von pymongo)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.checked_out = 0
+        self.created_total = 0
+        self.closed_total = 0
+        self.checkout_failures = 0
+        self.pools_cleared = 0
+
+    def _add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._add(pools_cleared=1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add(open=1, created_total=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(open=-1, closed_total=1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._add(checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        self._add(checked_out=1)
+
+    def connection_checked_in(self, event):
+        self._add(checked_out=-1)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'open': self.open,
+                'checked_out': self.checked_out,
+                'idle': self.open - self.checked_out,
+                'created_total': self.created_total,
+                'closed_total': self.closed_total,
+                'checkout_failures': self.checkout_failures,
+                'pools_cleared': self.pools_cleared,
+            }
+
+
+def client_options():
+    options = {
+        'maxPoolSize': Config.MONGO_MAX_POOL_SIZE,
+        'minPoolSize': Config.MONGO_MIN_POOL_SIZE,
+        'waitQueueTimeoutMS': Config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        'serverSelectionTimeoutMS': Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        'connectTimeoutMS': Config.MONGO_CONNECT_TIMEOUT_MS,
+        'readPreference': Config.MONGO_READ_PREFERENCE,
+        'appname': Config.MONGO_APP_NAME,
+    }
+    if Config.MONGO_COMPRESSORS:
+        options['compressors'] = Config.MONGO_COMPRESSORS
+    return options
+
+
+def get_client():
+    # Ein Client pro Prozess: nach einem Fork (gunicorn, PDF-Worker) wird neu verbunden,
+    # statt Sockets und Monitor-Threads des Elternprozesses zu erben
+    global _client, _client_pid, _pool_listener
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _lock:
+            if _client is None or _client_pid != pid:
+                _pool_listener = PoolStatsListener()
+                listeners = [_pool_listener, command_listener, tracing_listener, slow_query_monitor]
+                _client = MongoClient(Config.MONGODB_URI, event_listeners=listeners, **client_options())
+                _client_pid = pid
+    return _client
+
+
+def get_db():
+    return get_client()[Config.DATABASE_NAME]
+
+
+class _LazyDatabase:
+    # Stellvertreter für "from utils.database import db"; verbindet erst beim ersten Zugriff
+
+    def __getattr__(self, name):
+        return getattr(get_db(), name)
+
+    def __getitem__(self, name):
+        return get_db()[name]
+
+
+db = _LazyDatabase()
+
+
+def ping():
+    # Readiness: Mongo erreichbar und Server ausgewählt
+    get_client().admin.command('ping')
+
 
-client = MongoClient(Config.MONGODB_URI)
-db = client[Config.DATABASE_NAME]
+def pool_stats():
+    get_client()
+    stats = _pool_listener.snapshot()
+    stats.update({
+        'pid': _client_pid,
+        'max_pool_size': Config.MONGO_MAX_POOL_SIZE,
+        'min_pool_size': Config.MONGO_MIN_POOL_SIZE,
+    })
+    return stats
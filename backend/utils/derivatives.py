@@ -0,0 +1,128 @@
+# utils/derivatives.py
+
+import logging
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+from config import Config
+
+# CSS-Pixel im PDF-Template entsprechen 1/96 Zoll
+CSS_DPI = 96
+
+# Feste Varianten: längste Kante in Pixel und JPEG-Qualität
+FIXED_VARIANTS = {
+    'thumbnail': (Config.DERIVATIVE_THUMBNAIL_SIZE, 80),
+    'screen': (Config.DERIVATIVE_SCREEN_SIZE, 85),
+}
+PRINT_QUALITY = 92
+
+_executor = None
+_executor_pid = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    # Pro Prozess anlegen; ein vor dem Fork erzeugter Pool hätte keine Threads
+    global _executor, _executor_pid
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=Config.DERIVATIVE_WORKERS, thread_name_prefix='derivatives')
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def print_variant_sizes(image_elements, dpi=Config.PRINT_DPI):
+    # Zielgröße pro Bildelement: Layoutgröße (CSS-px) auf die Druckauflösung umgerechnet
+    sizes = {}
+    for element in image_elements:
+        try:
+            width = math.ceil(float(element['width']) * dpi / CSS_DPI)
+            height = math.ceil(float(element['height']) * dpi / CSS_DPI)
+        except (KeyError, TypeError, ValueError):
+            continue
+        if width > 0 and height > 0:
+            sizes[f'print_{width}x{height}'] = (width, height)
+    return sizes
+
+
+def variant_path(relative_path, variant):
+    # ab/cd/<hash>.jpg -> derivatives/ab/cd/<hash>_<variant>.jpg
+    directory, filename = relative_path.rsplit('/', 1)
+    digest = filename.split('.', 1)[0]
+    return f"derivatives/{directory}/{digest}_{variant}.jpg"
+
+
+def variant_paths(relative_path, print_sizes):
+    names = list(FIXED_VARIANTS) + list(print_sizes)
+    return {name: variant_path(relative_path, name) for name in names}
+
+
+def _save(image, target_path, quality, icc_profile):
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    tmp_path = f"{target_path}.{threading.get_ident()}.tmp"
+    # Ohne exif=...: EXIF/GPS-Daten werden nicht übernommen, nur das Farbprofil
+    image.save(tmp_path, 'JPEG', quality=quality, optimize=True, progressive=True, icc_profile=icc_profile)
+    os.replace(tmp_path, target_path)
+
+
+def _to_rgb(image):
+    # JPEG kennt keine Transparenz; convert('RGB') würde transparente Bereiche schwarz machen
+    if image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    return image if image.mode == 'RGB' else image.convert('RGB')
+
+
+def _fit_without_upscaling(image, size):
+    width, height = size
+    scale = min(image.width / width, image.height / height, 1.0)
+    target = (max(1, int(width * scale)), max(1, int(height * scale)))
+    return ImageOps.fit(image, target, method=Image.LANCZOS)
+
+
+def generate_derivatives(upload_folder, relative_path, print_sizes):
+    source_path = os.path.join(upload_folder, *relative_path.split('/'))
+    paths = variant_paths(relative_path, print_sizes)
+    with Image.open(source_path) as source:
+        icc_profile = source.info.get('icc_profile')
+        # Kamera-Fotos: Drehung aus EXIF anwenden, bevor die Metadaten wegfallen
+        image = _to_rgb(ImageOps.exif_transpose(source))
+        for name, (longest_edge, quality) in FIXED_VARIANTS.items():
+            target_path = os.path.join(upload_folder, *paths[name].split('/'))
+            if os.path.exists(target_path):
+                continue
+            variant = image.copy()
+            variant.thumbnail((longest_edge, longest_edge), Image.LANCZOS)
+            _save(variant, target_path, quality, icc_profile)
+        for name, size in print_sizes.items():
+            target_path = os.path.join(upload_folder, *paths[name].split('/'))
+            if os.path.exists(target_path):
+                continue
+            _save(_fit_without_upscaling(image, size), target_path, PRINT_QUALITY, icc_profile)
+    return paths
+
+
+def _generate_and_record(db, upload_folder, digest, relative_path, print_sizes):
+    try:
+        paths = generate_derivatives(upload_folder, relative_path, print_sizes)
+        db.user_images.update_many(
+            {'sha256': digest},
+            {'$set': dict({f'variants.{name}': path for name, path in paths.items()}, variants_status='ready')}
+        )
+        logging.debug("Derivatives generated for %s: %s", digest, list(paths))
+    except Exception as e:
+        logging.error(f"Error generating derivatives for {digest}: {e}", exc_info=True)
+        db.user_images.update_many({'sha256': digest}, {'$set': {'variants_status': 'failed'}})
+
+
+def submit_derivatives(db, upload_folder, digest, relative_path, print_sizes):
+    return _get_executor().submit(_generate_and_record, db, upload_folder, digest, relative_path, print_sizes)
+
+
+def derivatives_ready(upload_folder, paths):
+    return all(os.path.exists(os.path.join(upload_folder, *path.split('/'))) for path in paths.values())
@@ -0,0 +1,23 @@
+# utils/etag.py
+
+import hashlib
+from flask import request, Response
+from werkzeug.http import quote_etag
+
+
+def make_etag(*parts):
+    basis = '\x1f'.join('' if part is None else str(part) for part in parts)
+    return hashlib.sha256(basis.encode('utf-8')).hexdigest()
+
+
+def is_not_modified(etag):
+    # If-None-Match wird schwach verglichen (Proxys machen aus starken oft W/-ETags), '*' passt immer
+    return etag is not None and request.if_none_match.contains_weak(etag)
+
+
+def not_modified_response(etag, cache_control):
+    return Response(status=304, headers={'ETag': quote_etag(etag), 'Cache-Control': cache_control})
+
+
+def etag_headers(etag, cache_control):
+    return {'ETag': quote_etag(etag), 'Cache-Control': cache_control}
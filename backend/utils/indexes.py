@@ -0,0 +1,152 @@
+# utils/indexes.py
+
+import argparse
+import logging
+import sys
+import threading
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import PyMongoError
+
+# Alle Indizes, die das Backend benötigt, pro Sammlung
+INDEXES = {
+    'users': [
+        IndexModel([('username', ASCENDING)], name='username_unique', unique=True),
+    ],
+    'personalized_stories': [
+        # Deckt Filter und Sortierung von UserStories inkl. _id als Tie-Breaker ab
+        IndexModel([('user_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)], name='user_id_created_at_id'),
+    ],
+    'user_images': [
+        # Ältere Einträge (vor der Deduplizierung) haben kein sha256 und bleiben außen vor
+        IndexModel([('user_id', ASCENDING), ('sha256', ASCENDING)], name='user_id_sha256', unique=True,
+                   partialFilterExpression={'sha256': {'$exists': True}}),
+    ],
+    'pdf_jobs': [
+        # Höchstens ein aktiver (queued/running) Job pro personalisierter Geschichte
+        IndexModel([('personalized_story_id', ASCENDING)], name='active_personalized_story',
+                   unique=True, partialFilterExpression={'active': True}),
+        IndexModel([('status', ASCENDING), ('created_at', ASCENDING)], name='status_created_at'),
+    ],
+    'stories': [
+        # roles ist ein Array -> Multikey-Index
+        IndexModel([('roles', ASCENDING), ('ageGroup', ASCENDING)], name='roles_ageGroup'),
+        IndexModel([('ageGroup', ASCENDING)], name='ageGroup'),
+        # Schlüssel für utils.ingest_books, nur bei importierten Geschichten gesetzt
+        IndexModel([('ingest.source', ASCENDING)], name='ingest_source', unique=True,
+                   partialFilterExpression={'ingest.source': {'$exists': True}}),
+    ],
+}
+
+# Die Abfragen, die die Ressourcen tatsächlich stellen (mit Beispielwerten für explain)
+QUERY_SHAPES = [
+    {'name': 'auth.login', 'collection': 'users', 'filter': {'username': 'explain'}},
+    {'name': 'personalize.user_stories', 'collection': 'personalized_stories', 'filter': {'user_id': 'explain'},
+     'sort': {'created_at': -1, '_id': -1}},
+    {'name': 'pdf_jobs.claim', 'collection': 'pdf_jobs', 'filter': {'status': 'queued'}, 'sort': {'created_at': 1}},
+    {'name': 'stories.list_by_role', 'collection': 'stories', 'filter': {'roles': 'explain'}},
+    {'name': 'stories.list_by_role_and_age', 'collection': 'stories', 'filter': {'roles': 'explain', 'ageGroup': 3}},
+    {'name': 'stories.list_by_age', 'collection': 'stories', 'filter': {'ageGroup': 3}},
+]
+
+
+def ensure_indexes(db):
+    # create_indexes ist idempotent, solange Name und Optionen übereinstimmen
+    created = {}
+    for collection_name, models in INDEXES.items():
+        try:
+            created[collection_name] = db[collection_name].create_indexes(models)
+        except PyMongoError as e:
+            logging.error(f"Error creating indexes on {collection_name}: {e}")
+    logging.info(f"Indexes ensured: {created}")
+    return created
+
+
+def ensure_indexes_in_background(db):
+    # Den Start der App nicht blockieren, falls Mongo (noch) nicht erreichbar ist
+    thread = threading.Thread(target=ensure_indexes, args=(db,), name='ensure-indexes', daemon=True)
+    thread.start()
+    return thread
+
+
+def missing_indexes(db):
+    missing = []
+    for collection_name, models in INDEXES.items():
+        existing = {index['name'] for index in db[collection_name].list_indexes()}
+        for model in models:
+            if model.document['name'] not in existing:
+                missing.append((collection_name, model.document['name']))
+    return missing
+
+
+def unused_indexes(db):
+    unused = []
+    for collection_name in INDEXES:
+        for stats in db[collection_name].aggregate([{'$indexStats': {}}]):
+            if stats['name'] != '_id_' and stats['accesses']['ops'] == 0:
+                unused.append((collection_name, stats['name']))
+    return unused
+
+
+def plan_stages(plan):
+    stages = []
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            stages.append(plan['stage'])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(plan_stages(value))
+    return stages
+
+
+def explain_query_shapes(db):
+    results = []
+    for shape in QUERY_SHAPES:
+        command = {'find': shape['collection'], 'filter': shape['filter']}
+        if 'sort' in shape:
+            command['sort'] = shape['sort']
+        explained = db.command({'explain': command, 'verbosity': 'executionStats'})
+        stages = plan_stages(explained.get('queryPlanner', {}))
+        results.append({
+            'name': shape['name'],
+            'collection': shape['collection'],
+            'collscan': 'COLLSCAN' in stages,
+            'stages': stages,
+            'docs_examined': explained.get('executionStats', {}).get('totalDocsExamined'),
+        })
+    return results
+
+
+def check_indexes(db, out=sys.stdout):
+    problems = 0
+    for collection_name, name in missing_indexes(db):
+        print(f"MISSING  {collection_name}.{name}", file=out)
+        problems += 1
+    for result in explain_query_shapes(db):
+        status = 'COLLSCAN' if result['collscan'] else 'OK      '
+        print(f"{status} {result['name']} ({result['collection']}): "
+              f"stages={'>'.join(result['stages'])} docsExamined={result['docs_examined']}", file=out)
+        if result['collscan']:
+            problems += 1
+    for collection_name, name in unused_indexes(db):
+        # Nur ein Hinweis, die Zähler gelten seit dem letzten Neustart von mongod
+        print(f"UNUSED   {collection_name}.{name}", file=out)
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mongo index bootstrap and verification')
+    parser.add_argument('command', choices=['apply', 'check'], help='apply: create indexes, check: report missing/unused indexes')
+    args = parser.parse_args(argv)
+
+    from utils.database import db
+    if args.command == 'apply':
+        ensure_indexes(db)
+        return 0
+    return 1 if check_indexes(db) else 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    sys.exit(main())
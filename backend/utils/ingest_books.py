@@ -0,0 +1,303 @@
+# utils/ingest_books.py
+#
+# Importiert mit dem StoryMaker erstellte Bücher (JSON + Bilder) gesammelt in Mongo:
+#
+#   python -m utils.ingest_books ../StoryMaker/book1 --workers 4
+#   python -m utils.ingest_books ../StoryMaker/book1 --dry-run
+#
+# 1. alle Bücher validieren (bei Fehlern wird nichts geschrieben)
+# 2. Bilder in den inhaltsadressierten Upload-Speicher kopieren (utils.upload_store, dedupliziert)
+# 3. lokale Pfade wie C:\Users\...\book1\bild.jpg durch URLs unter /static/uploads/ ersetzen
+# 4. Geschichten per bulk_write anlegen bzw. aktualisieren (Schlüssel: ingest.source)
+# Unveränderte Bücher (gleicher Fingerabdruck aus JSON und Bilddateien) werden übersprungen.
+
+import argparse
+import copy
+import datetime
+import hashlib
+import json
+import logging
+import ntpath
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo import UpdateOne
+
+from config import Config
+from utils.upload_store import CHUNK_SIZE, content_path, normalize_extension, store_stream
+
+DEFAULT_URL_PREFIX = '/static/uploads/'
+
+
+class Book:
+    def __init__(self, path, source, data):
+        self.path = path
+        self.source = source  # Pfad relativ zum Eingabeordner, eindeutiger Schlüssel in Mongo
+        self.data = data
+        self.assets = {}  # Pfad im JSON -> Datei auf diesem Rechner
+        self.errors = []
+        self.fingerprint = None
+
+
+def asset_references(data):
+    """Alle Bildreferenzen eines Buchs als (Container, Schlüssel, Element)."""
+    references = []
+    if data.get('coverImage'):
+        references.append((data, 'coverImage', None))
+    for scene in data.get('scenes', []):
+        if scene.get('background'):
+            references.append((scene, 'background', None))
+        for image in scene.get('imageElements', []):
+            if image.get('imageUrl'):
+                references.append((image, 'imageUrl', image))
+    return references
+
+
+def is_remote(reference):
+    return reference.startswith(('http://', 'https://', '/static/'))
+
+
+def resolve_asset(reference, book_folder, asset_folders=()):
+    """Findet eine Bilddatei zu einem Pfad aus dem StoryMaker.
+
+    Pfade stammen meist von einem Windows-Rechner; passt der Pfad hier nicht,
+    wird der Dateiname im Ordner des Buchs und in ``asset_folders`` gesucht.
+    """
+    if os.path.isfile(reference):
+        return os.path.abspath(reference)
+    # ntpath versteht / und \ als Trenner
+    filename = ntpath.basename(reference)
+    for folder in (book_folder, *asset_folders):
+        candidate = os.path.join(folder, filename)
+        if os.path.isfile(candidate):
+            return os.path.abspath(candidate)
+    return None
+
+
+def validate(data):
+    errors = []
+    if not isinstance(data, dict):
+        return ['book must be a JSON object']
+    if not isinstance(data.get('title'), str) or not data['title'].strip():
+        errors.append('title is missing')
+    scenes = data.get('scenes')
+    if not isinstance(scenes, list) or not scenes:
+        errors.append('scenes must be a non-empty list')
+        return errors
+    for index, scene in enumerate(scenes):
+        if not isinstance(scene, dict):
+            errors.append(f'scene {index}: must be an object')
+            continue
+        if not isinstance(scene.get('pageNumber'), int):
+            errors.append(f'scene {index}: pageNumber must be an integer')
+        for text in scene.get('textElements', []):
+            if not isinstance(text, dict) or not isinstance(text.get('content'), str):
+                errors.append(f'scene {index}: text element without content')
+        for image in scene.get('imageElements', []):
+            if not isinstance(image, dict) or not isinstance(image.get('position'), dict):
+                errors.append(f'scene {index}: image element without position')
+    return errors
+
+
+def load_book(path, root, asset_folders=(), missing_assets='error'):
+    source = os.path.relpath(path, root).replace(os.sep, '/')
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        book = Book(path, source, None)
+        book.errors.append(f'cannot read JSON: {e}')
+        return book
+    book = Book(path, source, data)
+    book.errors = validate(data)
+    if book.errors:
+        return book
+    book_folder = os.path.dirname(path)
+    seen = set()
+    for container, key, image in asset_references(data):
+        reference = container[key]
+        if not isinstance(reference, str):
+            book.errors.append(f'{key}: expected a path, got {type(reference).__name__}')
+            continue
+        if is_remote(reference) or reference in seen:
+            continue
+        seen.add(reference)
+        resolved = resolve_asset(reference, book_folder, asset_folders)
+        if resolved is not None:
+            book.assets[reference] = resolved
+        elif missing_assets == 'error' and not (image and image.get('userProvided')):
+            # Bei userProvided ist das Bild nur ein Platzhalter, das Kind lädt ein eigenes hoch
+            book.errors.append(f'{key}: asset not found: {reference}')
+    book.fingerprint = fingerprint(data, book.assets)
+    return book
+
+
+def fingerprint(data, assets):
+    """Ändert sich, sobald das JSON oder eine der Bilddateien (Größe, Änderungszeit) sich ändert."""
+    sha256 = hashlib.sha256(json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    for reference, path in sorted(assets.items()):
+        stat = os.stat(path)
+        sha256.update(f'\0{reference}\0{stat.st_size}\0{stat.st_mtime_ns}'.encode('utf-8'))
+    return sha256.hexdigest()
+
+
+def find_books(root):
+    paths = []
+    for folder, _, filenames in os.walk(root):
+        paths.extend(os.path.join(folder, name) for name in filenames if name.lower().endswith('.json'))
+    return sorted(paths)
+
+
+class AssetStore:
+    """Kopiert jede Datei höchstens einmal pro Lauf in den Upload-Speicher (threadsicher über den Inhalt)."""
+
+    def __init__(self, upload_folder, url_prefix, dry_run=False):
+        self.upload_folder = upload_folder
+        self.url_prefix = url_prefix
+        self.dry_run = dry_run
+        self._urls = {}
+        self._lock = threading.Lock()
+        # Pfade im Speicher, die dieser Lauf neu angelegt hat; zwei Worker mit demselben Inhalt
+        # können beide "created" melden, gezählt wird der Pfad trotzdem nur einmal
+        self._created_paths = set()
+        self._resolved = 0
+
+    @property
+    def created(self):
+        return len(self._created_paths)
+
+    @property
+    def deduplicated(self):
+        return self._resolved - len(self._created_paths)
+
+    def url_for(self, path):
+        url = self._urls.get(path)
+        if url is not None:
+            return url
+        extension = normalize_extension(path)
+        if self.dry_run:
+            # Nur den künftigen Pfad berechnen, nichts kopieren
+            sha256 = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    sha256.update(chunk)
+            relative_path = content_path(sha256.hexdigest(), extension)
+            created = not os.path.exists(os.path.join(self.upload_folder, *relative_path.split('/')))
+        else:
+            with open(path, 'rb') as f:
+                _, relative_path, _, created = store_stream(f, self.upload_folder, extension)
+        with self._lock:
+            self._resolved += 1
+            if created:
+                self._created_paths.add(relative_path)
+        url = self._urls[path] = self.url_prefix + relative_path
+        return url
+
+
+def rewrite_assets(book, assets):
+    """Kopie des Buchs mit URLs aus dem Upload-Speicher statt lokaler Pfade."""
+    data = copy.deepcopy(book.data)
+    for container, key, _ in asset_references(data):
+        path = book.assets.get(container[key])
+        if path is not None:
+            container[key] = assets.url_for(path)
+        elif not is_remote(container[key]):
+            # Nicht gefunden (nur mit --missing-assets drop oder bei userProvided): lokaler Pfad ist wertlos
+            container[key] = None
+    return data
+
+
+def story_operation(book, data, now):
+    data.pop('_id', None)
+    data['ingest'] = {'source': book.source, 'fingerprint': book.fingerprint, 'ingested_at': now}
+    data['updated_at'] = now
+    # version/updated_at ändern sich, damit Story-Cache und ETags die neue Fassung sehen
+    return UpdateOne(
+        {'ingest.source': book.source},
+        {'$set': data, '$inc': {'version': 1}, '$setOnInsert': {'created_at': now}},
+        upsert=True
+    )
+
+
+def existing_fingerprints(stories, sources):
+    cursor = stories.find({'ingest.source': {'$in': sources}}, {'ingest.source': 1, 'ingest.fingerprint': 1})
+    return {document['ingest']['source']: document['ingest'].get('fingerprint') for document in cursor}
+
+
+def ingest(db, root, upload_folder=None, url_prefix=DEFAULT_URL_PREFIX, workers=4, batch_size=100,
+           asset_folders=(), missing_assets='error', force=False, dry_run=False, out=sys.stdout):
+    upload_folder = upload_folder or Config.UPLOAD_FOLDER
+    paths = find_books(root)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        books = list(executor.map(lambda path: load_book(path, root, asset_folders, missing_assets), paths))
+
+    invalid = [book for book in books if book.errors]
+    for book in invalid:
+        for error in book.errors:
+            print(f"INVALID {book.source}: {error}", file=out)
+    if invalid:
+        # Alles oder nichts: ein halb importierter Katalog ist schwerer zu reparieren
+        print(f"{len(invalid)} of {len(books)} books invalid, nothing imported", file=out)
+        return {'books': len(books), 'invalid': len(invalid), 'skipped': 0, 'upserted': 0, 'modified': 0}
+
+    known = {} if force else existing_fingerprints(db.stories, [book.source for book in books])
+    changed = []
+    for book in books:
+        if known.get(book.source) == book.fingerprint:
+            print(f"UNCHANGED {book.source}", file=out)
+        else:
+            changed.append(book)
+
+    assets = AssetStore(upload_folder, url_prefix, dry_run)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    upserted = modified = 0
+    operations = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Kopieren und Hashen der Bilder parallel, Schreiben nach Mongo gebündelt im Hauptthread
+        for book, data in zip(changed, executor.map(lambda book: rewrite_assets(book, assets), changed)):
+            print(f"{'WOULD IMPORT' if dry_run else 'IMPORT'} {book.source}: {book.data['title']}", file=out)
+            operations.append(story_operation(book, data, now))
+            if len(operations) >= batch_size:
+                upserted, modified = _flush(db, operations, dry_run, upserted, modified)
+                operations = []
+    if operations:
+        upserted, modified = _flush(db, operations, dry_run, upserted, modified)
+
+    print(f"{len(books)} books: {len(changed)} changed, {len(books) - len(changed)} unchanged, "
+          f"{upserted} inserted, {modified} updated; assets {assets.created} stored, "
+          f"{assets.deduplicated} already present", file=out)
+    return {'books': len(books), 'invalid': 0, 'skipped': len(books) - len(changed), 'upserted': upserted, 'modified': modified}
+
+
+def _flush(db, operations, dry_run, upserted, modified):
+    if dry_run:
+        return upserted, modified
+    result = db.stories.bulk_write(operations, ordered=False)
+    return upserted + result.upserted_count, modified + result.modified_count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import StoryMaker books (JSON + images) into Mongo')
+    parser.add_argument('root', help='Folder with book JSON files and their images (searched recursively)')
+    parser.add_argument('--upload-folder', default=Config.UPLOAD_FOLDER, help='Content-addressed image store of the backend')
+    parser.add_argument('--url-prefix', default=DEFAULT_URL_PREFIX, help='URL under which the upload folder is served')
+    parser.add_argument('--asset-folder', action='append', default=[], help='Additional folder to look up images by file name')
+    parser.add_argument('--missing-assets', choices=('error', 'drop'), default='error',
+                        help='error: reject the book, drop: import without the image')
+    parser.add_argument('--workers', type=int, default=4, help='Parallel threads for reading and copying')
+    parser.add_argument('--batch-size', type=int, default=100, help='Stories per bulk_write')
+    parser.add_argument('--force', action='store_true', help='Import unchanged books as well')
+    parser.add_argument('--dry-run', action='store_true', help='Validate and report, write nothing')
+    args = parser.parse_args(argv)
+
+    from utils.database import db
+    result = ingest(db, args.root, args.upload_folder, args.url_prefix, args.workers, args.batch_size,
+                    args.asset_folder, args.missing_assets, args.force, args.dry_run)
+    return 1 if result['invalid'] else 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    sys.exit(main())
@@ -1,13 +1,136 @@
 # utils/logging_config.py
 
+import atexit
+import json
 import logging
+import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
 
-def configure_logging(debug_mode):
-    log_level = logging.DEBUG if debug_mode else logging.WARNING
-    logging.basicConfig(
-        level=log_level,
-        format='%(asctime)s [%(levelname)s] %(message)s',
-        handlers=[
-            logging.StreamHandler()
-        ]
-    )
+# Standard-Level je Umgebung, LOG_LEVEL überschreibt
+ENVIRONMENT_LOG_LEVELS = {
+    'development': 'DEBUG',
+    'testing': 'WARNING',
+    'production': 'WARNING',
+}
+TEXT_FORMAT = '%(asctime)s [%(levelname)s] %(message)s'
+# Attribute jedes LogRecords; alles andere kam über extra= und wird im JSON-Format mit ausgegeben
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'sampled'}
+
+# extra= für häufige DEBUG-Ereignisse im Request-Pfad; diese werden mit LOG_DEBUG_SAMPLE_RATE gesampelt
+HOT_PATH_SAMPLE = {'sampled': True}
+
+_listener = None
+_queue_handler = None
+_queue_size = 0
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler, der die Nachricht nicht im aufrufenden Thread formatiert.
+
+    Der Standard-QueueHandler setzt ``msg % args`` schon in ``prepare()``
+    zusammen. Innerhalb eines Prozesses ist das unnötig: der Record wird
+    unverändert übergeben und erst der QueueListener formatiert ihn.
+
+    Die Queue ist begrenzt: ist sie voll, wird der Record verworfen und gezählt,
+    statt den Request zu blockieren oder unbegrenzt Speicher zu belegen.
+    """
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SamplingFilter(logging.Filter):
+    """Lässt von DEBUG-Records mit ``extra=HOT_PATH_SAMPLE`` nur den Anteil ``rate`` durch."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or not getattr(record, 'sampled', False):
+            return True
+        return self.rate >= 1 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def resolve_log_level(environment, log_level=None):
+    level = log_level or ENVIRONMENT_LOG_LEVELS.get(environment, 'WARNING')
+    return logging.getLevelName(level.upper())
+
+
+def configure_logging(environment, log_level=None, log_format='text', debug_sample_rate=1.0, queue_size=10000):
+    """Loggt über eine Queue: der Request-Thread reiht nur ein, Formatierung und I/O
+    übernimmt der Thread des QueueListeners (einer pro Prozess, siehe _restart_after_fork)."""
+    global _listener, _queue_handler, _queue_size
+    _stop_listener()
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    _queue_size = queue_size
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = _queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(debug_sample_rate))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(resolve_log_level(environment, log_level))
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def _restart_after_fork():
+    # Threads werden nicht mitgeforkt (gunicorn --preload, PDF-Worker): ohne eigenen Listener
+    # würde im Kindprozess niemand die Queue leeren. Neue Queue, da die geerbte ein
+    # gesperrtes Lock enthalten kann; Records des Elternprozesses gibt dieser selbst aus.
+    global _listener
+    if _listener is None:
+        return
+    log_queue = queue.Queue(maxsize=_queue_size)
+    _queue_handler.queue = log_queue
+    _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+@atexit.register
+def _stop_listener():
+    # Restliche Records beim Beenden (oder Neukonfigurieren) noch ausgeben
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,217 @@
+# utils/metrics.py
+
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, request, has_request_context
+from pymongo import monitoring
+
+# Standard-Buckets in Sekunden (wie prometheus_client)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.type_name}']
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self.header()
+        for key, value in items:
+            lines.append(f'{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(value)}')
+        return lines
+
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # Index des ersten Buckets mit le >= value; Werte darüber landen nur in +Inf
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += 1
+            state[2] += value
+
+    def count(self, **labels):
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[1] if state else 0
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, (list(state[0]), state[1], state[2])) for key, state in self._values.items())
+        lines = self.header()
+        for key, (bucket_counts, count, total) in items:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", _format_value(float(bound)))])} {cumulative}')
+            lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", "+Inf")])} {count}')
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {count}')
+        return lines
+
+
+def gauge_lines(name, help_text, samples):
+    """Gauges zum Zeitpunkt des Abrufs, samples = [(labels-dict, wert), ...]."""
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+    for labels, value in samples:
+        lines.append(f'{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}')
+    return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return lines
+
+    def clear(self):
+        for metric in self._metrics:
+            metric.clear()
+
+
+# Alle Werte gelten pro Prozess (bei mehreren Workern aggregiert Prometheus über die Instanzen)
+registry = MetricsRegistry()
+REQUEST_LATENCY = registry.register(Histogram(
+    'http_request_duration_seconds', 'Latency of HTTP requests per resource', ('endpoint', 'method')))
+REQUESTS_TOTAL = registry.register(Counter(
+    'http_requests_total', 'HTTP requests per resource and status code', ('endpoint', 'method', 'status')))
+RESPONSE_SIZE = registry.register(Histogram(
+    'http_response_size_bytes', 'Size of response bodies as sent (after compression)', ('endpoint',), SIZE_BUCKETS))
+REQUEST_MONGO_COMMANDS = registry.register(Histogram(
+    'http_request_mongo_commands', 'Mongo round trips issued by one request', ('endpoint',), COUNT_BUCKETS))
+REQUEST_MONGO_SECONDS = registry.register(Histogram(
+    'http_request_mongo_duration_seconds', 'Time one request spent waiting for Mongo', ('endpoint',)))
+MONGO_COMMAND_LATENCY = registry.register(Histogram(
+    'mongodb_command_duration_seconds', 'Duration of Mongo commands', ('command',)))
+MONGO_COMMAND_FAILURES = registry.register(Counter(
+    'mongodb_command_failures_total', 'Failed Mongo commands', ('command',)))
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Misst Mongo-Befehle und ordnet sie dem Request zu, der sie ausgelöst hat.
+
+    pymongo ruft die Ereignisse im Thread des Aufrufers auf, daher ist der
+    Flask-Request-Kontext hier verfügbar. Befehle aus Hintergrund-Threads
+    zählen nur global.
+    """
+
+    def started(self, event):
+        pass
+
+    def _record(self, event):
+        seconds = event.duration_micros / 1e6
+        MONGO_COMMAND_LATENCY.observe(seconds, command=event.command_name)
+        if has_request_context() and 'metrics_mongo_commands' in g:
+            g.metrics_mongo_commands += 1
+            g.metrics_mongo_seconds += seconds
+        return seconds
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+        MONGO_COMMAND_FAILURES.inc(command=event.command_name)
+
+
+command_listener = CommandMetricsListener()
+
+
+def start_request_timer():
+    # before_request-Hook
+    g.metrics_started = time.perf_counter()
+    g.metrics_mongo_commands = 0
+    g.metrics_mongo_seconds = 0.0
+
+
+def record_request(response):
+    """after_request-Hook: Latenz, Status, Größe und Mongo-Anteil pro Resource."""
+    started = g.get('metrics_started')
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    endpoint = request.endpoint or 'unmatched'
+    REQUEST_LATENCY.observe(elapsed, endpoint=endpoint, method=request.method)
+    REQUESTS_TOTAL.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    if not response.direct_passthrough:
+        RESPONSE_SIZE.observe(response.calculate_content_length() or 0, endpoint=endpoint)
+    REQUEST_MONGO_COMMANDS.observe(g.metrics_mongo_commands, endpoint=endpoint)
+    REQUEST_MONGO_SECONDS.observe(g.metrics_mongo_seconds, endpoint=endpoint)
+    # Für die Browser-DevTools: Anteil von Mongo an der Antwortzeit
+    response.headers.add(
+        'Server-Timing',
+        f'mongo;dur={g.metrics_mongo_seconds * 1000:.1f};desc="{g.metrics_mongo_commands} commands", app;dur={elapsed * 1000:.1f}'
+    )
+    return response
@@ -0,0 +1,87 @@
+# utils/migrate_overlays.py
+
+import argparse
+import logging
+import sys
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+from utils.personalization import OVERLAY_FORMAT, merge_scenes, normalize_image_overrides, snapshot_template
+from utils.story_cache import story_cache
+
+
+def derive_image_overrides(template_scenes, scenes):
+    # PersonalizeStory setzt pro Szene alle Bildelemente auf dieselbe URL
+    overrides = {}
+    for index, (template_scene, scene) in enumerate(zip(template_scenes, scenes)):
+        template_images = template_scene.get('imageElements', [])
+        for template_image, image in zip(template_images, scene.get('imageElements', [])):
+            if image.get('imageUrl') != template_image.get('imageUrl'):
+                overrides[str(index)] = image.get('imageUrl')
+                break
+    return normalize_image_overrides(overrides)
+
+
+def convert(stories, p_story_data):
+    """Liefert das $set-Dokument für das Overlay oder None, falls nicht verlustfrei möglich."""
+    story_id = p_story_data.get('story_id')
+    if not story_id or not ObjectId.is_valid(story_id):
+        return None
+    original_story, version = story_cache.get_with_etag(stories, story_id)
+    if original_story is None:
+        return None
+    scenes = p_story_data.get('scenes', [])
+    template_scenes = original_story.get('scenes', [])
+    if len(scenes) != len(template_scenes):
+        return None
+    image_overrides = derive_image_overrides(template_scenes, scenes)
+    personal_data = p_story_data.get('personal_data') or {}
+    # Nur umwandeln, wenn das Overlay exakt die gespeicherten Szenen ergibt
+    if merge_scenes(story_id, version, original_story, personal_data, image_overrides) != scenes:
+        return None
+    return {
+        'format': OVERLAY_FORMAT,
+        'story_version': version,
+        'image_overrides': image_overrides,
+    }
+
+
+def migrate(db, batch_size=500, dry_run=False, out=sys.stdout):
+    converted = skipped = 0
+    operations = []
+    for p_story_data in db.personalized_stories.find({'format': {'$ne': OVERLAY_FORMAT}, 'scenes': {'$exists': True}}):
+        fields = convert(db.stories, p_story_data)
+        if fields is None:
+            skipped += 1
+            print(f"SKIP {p_story_data['_id']}: overlay would not reproduce stored scenes", file=out)
+            continue
+        converted += 1
+        if not dry_run:
+            # Die Szenen dieser Version bleiben erhalten, auch wenn die Vorlage später geändert wird
+            snapshot_template(db.stories, p_story_data['story_id'], fields['story_version'],
+                              story_cache.get(db.stories, p_story_data['story_id']))
+        operations.append(UpdateOne({'_id': p_story_data['_id']}, {'$set': fields, '$unset': {'scenes': ''}}))
+        if len(operations) >= batch_size:
+            if not dry_run:
+                db.personalized_stories.bulk_write(operations, ordered=False)
+            operations = []
+    if operations and not dry_run:
+        db.personalized_stories.bulk_write(operations, ordered=False)
+    print(f"{'Would convert' if dry_run else 'Converted'} {converted} personalized stories, skipped {skipped}", file=out)
+    return converted, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert personalized stories with full scene copies into overlays')
+    parser.add_argument('--dry-run', action='store_true', help='Only report what would be converted')
+    parser.add_argument('--batch-size', type=int, default=500, help='Updates per bulk_write')
+    args = parser.parse_args(argv)
+
+    from utils.database import db
+    migrate(db, batch_size=args.batch_size, dry_run=args.dry_run)
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    sys.exit(main())
@@ -0,0 +1,18 @@
+# utils/operators.py
+
+from functools import wraps
+from flask import current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+def is_operator(user_id):
+    return user_id in current_app.config['OPERATOR_USER_IDS']
+
+def operator_required(fn):
+    # Jeder kann sich registrieren, ein gültiges JWT allein reicht für Betriebsdaten nicht
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        if not is_operator(get_jwt_identity()):
+            return {'message': 'Operator access required'}, 403
+        return fn(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,72 @@
+# utils/pagination.py
+
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from flask import current_app
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class InvalidPageRequest(ValueError):
+    pass
+
+
+def parse_limit(value):
+    default = current_app.config['PAGE_SIZE_DEFAULT']
+    maximum = current_app.config['PAGE_SIZE_MAX']
+    if value is None or value == '':
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise InvalidPageRequest('Invalid limit')
+    if limit < 1:
+        raise InvalidPageRequest('Invalid limit')
+    return min(limit, maximum)
+
+
+def parse_object_id_cursor(value):
+    if value is None or value == '':
+        return None
+    if not ObjectId.is_valid(value):
+        raise InvalidPageRequest('Invalid cursor')
+    return ObjectId(value)
+
+
+def fetch_page(cursor, limit):
+    # Ein Dokument mehr holen, um zu wissen, ob es eine weitere Seite gibt
+    documents = list(cursor.limit(limit + 1))
+    has_more = len(documents) > limit
+    return documents[:limit], has_more
+
+
+def encode_time_cursor(created_at, oid):
+    # Mongo speichert Datumswerte auf Millisekunden genau
+    millis = 'null' if created_at is None else str((created_at.replace(tzinfo=None) - EPOCH) // timedelta(milliseconds=1))
+    return f"{millis}_{oid}"
+
+
+def parse_time_cursor(value):
+    if value is None or value == '':
+        return None
+    millis, _, oid = value.partition('_')
+    if not ObjectId.is_valid(oid):
+        raise InvalidPageRequest('Invalid cursor')
+    if millis == 'null':
+        return None, ObjectId(oid)
+    try:
+        return EPOCH + timedelta(milliseconds=int(millis)), ObjectId(oid)
+    except (ValueError, OverflowError):
+        raise InvalidPageRequest('Invalid cursor')
+
+
+def time_cursor_query(cursor):
+    # Nächste Seite bei Sortierung (created_at absteigend, _id absteigend)
+    created_at, oid = cursor
+    if created_at is None:
+        return {'created_at': None, '_id': {'$lt': oid}}
+    return {'$or': [
+        {'created_at': {'$lt': created_at}},
+        {'created_at': created_at, '_id': {'$lt': oid}},
+        {'created_at': None}
+    ]}
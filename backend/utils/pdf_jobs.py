@@ -0,0 +1,151 @@
+# utils/pdf_jobs.py
+
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+# Ablauf eines Jobs: queued -> running -> done | failed
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# Workers melden sich regelmäßig; wer länger schweigt, zählt nicht mehr zum Pool
+WORKER_ALIVE_SECONDS = 30
+
+
+class QueueFullError(Exception):
+    pass
+
+
+def job_to_dict(job):
+    return {
+        'id': str(job['_id']),
+        'personalized_story_id': job.get('personalized_story_id'),
+        'status': job.get('status'),
+        'stage': job.get('stage'),
+        'progress': job.get('progress', 0.0),
+        'pdf_path': job.get('pdf_path'),
+        'error': job.get('error'),
+        'attempts': job.get('attempts', 0),
+        'created_at': job['created_at'].isoformat() if job.get('created_at') else None,
+        'finished_at': job['finished_at'].isoformat() if job.get('finished_at') else None,
+    }
+
+
+def enqueue_job(db, personalized_story_id, user_id, max_depth):
+    """Legt einen Job an oder liefert den laufenden Job derselben Geschichte.
+
+    Gibt ``(job, created)`` zurück. Die Deduplizierung übernimmt der partielle
+    Unique-Index auf ``personalized_story_id`` für ``active: True``.
+    """
+    existing = db.pdf_jobs.find_one({'personalized_story_id': personalized_story_id, 'active': True})
+    if existing:
+        return existing, False
+    if db.pdf_jobs.count_documents({'status': QUEUED}) >= max_depth:
+        raise QueueFullError('PDF queue is full')
+    now = datetime.utcnow()
+    job = {
+        'personalized_story_id': personalized_story_id,
+        'user_id': user_id,
+        'status': QUEUED,
+        'active': True,
+        'stage': QUEUED,
+        'progress': 0.0,
+        'pdf_path': None,
+        'error': None,
+        'attempts': 0,
+        'created_at': now,
+        'updated_at': now,
+    }
+    try:
+        job['_id'] = db.pdf_jobs.insert_one(job).inserted_id
+    except DuplicateKeyError:
+        # Gleichzeitig angelegt: den anderen Job verwenden
+        return db.pdf_jobs.find_one({'personalized_story_id': personalized_story_id, 'active': True}), False
+    return job, True
+
+
+def get_job(db, job_id):
+    return db.pdf_jobs.find_one({'_id': ObjectId(job_id)})
+
+
+def claim_next_job(db, worker_id):
+    now = datetime.utcnow()
+    return db.pdf_jobs.find_one_and_update(
+        {'status': QUEUED},
+        {
+            '$set': {'status': RUNNING, 'stage': 'starting', 'worker_id': worker_id,
+                     'started_at': now, 'heartbeat_at': now, 'updated_at': now},
+            '$inc': {'attempts': 1}
+        },
+        sort=[('created_at', 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def update_progress(db, job_id, progress, stage):
+    now = datetime.utcnow()
+    db.pdf_jobs.update_one(
+        {'_id': job_id, 'status': RUNNING},
+        {'$set': {'progress': progress, 'stage': stage, 'heartbeat_at': now, 'updated_at': now}}
+    )
+
+
+def complete_job(db, job_id, pdf_path):
+    now = datetime.utcnow()
+    db.pdf_jobs.update_one(
+        {'_id': job_id},
+        {'$set': {'status': DONE, 'stage': DONE, 'progress': 1.0, 'pdf_path': pdf_path,
+                  'finished_at': now, 'updated_at': now},
+         '$unset': {'active': ''}}
+    )
+
+
+def fail_job(db, job_id, error):
+    now = datetime.utcnow()
+    db.pdf_jobs.update_one(
+        {'_id': job_id},
+        {'$set': {'status': FAILED, 'stage': FAILED, 'error': error, 'finished_at': now, 'updated_at': now},
+         '$unset': {'active': ''}}
+    )
+
+
+def requeue_stale_jobs(db, stale_after, max_attempts):
+    # Jobs abgestürzter Worker wieder einreihen bzw. nach zu vielen Versuchen aufgeben
+    now = datetime.utcnow()
+    stale = {'status': RUNNING, 'heartbeat_at': {'$lt': now - timedelta(seconds=stale_after)}}
+    failed = db.pdf_jobs.update_many(
+        dict(stale, attempts={'$gte': max_attempts}),
+        {'$set': {'status': FAILED, 'stage': FAILED, 'error': 'Worker timed out',
+                  'finished_at': now, 'updated_at': now},
+         '$unset': {'active': ''}}
+    )
+    requeued = db.pdf_jobs.update_many(
+        dict(stale, attempts={'$lt': max_attempts}),
+        {'$set': {'status': QUEUED, 'stage': QUEUED, 'worker_id': None, 'updated_at': now}}
+    )
+    return requeued.modified_count, failed.modified_count
+
+
+def register_worker(db, worker_id, pid, busy):
+    db.pdf_workers.update_one(
+        {'_id': worker_id},
+        {'$set': {'pid': pid, 'busy': busy, 'last_seen': datetime.utcnow()}},
+        upsert=True
+    )
+
+
+def unregister_worker(db, worker_id):
+    db.pdf_workers.delete_one({'_id': worker_id})
+
+
+def queue_stats(db):
+    alive_since = datetime.utcnow() - timedelta(seconds=WORKER_ALIVE_SECONDS)
+    return {
+        'queued': db.pdf_jobs.count_documents({'status': QUEUED}),
+        'running': db.pdf_jobs.count_documents({'status': RUNNING}),
+        'workers': db.pdf_workers.count_documents({'last_seen': {'$gte': alive_since}}),
+        'busy_workers': db.pdf_workers.count_documents({'last_seen': {'$gte': alive_since}, 'busy': True}),
+    }
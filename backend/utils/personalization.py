@@ -0,0 +1,180 @@
+# utils/personalization.py
+
+import copy
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from config import Config
+from utils.placeholders import compiled_stories, personalize_scenes
+from utils.story_cache import story_cache
+
+# Personalisierte Geschichten werden als Overlay auf die Vorlage gespeichert:
+# Verweis auf Vorlage + Version, personal_data und Bild-Overrides pro Szene.
+# Die Version ist festgeschrieben: ändert sich die Vorlage oder wird sie gelöscht,
+# werden die Szenen aus dem Snapshot dieser Version in ``story_versions`` gelesen.
+OVERLAY_FORMAT = 'overlay'
+SNAPSHOT_COLLECTION = 'story_versions'
+
+
+class TemplateNotFound(Exception):
+    """Weder die Vorlage noch ein Snapshot der festgeschriebenen Version existiert."""
+
+
+def is_overlay(p_story_data):
+    return p_story_data.get('format') == OVERLAY_FORMAT
+
+
+def normalize_image_overrides(user_images):
+    # Erwartet {'<Szenenindex>': url}; alles andere wird verworfen
+    if not isinstance(user_images, dict):
+        return {}
+    return {str(index): url for index, url in user_images.items() if isinstance(url, str) and url}
+
+
+def build_overlay(user_id, story_id, story_version, original_story, personal_data, image_overrides):
+    return {
+        'format': OVERLAY_FORMAT,
+        'user_id': user_id,
+        'story_id': story_id,
+        'story_version': story_version,
+        'title': original_story.get('title', ''),
+        'description': original_story.get('description', ''),
+        'coverImage': original_story.get('coverImage'),
+        'personal_data': personal_data,
+        'image_overrides': image_overrides,
+        'created_at': datetime.utcnow()
+    }
+
+
+def merge_scenes(story_id, story_version, original_story, personal_data, image_overrides):
+    scenes = []
+    for index, scene in enumerate(original_story.get('scenes', [])):
+        # Tiefe Kopie, die Vorlage aus dem Cache darf nicht verändert werden
+        merged_scene = copy.deepcopy(scene)
+        if str(index) in image_overrides:
+            for img_elem in merged_scene.get('imageElements', []):
+                img_elem['imageUrl'] = image_overrides[str(index)]
+        scenes.append(merged_scene)
+    compiled = compiled_stories.get(story_id, story_version, original_story.get('scenes', []))
+    return personalize_scenes(scenes, compiled, personal_data)
+
+
+class LRUCache:
+    """Kleiner threadsicherer LRU-Cache für unveränderliche Werte.
+
+    Die Werte werden geteilt und dürfen nicht verändert werden.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Zusammengeführte Szenen pro (personalisierte Geschichte, Vorlagenversion)
+materialized_stories = LRUCache(Config.MATERIALIZED_CACHE_MAX_ENTRIES)
+# Snapshots sind unveränderlich und werden pro (Geschichte, Version) gehalten
+template_snapshots = LRUCache(Config.TEMPLATE_SNAPSHOT_CACHE_MAX_ENTRIES)
+
+
+def _snapshots(stories):
+    return stories.database[SNAPSHOT_COLLECTION]
+
+
+def snapshot_template(stories, story_id, version, original_story):
+    """Hält die Szenen der Vorlage in dieser Version fest (einmal pro Version, beim Personalisieren)."""
+    key = (str(story_id), version)
+    if template_snapshots.get(key):
+        return
+    snapshot = {
+        'story_id': str(story_id),
+        'version': version,
+        'scenes': original_story.get('scenes', []),
+        'created_at': datetime.utcnow()
+    }
+    # Gleiche Version = gleicher Inhalt (Hash), ein bereits vorhandener Snapshot bleibt unverändert
+    _snapshots(stories).update_one({'_id': f"{story_id}:{version}"}, {'$setOnInsert': snapshot}, upsert=True)
+    template_snapshots.put(key, snapshot)
+
+
+def _load_snapshot(stories, story_id, version):
+    key = (str(story_id), version)
+    snapshot = template_snapshots.get(key)
+    if snapshot is None:
+        snapshot = _snapshots(stories).find_one({'_id': f"{story_id}:{version}"})
+        # False merkt sich fehlende Snapshots (Overlays von vor den Snapshots)
+        template_snapshots.put(key, snapshot or False)
+    return snapshot or None
+
+
+def pinned_template(stories, p_story_data):
+    """Vorlage in der Version, mit der personalisiert wurde: ``(Vorlage, Version)``.
+
+    Overlays von vor den Snapshots fallen auf die aktuelle Vorlage zurück. Gibt es
+    weder Snapshot noch Vorlage, wird ``TemplateNotFound`` ausgelöst.
+    """
+    story_id = p_story_data['story_id']
+    pinned = p_story_data.get('story_version')
+    original_story, version = story_cache.get_with_etag(stories, story_id)
+    if original_story is not None and (pinned is None or version == pinned):
+        return original_story, version
+    snapshot = _load_snapshot(stories, story_id, pinned) if pinned is not None else None
+    if snapshot is not None:
+        return snapshot, pinned
+    if original_story is None:
+        logging.warning(f"Template story not found for personalized story {p_story_data.get('_id')}: {story_id}")
+        raise TemplateNotFound(story_id)
+    logging.warning(f"No snapshot of template {story_id} version {pinned}, using current version for {p_story_data.get('_id')}")
+    return original_story, version
+
+
+def template_version(stories, p_story_data):
+    # Version der Vorlage, aus der die Szenen stammen (ETag, PDF-Cache); nur für Overlays relevant
+    if not is_overlay(p_story_data):
+        return None
+    return pinned_template(stories, p_story_data)[1]
+
+
+def materialize(stories, p_story_data):
+    # Alte Dokumente enthalten die Szenen bereits vollständig
+    if not is_overlay(p_story_data):
+        return p_story_data
+    story_id = p_story_data['story_id']
+    pinned = p_story_data.get('story_version')
+    # Szenen einer festgeschriebenen Version ändern sich nie, dann ohne Blick auf die Vorlage
+    version = pinned
+    scenes = materialized_stories.get((str(p_story_data.get('_id')), pinned)) if pinned is not None else None
+    if scenes is None:
+        original_story, version = pinned_template(stories, p_story_data)
+        key = (str(p_story_data.get('_id')), version)
+        scenes = materialized_stories.get(key)
+        if scenes is None:
+            scenes = merge_scenes(
+                story_id,
+                version,
+                original_story,
+                p_story_data.get('personal_data') or {},
+                p_story_data.get('image_overrides') or {}
+            )
+            materialized_stories.put(key, scenes)
+    return dict(p_story_data, scenes=scenes, template_version=version)
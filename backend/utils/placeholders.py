@@ -0,0 +1,89 @@
+# utils/placeholders.py
+
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+PLACEHOLDER_PATTERN = re.compile(r'\{([A-Za-z_][A-Za-z0-9_]*)\}')
+
+# Standardwerte wie bisher in PersonalizeStory
+DEFAULT_VALUES = {'child_name': '...', 'role': '...'}
+
+
+@lru_cache(maxsize=4096)
+def compile_text(text):
+    # re.split liefert abwechselnd Literal, Name, Literal, ... (immer ein Literal mehr)
+    parts = PLACEHOLDER_PATTERN.split(text or '')
+    return tuple(parts[0::2]), tuple(parts[1::2])
+
+
+def render(compiled, values):
+    literals, names = compiled
+    if not names:
+        return literals[0]
+    out = [literals[0]]
+    for name, literal in zip(names, literals[1:]):
+        # Unbekannte Platzhalter bleiben unverändert stehen
+        value = values.get(name)
+        out.append('{' + name + '}' if value is None else value)
+        out.append(literal)
+    return ''.join(out)
+
+
+def placeholder_values(personal_data):
+    values = dict(DEFAULT_VALUES)
+    for key, value in (personal_data or {}).items():
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            values[key] = str(value)
+    return values
+
+
+def personalize_text(text, personal_data):
+    return render(compile_text(text), placeholder_values(personal_data))
+
+
+class CompiledStoryCache:
+    """Vorkompilierte Textelemente pro Geschichte und Version.
+
+    Ergebnis von ``get``: pro Szene eine Liste der kompilierten Textelemente,
+    in derselben Reihenfolge wie ``scene['textElements']``.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, story_id, version, scenes):
+        key = (str(story_id), version)
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                return compiled
+        compiled = [
+            [compile_text(text_elem.get('content', '')) for text_elem in scene.get('textElements', [])]
+            for scene in scenes
+        ]
+        with self._lock:
+            self._entries[key] = compiled
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+compiled_stories = CompiledStoryCache()
+
+
+def personalize_scenes(scenes, compiled, personal_data):
+    # Ersetzt alle Platzhalter in einem Durchlauf pro Textelement (in-place)
+    values = placeholder_values(personal_data)
+    for scene, compiled_texts in zip(scenes, compiled):
+        for text_elem, segments in zip(scene.get('textElements', []), compiled_texts):
+            text_elem['content'] = render(segments, values)
+    return scenes
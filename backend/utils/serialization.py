@@ -0,0 +1,63 @@
+# utils/serialization.py
+
+import json
+from datetime import date, datetime
+from bson.objectid import ObjectId
+from flask import make_response, current_app
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - Fallback auf die Standardbibliothek
+    orjson = None
+
+JSON_MIMETYPE = 'application/json'
+
+
+def default(obj):
+    # Typen, die weder orjson noch json kennen; orjson ruft dies für jedes solche Objekt auf
+    encoder = _ENCODERS.get(type(obj))
+    if encoder is not None:
+        return encoder(obj)
+    # Modelle und Modell-Listen (models.base): orjson braucht pro Modell ein flaches Dict, dessen
+    # Werte (Szenen usw.) Referenzen in das Mongo-Dokument sind und nicht kopiert werden
+    to_json = getattr(obj, '__json__', None)
+    if to_json is not None:
+        return to_json()
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# Exakte Typen zuerst per Dict-Lookup statt isinstance-Kette
+_ENCODERS = {ObjectId: str, datetime: datetime.isoformat, date: date.isoformat}
+
+
+def dumps(data, indent=False):
+    """Serialisiert data zu UTF-8-Bytes, mit orjson falls installiert."""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(data, default=default, option=option)
+    return json.dumps(data, default=default, indent=2 if indent else None,
+                      ensure_ascii=False, separators=None if indent else (',', ':')).encode('utf-8')
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_body(data):
+    # Antwortkörper wie bei output_json, z.B. für vorab komprimierte Cache-Einträge
+    return dumps(data, indent=current_app.debug) + b'\n'
+
+
+def output_json(data, code, headers=None):
+    """Representation für flask-restful, ersetzt den Standard mit json.dumps."""
+    body = json_body(data)
+    resp = make_response(body, code)
+    resp.headers.extend(headers or {})
+    resp.mimetype = JSON_MIMETYPE
+    return resp
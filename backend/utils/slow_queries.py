@@ -0,0 +1,251 @@
+# utils/slow_queries.py
+
+import datetime
+import json
+import logging
+import os
+import queue
+import random
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+import bson
+from flask import request, has_request_context
+from pymongo import monitoring
+from config import Config
+from utils.indexes import plan_stages
+from utils.tracing import tracer
+
+# Befehle, die als langsame Abfrage erfasst werden; nur lesende werden per explain analysiert
+WATCHED_COMMANDS = {'find', 'aggregate', 'count', 'distinct', 'getMore', 'findAndModify', 'update', 'delete', 'insert'}
+# Felder, die explain für den jeweiligen Befehl braucht (ohne lsid, $clusterTime, $readPreference ...)
+EXPLAIN_FIELDS = {
+    'find': ('filter', 'projection', 'sort', 'limit', 'skip', 'hint', 'collation'),
+    'aggregate': ('pipeline', 'hint', 'collation'),
+    'count': ('query', 'limit', 'skip', 'hint', 'collation'),
+    'distinct': ('key', 'query', 'collation'),
+}
+REDACTED = '?'
+
+
+def command_filter(command_name, command):
+    if command_name == 'find':
+        return command.get('filter')
+    if command_name in ('count', 'distinct', 'findAndModify'):
+        return command.get('query')
+    if command_name == 'aggregate':
+        pipeline = command.get('pipeline') or [{}]
+        return pipeline[0].get('$match')
+    if command_name in ('update', 'delete'):
+        statements = command.get('updates' if command_name == 'update' else 'deletes') or [{}]
+        return statements[0].get('q')
+    return None
+
+
+def redact(value):
+    """Ersetzt Werte durch '?' und behält Feldnamen und Operatoren (Form der Abfrage)."""
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return REDACTED
+
+
+def _returned_documents(command_name, reply):
+    cursor = reply.get('cursor')
+    if isinstance(cursor, dict):
+        return cursor.get('firstBatch') or cursor.get('nextBatch') or []
+    if command_name == 'findAndModify':
+        return [reply['value']] if reply.get('value') else []
+    if command_name == 'distinct':
+        return reply.get('values') or []
+    return []
+
+
+def summarize_explain(explained):
+    stats = explained.get('executionStats', {})
+    stages = plan_stages(explained.get('queryPlanner', {}).get('winningPlan', {}))
+    return {
+        'stages': stages,
+        'collscan': 'COLLSCAN' in stages,
+        'docs_examined': stats.get('totalDocsExamined'),
+        'keys_examined': stats.get('totalKeysExamined'),
+        'returned': stats.get('nReturned'),
+        'execution_ms': stats.get('executionTimeMillis'),
+        'execution_stats': stats,
+    }
+
+
+def _default_database(name):
+    # Erst beim ersten explain importieren, utils.database registriert diesen Listener
+    from utils.database import get_client
+    return get_client()[name]
+
+
+class SlowQueryMonitor(monitoring.CommandListener):
+    """Erfasst Mongo-Befehle über ``threshold_ms`` samt Filter, Projektion und Antwortgröße.
+
+    Im Thread des Aufrufers werden nur Referenzen gemerkt und in eine Queue gelegt;
+    Größenberechnung, explain("executionStats") für einen Anteil ``explain_sample_rate``
+    und das Schreiben ins rotierende Log übernimmt ein Hintergrund-Thread.
+    """
+
+    def __init__(self, threshold_ms, explain_sample_rate=0.1, ring_size=500, log_path=None,
+                 max_bytes=10 * 1024 * 1024, backups=5, redact_values=True, enabled=True,
+                 database=_default_database, queue_size=1000):
+        self.threshold_micros = threshold_ms * 1000
+        self.explain_sample_rate = explain_sample_rate
+        self.log_path = log_path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.redact_values = redact_values
+        self.enabled = enabled
+        self.database = database
+        self.dropped = 0
+        self._entries = deque(maxlen=ring_size)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._thread_pid = None
+        self._handler = None
+
+    # --- CommandListener, läuft im Thread des Aufrufers ---
+
+    def started(self, event):
+        if not self.enabled or event.command_name not in WATCHED_COMMANDS:
+            return
+        # Das Kommando-Dokument wird nach dem Senden nicht mehr verändert, eine Referenz genügt
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = event.command
+
+    def succeeded(self, event):
+        if not self.enabled or event.command_name not in WATCHED_COMMANDS:
+            return
+        with self._lock:
+            command = self._pending.pop((event.connection_id, event.request_id), None)
+        if command is None or event.duration_micros < self.threshold_micros:
+            return
+        span = tracer.current_span()
+        context = {
+            'time': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'endpoint': request.endpoint if has_request_context() else None,
+            'trace_id': span.trace_id if span is not None else None,
+        }
+        self._submit((event.command_name, event.database_name, command, event.reply, event.duration_micros, context))
+
+    def failed(self, event):
+        with self._lock:
+            self._pending.pop((event.connection_id, event.request_id), None)
+
+    def _submit(self, item):
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Lieber Einträge verlieren als Requests bremsen
+            self.dropped += 1
+
+    # --- Hintergrund-Thread ---
+
+    def _ensure_thread(self):
+        if self._thread is None or self._thread_pid != os.getpid():
+            with self._lock:
+                if self._thread is None or self._thread_pid != os.getpid():
+                    self._thread = threading.Thread(target=self._run, name='slow-query-log', daemon=True)
+                    self._thread_pid = os.getpid()
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                self.record(*item)
+            except Exception as e:
+                logging.warning(f"Slow query could not be recorded: {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        # Wartet, bis alle eingereihten Einträge geschrieben sind (Tests, Herunterfahren)
+        self._queue.join()
+
+    def build_entry(self, command_name, database_name, command, reply, duration_micros, context=None):
+        # Bei getMore steht unter dem Befehlsnamen die Cursor-ID
+        collection = command.get('collection' if command_name == 'getMore' else command_name)
+        query_filter = command_filter(command_name, command)
+        documents = _returned_documents(command_name, reply or {})
+        entry = {
+            'time': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'duration_ms': duration_micros / 1000,
+            'database': database_name,
+            'collection': collection if isinstance(collection, str) else None,
+            'command': command_name,
+            'filter': redact(query_filter) if self.redact_values and query_filter is not None else query_filter,
+            'projection': command.get('projection') or command.get('fields'),
+            'sort': command.get('sort'),
+            'limit': command.get('limit'),
+            'docs_returned': len(documents),
+            'returned_bytes': sum(len(bson.encode(document)) for document in documents if isinstance(document, dict)),
+            'explain': None,
+        }
+        entry.update(context or {})
+        return entry
+
+    def explain(self, command_name, database_name, command):
+        explain_command = {command_name: command[command_name]}
+        for field in EXPLAIN_FIELDS[command_name]:
+            if field in command:
+                explain_command[field] = command[field]
+        if command_name == 'aggregate':
+            explain_command['cursor'] = {}
+        explained = self.database(database_name).command({'explain': explain_command, 'verbosity': 'executionStats'})
+        return summarize_explain(explained)
+
+    def record(self, command_name, database_name, command, reply, duration_micros, context=None):
+        entry = self.build_entry(command_name, database_name, command, reply, duration_micros, context)
+        if command_name in EXPLAIN_FIELDS and random.random() < self.explain_sample_rate:
+            try:
+                entry['explain'] = self.explain(command_name, database_name, command)
+            except Exception as e:
+                entry['explain'] = {'error': str(e)}
+        # default=str für ObjectId, datetime, Regex ...; Ringpuffer und Log sehen dasselbe JSON
+        line = json.dumps(entry, default=str, ensure_ascii=False)
+        entry = json.loads(line)
+        self._entries.append(entry)
+        self._log(line)
+        return entry
+
+    def _log(self, line):
+        if not self.log_path:
+            return
+        if self._handler is None:
+            os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+            # Eigener Handler statt Logger: nicht zusätzlich im normalen App-Log
+            self._handler = RotatingFileHandler(self.log_path, maxBytes=self.max_bytes, backupCount=self.backups, encoding='utf-8')
+        self._handler.handle(logging.makeLogRecord({'msg': line, 'levelno': logging.INFO, 'levelname': 'INFO'}))
+
+    def close(self):
+        if self._handler is not None:
+            self._handler.close()
+            self._handler = None
+
+    def entries(self, collection=None, limit=None):
+        entries = [entry for entry in list(self._entries) if collection is None or entry['collection'] == collection]
+        return entries[-limit:] if limit else entries
+
+    def clear(self):
+        self._entries.clear()
+
+
+slow_query_monitor = SlowQueryMonitor(
+    Config.SLOW_QUERY_THRESHOLD_MS,
+    explain_sample_rate=Config.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    ring_size=Config.SLOW_QUERY_RING_SIZE,
+    log_path=Config.SLOW_QUERY_LOG_PATH,
+    max_bytes=Config.SLOW_QUERY_LOG_MAX_BYTES,
+    backups=Config.SLOW_QUERY_LOG_BACKUPS,
+    redact_values=Config.SLOW_QUERY_REDACT,
+    enabled=Config.SLOW_QUERY_ENABLED,
+)
@@ -0,0 +1,168 @@
+# utils/story_cache.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import bson
+from bson.objectid import ObjectId
+from config import Config
+
+# Felder, an denen eine Änderung der Vorlage erkannt wird
+VERSION_PROJECTION = {'version': 1, 'updated_at': 1}
+
+
+def story_version(document):
+    return (document.get('version'), document.get('updated_at'))
+
+
+class _Entry:
+    __slots__ = ('document', 'version', 'size', 'etag', 'expires_at', 'encoded')
+
+    def __init__(self, document, size, etag, expires_at):
+        self.document = document
+        self.version = story_version(document)
+        self.size = size
+        self.etag = etag
+        self.expires_at = expires_at
+        # Serialisierte/komprimierte Antwortkörper je Kodierung, siehe encoded_body()
+        self.encoded = {}
+
+
+class StoryCache:
+    """LRU-Cache für Geschichten-Vorlagen aus ``db.stories``.
+
+    Begrenzt nach Anzahl der Einträge und nach Bytes (BSON-Größe). Nach Ablauf
+    der TTL wird nur ``version``/``updated_at`` aus Mongo gelesen; ist die
+    Version unverändert, bleibt der Eintrag gültig, sonst wird neu geladen.
+
+    Zu jedem Eintrag wird ein Inhalts-Hash als ETag gehalten, dazu optional
+    die fertig kodierten Antwortkörper (z.B. gzip/brotli), damit eine häufig
+    abgerufene Geschichte nur einmal komprimiert wird.
+
+    Die zurückgegebenen Dokumente werden geteilt und dürfen nicht verändert
+    werden.
+    """
+
+    def __init__(self, max_entries, max_bytes, ttl):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    def get(self, collection, story_id):
+        return self.get_with_etag(collection, story_id)[0]
+
+    def get_with_etag(self, collection, story_id):
+        key = str(story_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.document, entry.etag
+
+        oid = ObjectId(key)
+        if entry is not None and entry.version != (None, None):
+            # Abgelaufen: nur die Version prüfen statt die Szenen neu zu laden
+            current = collection.find_one({'_id': oid}, VERSION_PROJECTION)
+            if current is None:
+                self.invalidate(key)
+                return None, None
+            if story_version(current) == entry.version:
+                with self._lock:
+                    entry.expires_at = now + self.ttl
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                    self.revalidations += 1
+                return entry.document, entry.etag
+
+        with self._lock:
+            self.misses += 1
+        document = collection.find_one({'_id': oid})
+        if document is None:
+            self.invalidate(key)
+            return None, None
+        etag = self._store(key, document, now)
+        return document, etag
+
+    def encoded_body(self, story_id, etag, encoding, build):
+        """Liefert den kodierten Antwortkörper zum Eintrag mit diesem ETag.
+
+        ``build()`` wird nur aufgerufen, wenn für diese Version und Kodierung
+        noch nichts im Cache liegt, und muss ``(bytes, angewandte Kodierung)``
+        liefern. Die Bytes zählen zum Byte-Limit des Caches.
+        """
+        key = str(story_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.etag == etag and encoding in entry.encoded:
+                return entry.encoded[encoding]
+        result = build()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.etag == etag and encoding not in entry.encoded:
+                entry.encoded[encoding] = result
+                entry.size += len(result[0])
+                self._bytes += len(result[0])
+                self._evict()
+        return result
+
+    def invalidate(self, story_id=None):
+        with self._lock:
+            if story_id is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            entry = self._entries.pop(str(story_id), None)
+            if entry is not None:
+                self._bytes -= entry.size
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations,
+                'evictions': self.evictions,
+            }
+
+    def _store(self, key, document, now):
+        encoded = bson.encode(document)
+        size = len(encoded)
+        etag = hashlib.sha256(encoded).hexdigest()
+        if size > self.max_bytes:
+            # Zu groß für den Cache, trotzdem ausliefern
+            return etag
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = _Entry(document, size, etag, now + self.ttl)
+            self._bytes += size
+            self._evict()
+        return etag
+
+    def _evict(self):
+        # Aufruf nur mit gehaltenem Lock
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+
+story_cache = StoryCache(
+    max_entries=Config.STORY_CACHE_MAX_ENTRIES,
+    max_bytes=Config.STORY_CACHE_MAX_BYTES,
+    ttl=Config.STORY_CACHE_TTL
+)
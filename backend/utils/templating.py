@@ -0,0 +1,62 @@
+# utils/templating.py
+
+import hashlib
+import logging
+import os
+import threading
+from functools import lru_cache
+
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
+from config import Config
+from utils.placeholders import personalize_text
+
+TEMPLATE_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
+PDF_TEMPLATE = 'pdf_template.html'
+
+_environment = None
+_lock = threading.Lock()
+
+
+def _create_environment():
+    bytecode_cache = None
+    if Config.TEMPLATE_BYTECODE_CACHE_DIR:
+        # Übersteht Neustarts: das Parsen/Kompilieren entfällt auch beim ersten Request
+        os.makedirs(Config.TEMPLATE_BYTECODE_CACHE_DIR, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(Config.TEMPLATE_BYTECODE_CACHE_DIR)
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATE_FOLDER),
+        auto_reload=Config.TEMPLATE_AUTO_RELOAD,
+        bytecode_cache=bytecode_cache
+    )
+    env.filters['personalize'] = personalize_text
+    return env
+
+
+def get_environment():
+    # Eine Umgebung pro Prozess; kompilierte Templates bleiben im Speicher
+    global _environment
+    if _environment is None:
+        with _lock:
+            if _environment is None:
+                _environment = _create_environment()
+    return _environment
+
+
+def get_template(name=PDF_TEMPLATE):
+    return get_environment().get_template(name)
+
+
+def precompile_templates():
+    env = get_environment()
+    names = env.list_templates(extensions=['html'])
+    for name in names:
+        env.get_template(name)
+    logging.info(f"Templates precompiled: {names}")
+    return names
+
+
+@lru_cache(maxsize=None)
+def layout_version(name=PDF_TEMPLATE):
+    # Änderungen am Layout erzeugen neue PDF-Cache-Schlüssel
+    source = get_environment().loader.get_source(get_environment(), name)[0]
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
@@ -0,0 +1,288 @@
+# utils/tracing.py
+
+import contextvars
+import functools
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+
+from flask import request
+from pymongo import monitoring
+from werkzeug.exceptions import HTTPException
+from config import Config
+
+# Spans im Format von OTLP/JSON (OpenTelemetry), eine Zeile pro Span in der JSONL-Datei
+SPAN_KIND_INTERNAL = 'SPAN_KIND_INTERNAL'
+SPAN_KIND_SERVER = 'SPAN_KIND_SERVER'
+SPAN_KIND_CLIENT = 'SPAN_KIND_CLIENT'
+SPAN_KIND_CONSUMER = 'SPAN_KIND_CONSUMER'
+STATUS_UNSET = 'STATUS_CODE_UNSET'
+STATUS_ERROR = 'STATUS_CODE_ERROR'
+TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+def _any_value(value):
+    # AnyValue aus dem OTLP-Protokoll
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class Span:
+    __slots__ = ('tracer', 'trace_id', 'span_id', 'parent_span_id', 'name', 'kind', 'attributes',
+                 'start_ns', 'end_ns', 'status', 'status_message', 'sampled', '_token')
+
+    def __init__(self, tracer, name, trace_id, parent_span_id, kind, attributes, sampled):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.attributes = {key: value for key, value in (attributes or {}).items() if value is not None}
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = STATUS_UNSET
+        self.status_message = None
+        self.sampled = sampled
+        self._token = None
+
+    def set_attribute(self, key, value):
+        if value is not None:
+            self.attributes[key] = value
+
+    def record_exception(self, exc):
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(exc).__name__}: {exc}"
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            if self.sampled:
+                self.tracer.export(self)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None and self.status != STATUS_ERROR:
+            self.record_exception(exc)
+        _current_span.reset(self._token)
+        self.end()
+        return False
+
+    def to_dict(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_span_id or '',
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [{'key': key, 'value': _any_value(value)} for key, value in self.attributes.items()],
+            'status': {'code': self.status},
+            'resource': {'service.name': self.tracer.service_name, 'process.pid': os.getpid()},
+        }
+        if self.status_message:
+            span['status']['message'] = self.status_message
+        return span
+
+
+class RingBufferExporter:
+    """Die letzten ``size`` Spans im Speicher, abrufbar über /api/debug/traces."""
+
+    def __init__(self, size):
+        self._spans = deque(maxlen=size)
+
+    def export(self, span_dict):
+        # deque.append ist threadsicher
+        self._spans.append(span_dict)
+
+    def spans(self, trace_id=None, limit=None):
+        spans = [span for span in list(self._spans) if trace_id is None or span['traceId'] == trace_id]
+        return spans[-limit:] if limit else spans
+
+    def clear(self):
+        self._spans.clear()
+
+
+class JsonlExporter:
+    """Hängt jeden Span als JSON-Zeile an eine lokale Datei an (auch aus mehreren Prozessen)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_pid = None
+
+    def export(self, span_dict):
+        line = json.dumps(span_dict, separators=(',', ':')) + '\n'
+        with self._lock:
+            if self._file is None or self._file_pid != os.getpid():
+                # Nach einem Fork eigene Datei-Handle; Anhängen ist zeilenweise atomar
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                self._file = open(self.path, 'a', encoding='utf-8', buffering=1)
+                self._file_pid = os.getpid()
+            self._file.write(line)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class Tracer:
+    def __init__(self, service_name, enabled=True, sample_rate=1.0, exporters=()):
+        self.service_name = service_name
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.exporters = list(exporters)
+
+    def current_span(self):
+        return _current_span.get()
+
+    def start_span(self, name, kind=SPAN_KIND_INTERNAL, attributes=None, parent=None, remote_parent=None):
+        """Neuer Span unter ``parent`` (Standard: aktueller Span) oder einem W3C-traceparent."""
+        parent = parent if parent is not None else _current_span.get()
+        if parent is not None:
+            return Span(self, name, parent.trace_id, parent.span_id, kind, attributes, parent.sampled)
+        if remote_parent is not None:
+            trace_id, parent_span_id, sampled = remote_parent
+        else:
+            # Sampling-Entscheidung nur an der Wurzel, Kinder erben sie
+            trace_id, parent_span_id = '%032x' % random.getrandbits(128), None
+            sampled = self.enabled and random.random() < self.sample_rate
+        return Span(self, name, trace_id, parent_span_id, kind, attributes, sampled and self.enabled)
+
+    def span(self, name, kind=SPAN_KIND_INTERNAL, **attributes):
+        # with tracer.span('jinja.render', template='pdf_template.html'): ...
+        return self.start_span(name, kind, attributes)
+
+    def export(self, span):
+        span_dict = span.to_dict()
+        for exporter in self.exporters:
+            exporter.export(span_dict)
+
+    def ring_buffer(self):
+        for exporter in self.exporters:
+            if isinstance(exporter, RingBufferExporter):
+                return exporter
+        return None
+
+
+def parse_traceparent(header):
+    match = TRACEPARENT.match((header or '').strip().lower())
+    if not match:
+        return None
+    trace_id, span_id, flags = match.groups()
+    return trace_id, span_id, bool(int(flags, 16) & 1)
+
+
+def create_tracer(config=Config):
+    exporters = []
+    if config.TRACING_EXPORTER in ('ring', 'both'):
+        exporters.append(RingBufferExporter(config.TRACING_RING_SIZE))
+    if config.TRACING_EXPORTER in ('jsonl', 'both'):
+        exporters.append(JsonlExporter(config.TRACING_JSONL_PATH))
+    return Tracer(config.TRACING_SERVICE_NAME, config.TRACING_ENABLED, config.TRACING_SAMPLE_RATE, exporters)
+
+
+tracer = create_tracer()
+
+
+def trace_resource(view):
+    """Decorator für flask-restful (Api(decorators=[...])): ein Server-Span pro Resource-Methode."""
+    resource_name = getattr(view, 'view_class', view).__name__
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not tracer.enabled:
+            return view(*args, **kwargs)
+        remote_parent = parse_traceparent(request.headers.get('traceparent'))
+        span = tracer.start_span(f"{request.method} {resource_name}", SPAN_KIND_SERVER, {
+            'http.request.method': request.method,
+            'http.route': request.url_rule.rule if request.url_rule else request.path,
+            'code.function': f"{resource_name}.{request.method.lower()}",
+        }, remote_parent=remote_parent)
+        with span:
+            try:
+                response = view(*args, **kwargs)
+            except HTTPException as e:
+                span.set_attribute('http.response.status_code', e.code)
+                if e.code >= 500:
+                    span.record_exception(e)
+                raise
+            span.set_attribute('http.response.status_code', response.status_code)
+            if response.status_code >= 500:
+                span.status = STATUS_ERROR
+            response.headers['X-Trace-Id'] = span.trace_id
+            return response
+
+    return wrapper
+
+
+class CommandTracingListener(monitoring.CommandListener):
+    """Ein Client-Span pro Mongo-Befehl, als Kind des Spans, der ihn ausgelöst hat.
+
+    pymongo ruft started/succeeded im Thread des Aufrufers auf, der aktuelle Span
+    ist daher über die ContextVar erreichbar.
+    """
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        parent = self.tracer.current_span()
+        if parent is None or not parent.sampled:
+            # Nur Befehle innerhalb eines Traces aufzeichnen (z.B. kein Index-Aufbau im Hintergrund)
+            return
+        collection = event.command.get(event.command_name)
+        span = self.tracer.start_span(f"mongodb.{event.command_name}", SPAN_KIND_CLIENT, {
+            'db.system': 'mongodb',
+            'db.name': event.database_name,
+            'db.operation': event.command_name,
+            'db.mongodb.collection': collection if isinstance(collection, str) else None,
+            'server.address': '%s:%s' % event.connection_id if event.connection_id else None,
+        }, parent=parent)
+        with self._lock:
+            self._spans[(event.request_id, event.operation_id)] = span
+
+    def _finish(self, event, error=None):
+        with self._lock:
+            span = self._spans.pop((event.request_id, event.operation_id), None)
+        if span is None:
+            return
+        if error is not None:
+            span.status = STATUS_ERROR
+            span.status_message = str(error)
+        span.end()
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event, event.failure)
+
+
+tracing_listener = CommandTracingListener(tracer)
+
+
+def dump(trace_id=None, limit=None):
+    """Spans aus dem Ringpuffer, älteste zuerst (leer, wenn nur nach JSONL exportiert wird)."""
+    ring = tracer.ring_buffer()
+    return ring.spans(trace_id, limit) if ring is not None else []
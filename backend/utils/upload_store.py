@@ -0,0 +1,54 @@
+# utils/upload_store.py
+
+import hashlib
+import os
+import uuid
+
+CHUNK_SIZE = 64 * 1024
+
+# Gleiche Bilddaten sollen nicht wegen der Schreibweise doppelt abgelegt werden
+EXTENSION_ALIASES = {'jpeg': 'jpg'}
+
+
+def normalize_extension(filename):
+    extension = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+    return EXTENSION_ALIASES.get(extension, extension)
+
+
+def content_path(digest, extension):
+    # ab/cd/<hash>.<ext>, damit kein Verzeichnis hunderttausende Dateien enthält
+    filename = f"{digest}.{extension}" if extension else digest
+    return '/'.join((digest[:2], digest[2:4], filename))
+
+
+def store_stream(stream, upload_folder, extension):
+    """Schreibt den Stream blockweise und berechnet dabei den SHA-256.
+
+    Gibt ``(digest, relative_path, size, created)`` zurück; ``created`` ist
+    False, wenn identischer Inhalt bereits gespeichert war.
+    """
+    tmp_folder = os.path.join(upload_folder, 'tmp')
+    os.makedirs(tmp_folder, exist_ok=True)
+    tmp_path = os.path.join(tmp_folder, uuid.uuid4().hex)
+    sha256 = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                sha256.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+        digest = sha256.hexdigest()
+        relative_path = content_path(digest, extension)
+        file_path = os.path.join(upload_folder, *relative_path.split('/'))
+        if os.path.exists(file_path):
+            return digest, relative_path, size, False
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        os.replace(tmp_path, file_path)
+        return digest, relative_path, size, True
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
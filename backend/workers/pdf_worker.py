@@ -0,0 +1,128 @@
+# workers/pdf_worker.py
+
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+
+from config import Config
+
+# Abstand zwischen zwei Prüfungen auf hängengebliebene Jobs
+STALE_CHECK_INTERVAL = 30
+
+
+def worker_loop(index, stop_event, poll_interval):
+    # Erst im Kindprozess importieren: jeder Prozess bekommt seinen eigenen MongoClient
+    from utils.database import db
+    from utils import pdf_jobs
+    from resources.generate_pdf import render_personalized_story_pdf, PDFRenderError
+    from utils.templating import precompile_templates
+    from utils.tracing import tracer, SPAN_KIND_CONSUMER
+
+    precompile_templates()
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    logging.info(f"PDF worker started: {worker_id}")
+    last_stale_check = 0.0
+    try:
+        while not stop_event.is_set():
+            if time.monotonic() - last_stale_check > STALE_CHECK_INTERVAL:
+                pdf_jobs.requeue_stale_jobs(db, Config.PDF_JOB_STALE_AFTER, Config.PDF_JOB_MAX_ATTEMPTS)
+                last_stale_check = time.monotonic()
+
+            pdf_jobs.register_worker(db, worker_id, os.getpid(), busy=False)
+            job = pdf_jobs.claim_next_job(db, worker_id)
+            if job is None:
+                stop_event.wait(poll_interval)
+                continue
+
+            pdf_jobs.register_worker(db, worker_id, os.getpid(), busy=True)
+            logging.info(f"Rendering PDF job {job['_id']} for {job['personalized_story_id']}")
+            # Ein Trace pro Job; Mongo-Befehle und Render-Schritte werden Kinder dieses Spans
+            with tracer.span('pdf_worker.job', SPAN_KIND_CONSUMER, **{
+                'pdf_job.id': str(job['_id']),
+                'personalized_story.id': job['personalized_story_id'],
+                'worker.id': worker_id,
+            }) as span:
+                try:
+                    pdf_path = render_personalized_story_pdf(
+                        job['personalized_story_id'],
+                        progress=lambda fraction, stage: pdf_jobs.update_progress(db, job['_id'], fraction, stage)
+                    )
+                    pdf_jobs.complete_job(db, job['_id'], pdf_path)
+                except PDFRenderError as e:
+                    span.record_exception(e)
+                    pdf_jobs.fail_job(db, job['_id'], e.message)
+                except Exception as e:
+                    span.record_exception(e)
+                    logging.error(f"Error rendering PDF job {job['_id']}: {e}", exc_info=True)
+                    pdf_jobs.fail_job(db, job['_id'], 'Error generating PDF')
+    finally:
+        pdf_jobs.unregister_worker(db, worker_id)
+        logging.info(f"PDF worker stopped: {worker_id}")
+
+
+def _run_worker(index, stop_event, poll_interval):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(processName)s %(message)s')
+    # SIGINT/SIGTERM behandelt der Elternprozess über das stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    worker_loop(index, stop_event, poll_interval)
+
+
+class PDFWorkerPool:
+    def __init__(self, processes, poll_interval):
+        # spawn statt fork: keine geerbten Mongo-Verbindungen
+        self.context = multiprocessing.get_context('spawn')
+        self.processes = processes
+        self.poll_interval = poll_interval
+        self.stop_event = self.context.Event()
+        self.workers = {}
+
+    def _start(self, index):
+        process = self.context.Process(
+            target=_run_worker,
+            args=(index, self.stop_event, self.poll_interval),
+            name=f"pdf-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        self.workers[index] = process
+
+    def run(self):
+        for index in range(self.processes):
+            self._start(index)
+        logging.info(f"PDF worker pool running with {self.processes} processes")
+        while not self.stop_event.is_set():
+            for index, process in list(self.workers.items()):
+                if not process.is_alive():
+                    logging.warning(f"PDF worker {index} exited with {process.exitcode}, restarting")
+                    self._start(index)
+            self.stop_event.wait(1.0)
+        for process in self.workers.values():
+            process.join(timeout=30)
+
+    def stop(self, *args):
+        self.stop_event.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PDF rendering worker pool')
+    parser.add_argument('--processes', type=int, default=Config.PDF_WORKER_PROCESSES, help='Number of worker processes')
+    parser.add_argument('--poll-interval', type=float, default=Config.PDF_JOB_POLL_INTERVAL, help='Seconds between queue polls')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    pool = PDFWorkerPool(args.processes, args.poll_interval)
+    signal.signal(signal.SIGTERM, pool.stop)
+    signal.signal(signal.SIGINT, pool.stop)
+    pool.run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
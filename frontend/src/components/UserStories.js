@@ -7,20 +7,33 @@ import { useNavigate } from 'react-router-dom';
 
 const UserStories = () => {
   const [userStories, setUserStories] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [totalCount, setTotalCount] = useState(0);
   const { currentUser, setSelectedStory, setPersonalData, setUserImages } = useContext(AppContext);
   const navigate = useNavigate();
 
+  // Lädt eine Seite der Übersicht (nur Titel, Datum und Cover, keine Szenen)
+  const loadStories = (after = null) => {
+    const params = { view: 'summary' };
+    if (after) {
+      params.after = after;
+    }
+    axios
+      .get('http://192.168.178.25:49158/api/user-stories', { params })
+      .then((response) => {
+        setUserStories((previous) => (after ? [...previous, ...response.data] : response.data));
+        setNextCursor(response.headers['x-next-cursor'] || null);
+        setTotalCount(parseInt(response.headers['x-total-count'], 10) || response.data.length);
+        console.debug('Benutzergeschichten geladen:', response.data);
+      })
+      .catch((error) => {
+        console.error('Fehler beim Laden der Benutzergeschichten:', error);
+      });
+  };
+
   useEffect(() => {
     if (currentUser) {
-      axios
-        .get('http://192.168.178.25:49158/api/user-stories')
-        .then((response) => {
-          setUserStories(response.data);
-          console.debug('Benutzergeschichten geladen:', response.data);
-        })
-        .catch((error) => {
-          console.error('Fehler beim Laden der Benutzergeschichten:', error);
-        });
+      loadStories();
     }
   }, [currentUser]);
 
@@ -36,6 +49,7 @@ const UserStories = () => {
           console.debug('Geschichte gelöscht:', response.data);
           // Aktualisiere die Geschichtenliste
           setUserStories(userStories.filter((story) => story.id !== storyId));
+          setTotalCount((count) => Math.max(count - 1, 0));
         })
         .catch((error) => {
           console.error('Fehler beim Löschen der Geschichte:', error);
@@ -74,7 +88,7 @@ const UserStories = () => {
 
   return (
     <div>
-      <h1>Meine Geschichten</h1>
+      <h1>Meine Geschichten ({totalCount})</h1>
       <ul>
         {userStories.map((story) => (
           <li key={story.id}>
@@ -85,6 +99,7 @@ const UserStories = () => {
           </li>
         ))}
       </ul>
+      {nextCursor && <button onClick={() => loadStories(nextCursor)}>Mehr laden</button>}
     </div>
   );
 };